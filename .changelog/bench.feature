@@ -0,0 +1 @@
+Added `docalign bench`: synthetic corpus generator with per-module timings, lines/sec, peak memory and baseline regression checks
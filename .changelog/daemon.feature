@@ -0,0 +1 @@
+Added `docalign daemon` to keep the engine warm; `docalign` forwards to a running daemon and falls back to in-process execution
@@ -0,0 +1 @@
+Checks now return structured `Diagnostic` records (code, line, column, expected/actual values); `str()` still gives the previous message text
@@ -0,0 +1 @@
+Added `--changed-since <rev>` and `--staged` to select files through git instead of walking directories
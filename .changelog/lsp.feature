@@ -0,0 +1 @@
+Added `docalign lsp`, a stdio language server with incremental diagnostics and fix code actions
@@ -0,0 +1 @@
+Added an opt-in NumPy backend (`DOCALIGN_BACKEND=numpy`, `pip install "docalign[numpy]"`) for box-char positions, rail column tables and box width extents on large diagrams
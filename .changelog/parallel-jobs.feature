@@ -0,0 +1 @@
+Added `--jobs N|auto` to process files on a pool of worker processes
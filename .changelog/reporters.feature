@@ -0,0 +1 @@
+Added `--format jsonl|sarif|text`: JSON Lines streamed per file, or a single SARIF 2.1.0 run for code-scanning dashboards
@@ -0,0 +1 @@
+Added a content-hash result cache in `.docalign_cache/` and a `--no-cache` flag to bypass it
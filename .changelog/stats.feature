@@ -0,0 +1 @@
+Added `--stats` (per-module, per-iteration and per-file timings) and `--profile-out` (pstats profile merged across pool workers)
@@ -0,0 +1 @@
+Added `--watch` to re-check changed files on save using inotify, with an mtime polling fallback
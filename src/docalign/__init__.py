@@ -1,2 +1,9 @@
-from docalign.cli import run_checks as run_checks
-from docalign.cli import run_fixes as run_fixes
+__all__ = ["run_checks", "run_fixes"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from docalign import cli
+
+        return getattr(cli, name)
+    raise AttributeError(f"module 'docalign' has no attribute {name!r}")
@@ -0,0 +1,251 @@
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from docalign.cli import CHECK_MODULES, run_checks, run_fixes
+from docalign.constants import BENCH_DEFAULTS, BENCH_REGRESSION_THRESHOLD
+from docalign.memo import BlockMemo
+from docalign.parser import Document
+
+_WORDS = ("api", "cache", "worker", "queue", "router", "store", "parser", "index", "client", "server", "auth", "log")
+_OPTIONS = {
+    "--files": ("files", int),
+    "--blocks": ("blocks", int),
+    "--depth": ("depth", int),
+    "--table-rows": ("table_rows", int),
+    "--drift": ("drift", float),
+    "--seed": ("seed", int),
+    "--repeat": ("repeat", int),
+}
+
+
+def _label(rng):
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 3)))
+
+
+def _wrap(lines, pad=1):
+    width = max(len(line) for line in lines) + 2 * pad
+    body = [f"│{' ' * pad}{line.ljust(width - 2 * pad)}{' ' * pad}│" for line in lines]
+    return ["┌" + "─" * width + "┐", *body, "└" + "─" * width + "┘"]
+
+
+def _nested(rng, depth):
+    lines = [_label(rng) for _ in range(rng.randint(1, 3))]
+    for _ in range(max(depth, 1)):
+        # Two columns of padding keep each level outside box_walls' fuzzy closer search.
+        lines = _wrap([_label(rng), *lines], pad=2)
+    return lines
+
+
+def _flow(rng):
+    left, right = _wrap([_label(rng)]), _wrap([_label(rng)])
+    gap = rng.randint(3, 8)
+    return [
+        left[0] + " " * gap + right[0],
+        left[1] + "─" * (gap - 1) + ">" + right[1],
+        left[2] + " " * gap + right[2],
+    ]
+
+
+def _stack(rng):
+    top, bottom = _wrap([_label(rng)]), _wrap([_label(rng)])
+    col = rng.randint(2, len(top[0]) - 3)
+    tee = top[-1][:col] + "┬" + top[-1][col + 1 :]
+    return [*top[:-1], tee, " " * col + "│", " " * col + "v", *bottom]
+
+
+def _drift(rng, lines, rate):
+    drifted = []
+    for i, line in enumerate(lines):
+        wall = max(line.rfind(c) for c in "│┐┘")
+        if i and wall > 0 and rng.random() < rate:
+            if line[wall - 1] == " " and rng.random() < 0.5:
+                line = line[: wall - 1] + line[wall:]
+            else:
+                line = line[:wall] + " " + line[wall:]
+        drifted.append(line)
+    return drifted
+
+
+def _table(rng, rows, rate):
+    cells = [["name", "kind", "notes"]] + [[_label(rng) for _ in range(3)] for _ in range(rows)]
+    widths = [max(len(row[c]) for row in cells) for c in range(3)]
+    lines = []
+    for r, row in enumerate(cells):
+        pads = [w - len(cell) + (1 if r and rng.random() < rate else 0) for cell, w in zip(row, widths)]
+        lines.append("| " + " | ".join(cell + " " * pad for cell, pad in zip(row, pads)) + " |")
+        if r == 0:
+            lines.append("|" + "|".join("-" * (w + 2) for w in widths) + "|")
+    return lines
+
+
+def _pairs(rng, count, sep, rate):
+    keys = [f"{rng.choice(_WORDS)}-{i}" for i in range(count)]
+    width = max(len(k) for k in keys)
+    return [f"- {k}{sep}".ljust(width + 3 + len(sep) + (1 if rng.random() < rate else 0)) for k in keys]
+
+
+def generate_doc(rng, blocks, depth, table_rows, drift):
+    lines = ["# Generated benchmark document", ""]
+    if table_rows:
+        lines += _table(rng, table_rows, drift) + [""]
+    for b in range(blocks):
+        kind = b % 3
+        diagram = _nested(rng, depth) if kind == 0 else _flow(rng) if kind == 1 else _stack(rng)
+        lines += [f"## Section {b}", "", "```", *_drift(rng, diagram, drift), "```", ""]
+        if b % 2:
+            lines += ["related docs:"]
+            lines += [f"{p}- {_label(rng)}" for p in _pairs(rng, 3, "", drift)] + [""]
+        else:
+            lines += ["config:"]
+            lines += [f"{p}{rng.randint(1, 100)}" for p in _pairs(rng, 3, ":", drift)] + [""]
+    return [line + "\n" for line in lines]
+
+
+def generate_corpus(files, blocks, depth, table_rows, drift, seed=0):
+    rng = random.Random(seed)
+    return [generate_doc(rng, blocks, depth, table_rows, drift) for _ in range(files)]
+
+
+def _best(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure(corpus, repeat=BENCH_DEFAULTS["repeat"]):
+    docs = [Document(lines) for lines in corpus]
+    timings = {
+        "parse": _best(lambda: [Document(lines) for lines in corpus], repeat),
+        "run_checks": _best(lambda: [run_checks(lines, memo=BlockMemo(maxsize=0)) for lines in corpus], repeat),
+        "run_fixes": _best(lambda: [run_fixes(lines, memo=BlockMemo(maxsize=0)) for lines in corpus], repeat),
+    }
+    for name, mod in CHECK_MODULES.items():
+        timings[f"check:{name}"] = _best(lambda: [mod.check(doc) for doc in docs], repeat)
+    for name, mod in CHECK_MODULES.items():
+        timings[f"fix:{name}"] = _best(lambda: [mod.fix(list(lines)) for lines in corpus], repeat)
+
+    tracemalloc.start()
+    try:
+        for lines in corpus:
+            run_fixes(lines, memo=BlockMemo(maxsize=0))
+            run_checks(lines, memo=BlockMemo(maxsize=0))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"lines": sum(len(lines) for lines in corpus), "timings": timings, "peak_bytes": peak}
+
+
+def compare(results, baseline, threshold=BENCH_REGRESSION_THRESHOLD):
+    regressions = []
+    for stage, seconds in results["timings"].items():
+        base = baseline["timings"].get(stage)
+        if base and seconds > base * (1 + threshold):
+            regressions.append(stage)
+    base_peak = baseline.get("peak_bytes")
+    if base_peak and results["peak_bytes"] > base_peak * (1 + threshold):
+        regressions.append("peak_bytes")
+    return regressions
+
+
+def report(results, baseline=None, regressions=()):
+    params = results["params"]
+    print(
+        f"corpus: {params['files']} file(s), {results['lines']} lines "
+        f"({params['blocks']} block(s)/file, depth {params['depth']}, {params['table_rows']} table row(s), "
+        f"drift {params['drift']}, seed {params['seed']}), best of {params['repeat']}"
+    )
+    header = f"{'stage':<20} {'seconds':>10} {'lines/sec':>12}"
+    print(header + (f" {'baseline':>10} {'change':>8}" if baseline else ""))
+    for stage, seconds in results["timings"].items():
+        rate = results["lines"] / seconds if seconds else float("inf")
+        row = f"{stage:<20} {seconds:>10.4f} {rate:>12,.0f}"
+        base = baseline["timings"].get(stage) if baseline else None
+        if base:
+            row += f" {base:>10.4f} {(seconds / base - 1) * 100:>+7.1f}%"
+            if stage in regressions:
+                row += "  REGRESSION"
+        print(row)
+    line = f"peak memory: {results['peak_bytes'] / 1024 / 1024:.1f} MiB"
+    if baseline and baseline.get("peak_bytes"):
+        line += f" (baseline {baseline['peak_bytes'] / 1024 / 1024:.1f} MiB)"
+        if "peak_bytes" in regressions:
+            line += "  REGRESSION"
+    print(line)
+
+
+def _write_corpus(directory, corpus):
+    os.makedirs(directory, exist_ok=True)
+    for i, lines in enumerate(corpus):
+        with open(os.path.join(directory, f"bench-{i:04d}.md"), "w") as f:
+            f.writelines(lines)
+
+
+def _parse_args(argv):
+    params = dict(BENCH_DEFAULTS)
+    paths = {"--save": None, "--baseline": None, "--write": None}
+    threshold = BENCH_REGRESSION_THRESHOLD
+    i = 0
+    while i < len(argv):
+        opt = argv[i]
+        if i + 1 >= len(argv) or (opt not in _OPTIONS and opt not in paths and opt != "--threshold"):
+            print(f"error: unknown bench option: '{opt}'")
+            sys.exit(1)
+        value = argv[i + 1]
+        try:
+            if opt in _OPTIONS:
+                key, conv = _OPTIONS[opt]
+                params[key] = conv(value)
+            elif opt == "--threshold":
+                threshold = float(value)
+            else:
+                paths[opt] = value
+        except ValueError:
+            print(f"error: invalid {opt} value: '{value}'")
+            sys.exit(1)
+        i += 2
+    if params["files"] < 1 or params["repeat"] < 1 or not 0 <= params["drift"] <= 1:
+        print("error: --files and --repeat must be positive and --drift between 0 and 1")
+        sys.exit(1)
+    return params, paths, threshold
+
+
+def main(argv):
+    params, paths, threshold = _parse_args(argv)
+    corpus = generate_corpus(
+        params["files"], params["blocks"], params["depth"], params["table_rows"], params["drift"], params["seed"]
+    )
+    if paths["--write"]:
+        _write_corpus(paths["--write"], corpus)
+
+    results = {"params": params, **measure(corpus, params["repeat"])}
+
+    baseline = None
+    regressions = []
+    if paths["--baseline"]:
+        try:
+            with open(paths["--baseline"]) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"error: cannot read baseline '{paths['--baseline']}': {e}")
+            sys.exit(1)
+        if baseline.get("params") != params:
+            print("warning: baseline was recorded with different corpus parameters")
+        regressions = compare(results, baseline, threshold)
+
+    report(results, baseline, regressions)
+
+    if paths["--save"]:
+        with open(paths["--save"], "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
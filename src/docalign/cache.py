@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+
+from docalign.constants import CACHE_FORMAT, CACHE_SIZE_FILE
+
+
+class ResultCache:
+    def __init__(self, directory, version, ignored):
+        self.directory = directory
+        self.salt = f"{CACHE_FORMAT}\0{version}\0{','.join(sorted(ignored))}\0"
+
+    def key(self, lines):
+        digest = hashlib.sha256(self.salt.encode())
+        for line in lines:
+            digest.update(line.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                errors = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return errors
+
+    def _ensure_directory(self):
+        if os.path.isdir(self.directory):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".gitignore"), "w", encoding="utf-8") as f:
+            f.write("# Automatically created by docalign.\n*\n")
+
+    def _record_size(self, size):
+        with open(os.path.join(self.directory, CACHE_SIZE_FILE), "a", encoding="utf-8") as f:
+            f.write(f"{size}\n")
+
+    def put(self, key, errors):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            self._ensure_directory()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(errors, f, ensure_ascii=False)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+            self._record_size(size)
+        except OSError:
+            pass
+
+    def estimated_size(self):
+        try:
+            with open(os.path.join(self.directory, CACHE_SIZE_FILE), encoding="utf-8") as f:
+                return sum(int(line) for line in f if line.strip().isdigit())
+        except OSError:
+            return 0
+
+    def evict(self, max_bytes):
+        if self.estimated_size() <= max_bytes:
+            return
+        entries = []
+        total = 0
+        for root, _, filenames in os.walk(self.directory):
+            if root == self.directory:
+                continue
+            for fn in filenames:
+                path = os.path.join(root, fn)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        try:
+            with open(os.path.join(self.directory, CACHE_SIZE_FILE), "w", encoding="utf-8") as f:
+                f.write(f"{total}\n")
+        except OSError:
+            pass
@@ -1,35 +1,46 @@
+import re
+
 from docalign.constants import ARROW_CHARS, ARROW_SEARCH_RANGE, BOX_CHARS, HORIZ_ARROW_CHARS
-from docalign.parser import iter_code_blocks
+from docalign.diagnostics import Diagnostic
+from docalign.parser import as_document
 from docalign.utils import _is_standalone_arrow
 
+_ARROW = re.compile("[" + re.escape("".join(sorted(ARROW_CHARS))) + "]")
+_ANY_ARROW = re.compile("[" + re.escape("".join(sorted(ARROW_CHARS | HORIZ_ARROW_CHARS))) + "]")
+_SEARCH_ORDER = [dc for r in range(ARROW_SEARCH_RANGE + 1) for dc in ([0] if r == 0 else [-r, r])]
+
 
 def check(lines):
     errors = []
-    for _, code_lines in iter_code_blocks(lines):
-        errors.extend(_check_arrows(code_lines))
+    for block in as_document(lines).code_blocks:
+        errors.extend(check_block(block))
     return errors
 
 
 def fix(lines):
-    result = list(lines)
-    for code_indices, _ in iter_code_blocks(lines):
-        _fix_arrows_in_block(code_indices, result)
+    doc = as_document(lines)
+    result = list(doc.lines)
+    for block in doc.code_blocks:
+        fix_block(block, result)
     return result
 
 
-def _check_arrows(code_lines):
+def check_block(block):
     errors = []
+    grid = block.grid
+    code_lines = block.code_lines
     for idx, (i, raw) in enumerate(code_lines):
-        for j, c in enumerate(raw):
+        for m in _ANY_ARROW.finditer(raw):
+            j, c = m.start(), m.group()
             if c in ARROW_CHARS:
                 if _is_standalone_arrow(raw, j):
-                    expected = _find_arrow_target(code_lines, idx, j, c)
+                    expected = _find_arrow_target(grid, idx, j, c)
                     if expected is not None and expected != j:
-                        errors.append(f"L{i + 1} arrow '{c}' at col {j}, expected col {expected}")
+                        errors.append(Diagnostic("arrow-align", i + 1, col=j, expected=expected, detail=c))
                 elif _is_embedded_in_horiz_border(raw, j):
-                    errors.append(f"L{i + 1} arrow '{c}' embedded in border at col {j}")
-            elif c in HORIZ_ARROW_CHARS and _is_embedded_in_vert_border(code_lines, idx, j):
-                errors.append(f"L{i + 1} arrow '{c}' embedded in border at col {j}")
+                    errors.append(Diagnostic("arrow-embedded", i + 1, col=j, detail=c))
+            elif _is_embedded_in_vert_border(grid, idx, j):
+                errors.append(Diagnostic("arrow-embedded", i + 1, col=j, detail=c))
     return errors
 
 
@@ -39,35 +50,27 @@ def _is_embedded_in_horiz_border(raw, j):
     return left == "─" or right == "─"
 
 
-def _is_embedded_in_vert_border(code_lines, line_idx, col):
-    above = line_idx - 1
-    below = line_idx + 1
-    has_above = above >= 0 and col < len(code_lines[above][1]) and code_lines[above][1][col] == "│"
-    has_below = below < len(code_lines) and col < len(code_lines[below][1]) and code_lines[below][1][col] == "│"
-    return has_above or has_below
+def _is_embedded_in_vert_border(grid, row, col):
+    return grid.char(row - 1, col) == "│" or grid.char(row + 1, col) == "│"
 
 
-def _find_arrow_target(code_lines, arrow_idx, arrow_col, arrow_char):
-    search_range = range(arrow_idx - 1, -1, -1) if arrow_char == "v" else range(arrow_idx + 1, len(code_lines))
-    for si in search_range:
-        _, sraw = code_lines[si]
-        for dc in [i for r in range(ARROW_SEARCH_RANGE + 1) for i in ([0] if r == 0 else [-r, r])]:
-            col = arrow_col + dc
-            if 0 <= col < len(sraw) and sraw[col] in BOX_CHARS:
-                return col if dc != 0 else None
-        break
+def _find_arrow_target(grid, arrow_idx, arrow_col, arrow_char):
+    row = arrow_idx - 1 if arrow_char == "v" else arrow_idx + 1
+    for dc in _SEARCH_ORDER:
+        if grid.char(row, arrow_col + dc) in BOX_CHARS:
+            return arrow_col + dc if dc != 0 else None
     return None
 
 
-def _fix_arrows_in_block(code_indices, all_lines):
-    code_lines = [(i, all_lines[i].rstrip("\n")) for i in code_indices]
-    for idx, (i, raw) in enumerate(code_lines):
-        arrows = [(j, c) for j, c in enumerate(raw) if c in ARROW_CHARS and _is_standalone_arrow(raw, j)]
+def fix_block(block, all_lines):
+    grid = block.grid
+    for idx, (i, raw) in enumerate(block.code_lines):
+        arrows = [(m.start(), m.group()) for m in _ARROW.finditer(raw) if _is_standalone_arrow(raw, m.start())]
         if not arrows:
             continue
         corrections = []
         for j, c in arrows:
-            expected = _find_arrow_target(code_lines, idx, j, c)
+            expected = _find_arrow_target(grid, idx, j, c)
             if expected is not None and expected != j:
                 corrections.append((j, expected))
         if not corrections:
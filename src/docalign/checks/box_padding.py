@@ -1,21 +1,23 @@
 from collections import Counter
 
 from docalign.constants import BOX_CHARS, MAX_PAD_DRIFT
-from docalign.parser import iter_code_blocks
-from docalign.utils import _find_boxes, _is_tree_block
+from docalign.diagnostics import Diagnostic
+from docalign.parser import as_document
+from docalign.utils import _find_boxes
 
 
 def check(lines):
     errors = []
-    for _, code_lines in iter_code_blocks(lines):
-        errors.extend(_check_padding(code_lines))
+    for block in as_document(lines).code_blocks:
+        errors.extend(check_block(block))
     return errors
 
 
 def fix(lines):
-    result = list(lines)
-    for code_indices, _ in iter_code_blocks(lines):
-        _fix_padding_in_block(code_indices, result)
+    doc = as_document(lines)
+    result = list(doc.lines)
+    for block in doc.code_blocks:
+        fix_block(block, result)
     return result
 
 
@@ -54,12 +56,13 @@ def _has_layout_intent(pad_values):
     return max(pad_values) - min(pad_values) >= MAX_PAD_DRIFT
 
 
-def _check_padding(code_lines):
+def check_block(block):
     errors = []
-    if _is_tree_block(code_lines):
+    if block.is_tree:
         return errors
 
-    for col_left, col_right, _, _, content_indices in _find_boxes(code_lines):
+    code_lines = block.code_lines
+    for col_left, col_right, _, _, content_indices in _find_boxes(code_lines, block.columns):
         paddings = []
         for ci in content_indices:
             line_idx, raw = code_lines[ci]
@@ -76,17 +79,17 @@ def _check_padding(code_lines):
 
         for line_idx, pad in paddings:
             if pad != expected:
-                errors.append(f"L{line_idx + 1} box padding={pad}, expected={expected}")
+                errors.append(Diagnostic("box-padding", line_idx + 1, expected=expected, actual=pad))
 
     return errors
 
 
-def _fix_padding_in_block(code_indices, all_lines):
-    code_lines = [(i, all_lines[i].rstrip("\n")) for i in code_indices]
-    if _is_tree_block(code_lines):
+def fix_block(block, all_lines):
+    if block.is_tree:
         return
 
-    for col_left, col_right, _, _, content_indices in _find_boxes(code_lines):
+    code_lines = block.code_lines
+    for col_left, col_right, _, _, content_indices in _find_boxes(code_lines, block.columns):
         paddings = []
         for ci in content_indices:
             line_idx, raw = code_lines[ci]
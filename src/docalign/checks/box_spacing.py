@@ -1,3 +1,5 @@
+from bisect import bisect_left
+
 from docalign.constants import (
     BORDER_CHARS,
     BOX_CHARS,
@@ -5,21 +7,23 @@ from docalign.constants import (
     MAX_FIX_ITERATIONS,
     MIN_PAD,
 )
-from docalign.parser import iter_code_blocks
-from docalign.utils import _find_boxes, _is_tree_block
+from docalign.diagnostics import Diagnostic
+from docalign.parser import as_document
+from docalign.utils import _box_openers, _find_boxes
 
 
 def check(lines):
     errors = []
-    for _, code_lines in iter_code_blocks(lines):
-        errors.extend(_check_spacing(code_lines))
+    for block in as_document(lines).code_blocks:
+        errors.extend(check_block(block))
     return errors
 
 
 def fix(lines):
-    result = list(lines)
-    for code_indices, _ in iter_code_blocks(result):
-        _fix_spacing_in_block(code_indices, result)
+    doc = as_document(lines)
+    result = list(doc.lines)
+    for block in doc.code_blocks:
+        fix_block(block, result)
     return result
 
 
@@ -49,20 +53,21 @@ def _get_left_padding(raw, col_left, col_right):
     return len(inner) - len(inner.lstrip())
 
 
-def _check_spacing(code_lines):
+def check_block(block):
     errors = []
-    if _is_tree_block(code_lines):
+    if block.is_tree:
         return errors
 
-    for col_left, col_right, _, _, content_indices in _find_boxes(code_lines):
+    code_lines = block.code_lines
+    for col_left, col_right, _, _, content_indices in _find_boxes(code_lines, block.columns):
         for ci in content_indices:
             line_idx, raw = code_lines[ci]
             rpad = _get_right_padding(raw, col_left, col_right)
             if rpad is not None and rpad < MIN_PAD:
-                errors.append(f"L{line_idx + 1} box right spacing={rpad}, minimum={MIN_PAD}")
+                errors.append(Diagnostic("box-right-spacing", line_idx + 1, expected=MIN_PAD, actual=rpad))
             lpad = _get_left_padding(raw, col_left, col_right)
             if lpad is not None and lpad < MIN_PAD:
-                errors.append(f"L{line_idx + 1} box left spacing={lpad}, minimum={MIN_PAD}")
+                errors.append(Diagnostic("box-left-spacing", line_idx + 1, expected=MIN_PAD, actual=lpad))
 
     return errors
 
@@ -75,15 +80,122 @@ def _find_connectors_in_range(raw, col_left, col_right):
     return connectors
 
 
-def _collect_box_insertions(code_lines):
-    all_boxes = list(_find_boxes(code_lines))
-
-    def get_parent_info(col_left, col_right):
-        for other_left, other_right, opening_ci, *_ in all_boxes:
-            if other_left < col_left and col_right < other_right:
-                return (other_left, other_right, opening_ci)
-        return None
-
+def _parents(boxes):
+    # A box's parent is the first box, in discovery order, whose columns
+    # strictly enclose its own. Sweep the boxes by left column, adding each
+    # to a Fenwick tree that keeps the smallest box index per right column
+    # (indexed from the right, so a prefix is every wider right column).
+    width = max((box[1] for box in boxes), default=0) + 1
+    tree = [len(boxes)] * (width + 1)
+    parents = [None] * len(boxes)
+    order = sorted(range(len(boxes)), key=lambda i: boxes[i][0])
+    added = 0
+    for i in order:
+        col_left, col_right = boxes[i][:2]
+        while boxes[order[added]][0] < col_left:
+            j = order[added]
+            pos = width - boxes[j][1]
+            while pos <= width:
+                if j < tree[pos]:
+                    tree[pos] = j
+                pos += pos & -pos
+            added += 1
+        best = len(boxes)
+        pos = width - col_right - 1
+        while pos > 0:
+            if tree[pos] < best:
+                best = tree[pos]
+            pos -= pos & -pos
+        if best < len(boxes):
+            parents[i] = boxes[best][:4]
+    return parents
+
+
+def _first_enclosing(keys, key):
+    for other in keys:
+        if other[0] < key[0] and key[1] < other[1]:
+            return other
+    return None
+
+
+class _BoxTree:
+    # The boxes of a block being fixed, with their parents and per-box
+    # paddings, kept across fix iterations: rows an insertion touched are
+    # rescanned for openers, and parents are looked up again only around
+    # boxes that appeared or went away.
+    def __init__(self, code_lines, columns):
+        self.openers = [_box_openers(raw) for _, raw in code_lines]
+        self.boxes = _find_boxes(code_lines, columns, self.openers)
+        self.parents = _parents(self.boxes)
+        self.pads = {}
+
+    def update(self, code_lines, columns, changed):
+        for ci in changed:
+            self.openers[ci] = _box_openers(code_lines[ci][1])
+        old = dict(zip((box[:4] for box in self.boxes), self.parents))
+        self.boxes = _find_boxes(code_lines, columns, self.openers)
+        keys = [box[:4] for box in self.boxes]
+        added = [key for key in keys if key not in old]
+        if 4 * len(added) > len(keys):
+            self.parents = _parents(self.boxes)
+        else:
+            current = set(keys)
+            self.parents = []
+            for key in keys:
+                parent = old.get(key, key)
+                if parent == key or (parent is not None and parent not in current):
+                    parent = _first_enclosing(keys, key)
+                self.parents.append(parent)
+            for new in added:
+                for i, key in enumerate(keys):
+                    parent = self.parents[i]
+                    if (
+                        new[0] < key[0]
+                        and key[1] < new[1]
+                        and (parent is None or (new[2], new[0]) < (parent[2], parent[0]))
+                    ):
+                        self.parents[i] = new
+        # A box's paddings and connectors only depend on its own rows.
+        changed = sorted(changed)
+        for key in list(self.pads):
+            k = bisect_left(changed, key[2])
+            if k < len(changed) and changed[k] <= key[3]:
+                del self.pads[key]
+
+    def box_pads(self, code_lines, box):
+        key = box[:4]
+        pads = self.pads.get(key)
+        if pads is None:
+            pads = self.pads[key] = _box_pads(code_lines, box)
+        return pads
+
+
+def _box_pads(code_lines, box):
+    col_left, col_right, opening_ci, closing_ci, content_indices = box
+    min_rpad = None
+    min_lpad = None
+    for ci in content_indices:
+        _, raw = code_lines[ci]
+        rpad = _get_right_padding(raw, col_left, col_right)
+        if rpad is not None:
+            if min_rpad is None or rpad < min_rpad:
+                min_rpad = rpad
+        lpad = _get_left_padding(raw, col_left, col_right)
+        if lpad is not None:
+            if min_lpad is None or lpad < min_lpad:
+                min_lpad = lpad
+
+    all_ci = [opening_ci] + content_indices + [closing_ci]
+    line_indices = [code_lines[ci][0] for ci in all_ci]
+
+    opener_raw = code_lines[opening_ci][1]
+    closer_raw = code_lines[closing_ci][1]
+    connectors = _find_connectors_in_range(opener_raw, col_left, col_right)
+    connectors.extend(_find_connectors_in_range(closer_raw, col_left, col_right))
+    return min_rpad, min_lpad, line_indices, connectors
+
+
+def _collect_box_insertions(code_lines, tree):
     def has_sibling_after(col_right, opener_raw):
         after = opener_raw[col_right + 1 :]
         if "┌" not in after:
@@ -93,34 +205,15 @@ def _collect_box_insertions(code_lines):
         return LARGE_SPACE_GAP in between
 
     box_insertions = []
-    for col_left, col_right, opening_ci, closing_ci, content_indices in all_boxes:
-        parent_info = get_parent_info(col_left, col_right)
+    for box, parent_info in zip(tree.boxes, tree.parents):
         if parent_info is not None:
-            _, parent_right, parent_opening_ci = parent_info
+            _, parent_right, parent_opening_ci, _ = parent_info
             parent_opener_raw = code_lines[parent_opening_ci][1]
             if has_sibling_after(parent_right, parent_opener_raw):
                 continue
 
-        min_rpad = None
-        min_lpad = None
-        for ci in content_indices:
-            _, raw = code_lines[ci]
-            rpad = _get_right_padding(raw, col_left, col_right)
-            if rpad is not None:
-                if min_rpad is None or rpad < min_rpad:
-                    min_rpad = rpad
-            lpad = _get_left_padding(raw, col_left, col_right)
-            if lpad is not None:
-                if min_lpad is None or lpad < min_lpad:
-                    min_lpad = lpad
-
-        all_ci = [opening_ci] + content_indices + [closing_ci]
-        line_indices = [code_lines[ci][0] for ci in all_ci]
-
-        opener_raw = code_lines[opening_ci][1]
-        closer_raw = code_lines[closing_ci][1]
-        connectors = _find_connectors_in_range(opener_raw, col_left, col_right)
-        connectors.extend(_find_connectors_in_range(closer_raw, col_left, col_right))
+        col_left, col_right = box[:2]
+        min_rpad, min_lpad, line_indices, connectors = tree.box_pads(code_lines, box)
 
         if min_rpad is not None and min_rpad < MIN_PAD:
             deficit = MIN_PAD - min_rpad
@@ -202,12 +295,18 @@ def _apply_box_insertions(all_lines, box_insertions, code_indices):
     return True
 
 
-def _fix_spacing_in_block(code_indices, all_lines):
-    if _is_tree_block([(i, all_lines[i].rstrip("\n")) for i in code_indices]):
+def fix_block(block, all_lines):
+    if block.is_tree:
         return
 
+    code_lines = block.code_lines
+    columns = block.columns.copy()
+    tree = _BoxTree(code_lines, columns)
     for _ in range(MAX_FIX_ITERATIONS):
-        code_lines = [(i, all_lines[i].rstrip("\n")) for i in code_indices]
-        box_insertions = _collect_box_insertions(code_lines)
-        if not _apply_box_insertions(all_lines, box_insertions, code_indices):
+        box_insertions = _collect_box_insertions(code_lines, tree)
+        if not _apply_box_insertions(all_lines, box_insertions, block.indices):
             break
+        previous = code_lines
+        code_lines = [(i, all_lines[i].rstrip("\n")) for i in block.indices]
+        columns.refresh([raw for _, raw in code_lines])
+        tree.update(code_lines, columns, [ci for ci, (_, raw) in enumerate(code_lines) if raw != previous[ci][1]])
@@ -5,28 +5,30 @@ from docalign.constants import (
     MIN_BOX_WIDTH,
     MIN_PIPES_FOR_ADJACENT,
 )
-from docalign.parser import iter_code_blocks
+from docalign.diagnostics import Diagnostic
+from docalign.parser import as_document
 from docalign.utils import (
     _find_box_closer,
-    _find_nearby_closer_start,
+    _find_closing_row,
     _find_nearby_pipe,
     _fix_closer,
-    _is_tree_block,
+    _realign_box_chars,
     _shift_pipe,
 )
 
 
 def check(lines):
     errors = []
-    for _, code_lines in iter_code_blocks(lines):
-        errors.extend(_check_box_walls(code_lines))
+    for block in as_document(lines).code_blocks:
+        errors.extend(check_block(block))
     return errors
 
 
 def fix(lines):
-    result = list(lines)
-    for code_indices, _ in iter_code_blocks(lines):
-        _fix_box_walls_in_block(code_indices, result)
+    doc = as_document(lines)
+    result = list(doc.lines)
+    for block in doc.code_blocks:
+        fix_block(block, result)
     return result
 
 
@@ -46,11 +48,14 @@ def _has_independent_box_after(raw, col):
     return LARGE_SPACE_GAP in between_pipes
 
 
-def _check_box_walls(code_lines):
+def check_block(block):
     errors = []
-    if _is_tree_block(code_lines):
+    if block.is_tree:
         return errors
 
+    code_lines = block.code_lines
+    rows = [raw for _, raw in code_lines]
+    grid = block.grid
     for idx, (line_idx, raw) in enumerate(code_lines):
         j = 0
         while j < len(raw):
@@ -64,18 +69,7 @@ def _check_box_walls(code_lines):
                 j += 1
                 continue
 
-            closing_idx = None
-            fuzzy_col_left = None
-            for si in range(idx + 1, len(code_lines)):
-                _, sraw = code_lines[si]
-                if col_left < len(sraw) and sraw[col_left] == "└":
-                    closing_idx = si
-                    break
-                nc = _find_nearby_closer_start(sraw, col_left, col_right_open)
-                if nc is not None:
-                    closing_idx = si
-                    fuzzy_col_left = nc
-                    break
+            closing_idx, fuzzy_col_left = _find_closing_row(rows, block.columns, idx, col_left, col_right_open)
 
             if closing_idx is None or closing_idx - idx < 3:
                 j = col_right_open + 1
@@ -87,9 +81,14 @@ def _check_box_walls(code_lines):
 
             if fuzzy_col_left is not None:
                 errors.append(
-                    f"L{closing_line_idx + 1} box └ at col {fuzzy_col_left}, "
-                    f"expected col {col_left} "
-                    f"(box ┌ at L{line_idx + 1} col {col_left})"
+                    Diagnostic(
+                        "box-corner",
+                        closing_line_idx + 1,
+                        col=fuzzy_col_left,
+                        expected=col_left,
+                        detail="└",
+                        ref=(line_idx + 1, col_left),
+                    )
                 )
 
             if col_right_close is not None:
@@ -101,30 +100,45 @@ def _check_box_walls(code_lines):
                 expected_right = col_right_open
 
             if col_right_open != expected_right:
-                errors.append(f"L{line_idx + 1} box ┐ at col {col_right_open}, expected col {expected_right}")
+                errors.append(
+                    Diagnostic("box-corner", line_idx + 1, col=col_right_open, expected=expected_right, detail="┐")
+                )
 
             if col_right_close is not None and col_right_close != expected_right:
-                errors.append(f"L{closing_line_idx + 1} box ┘ at col {col_right_close}, expected col {expected_right}")
+                errors.append(
+                    Diagnostic(
+                        "box-corner", closing_line_idx + 1, col=col_right_close, expected=expected_right, detail="┘"
+                    )
+                )
 
-            for mi in range(idx + 1, closing_idx):
+            right_gaps = set(grid.gaps(expected_right, idx + 1, closing_idx))
+            left_gaps = set(grid.gaps(col_left, idx + 1, closing_idx))
+            for mi in sorted(right_gaps | left_gaps):
                 m_line_idx, m_raw = code_lines[mi]
-                right_ok = expected_right < len(m_raw) and m_raw[expected_right] in BOX_CHARS
-                if not right_ok:
+                if mi in right_gaps:
                     found = _find_nearby_pipe(m_raw, expected_right, BOX_WALL_DRIFT)
                     if found is not None:
                         errors.append(
-                            f"L{m_line_idx + 1} box wall │ at col {found}, "
-                            f"expected col {expected_right} "
-                            f"(box ┌ at L{line_idx + 1} col {col_left})"
+                            Diagnostic(
+                                "box-wall",
+                                m_line_idx + 1,
+                                col=found,
+                                expected=expected_right,
+                                ref=(line_idx + 1, col_left),
+                            )
                         )
                 if col_left < len(m_raw):
-                    if m_raw[col_left] not in BOX_CHARS:
+                    if mi in left_gaps:
                         found = _find_nearby_pipe(m_raw, col_left, BOX_WALL_DRIFT)
                         if found is not None:
                             errors.append(
-                                f"L{m_line_idx + 1} box wall │ at col {found}, "
-                                f"expected col {col_left} "
-                                f"(box ┌ at L{line_idx + 1} col {col_left})"
+                                Diagnostic(
+                                    "box-wall",
+                                    m_line_idx + 1,
+                                    col=found,
+                                    expected=col_left,
+                                    ref=(line_idx + 1, col_left),
+                                )
                             )
 
             j = col_right_open + 1
@@ -132,12 +146,19 @@ def _check_box_walls(code_lines):
     return errors
 
 
-def _fix_box_walls_in_block(code_indices, all_lines):
-    code_lines = [(i, all_lines[i].rstrip("\n")) for i in code_indices]
-    if _is_tree_block(code_lines):
+def fix_block(block, all_lines):
+    if block.is_tree:
         return
 
-    for idx, (line_idx, raw) in enumerate(code_lines):
+    indices = block.indices
+    columns = block.columns.copy()
+    rows = columns.rows
+
+    def write(ci, new_raw):
+        columns.update(ci, new_raw)
+        all_lines[indices[ci]] = new_raw + "\n"
+
+    for idx, (line_idx, raw) in enumerate(block.code_lines):
         j = 0
         while j < len(raw):
             if raw[j] != "┌":
@@ -150,26 +171,13 @@ def _fix_box_walls_in_block(code_indices, all_lines):
                 j += 1
                 continue
 
-            closing_idx = None
-            fuzzy_col_left = None
-            for si in range(idx + 1, len(code_lines)):
-                si_idx = code_lines[si][0]
-                sraw = all_lines[si_idx].rstrip("\n")
-                if col_left < len(sraw) and sraw[col_left] == "└":
-                    closing_idx = si
-                    break
-                nc = _find_nearby_closer_start(sraw, col_left, col_right_open)
-                if nc is not None:
-                    closing_idx = si
-                    fuzzy_col_left = nc
-                    break
+            closing_idx, fuzzy_col_left = _find_closing_row(rows, columns, idx, col_left, col_right_open)
 
             if closing_idx is None or closing_idx - idx < 3:
                 j = col_right_open + 1
                 continue
 
-            closing_line_idx = code_lines[closing_idx][0]
-            closing_raw = all_lines[closing_line_idx].rstrip("\n")
+            closing_raw = rows[closing_idx]
             actual_col_left = fuzzy_col_left if fuzzy_col_left is not None else col_left
             col_right_close = _find_box_closer(closing_raw, "└", "┘", actual_col_left)
 
@@ -184,10 +192,7 @@ def _fix_box_walls_in_block(code_indices, all_lines):
             changed = False
 
             if fuzzy_col_left is not None:
-                from docalign.utils import _realign_box_chars
-
-                cur = all_lines[closing_line_idx].rstrip("\n")
-                actual_positions = [k for k, c in enumerate(cur) if c in BOX_CHARS]
+                actual_positions = [k for k, c in enumerate(closing_raw) if c in BOX_CHARS]
                 expected_positions = []
                 for ap in actual_positions:
                     if ap == fuzzy_col_left:
@@ -196,10 +201,9 @@ def _fix_box_walls_in_block(code_indices, all_lines):
                         expected_positions.append(col_right_open)
                     else:
                         expected_positions.append(ap)
-                fixed = _realign_box_chars(cur, actual_positions, expected_positions).rstrip(" ")
-                if fixed != cur:
-                    all_lines[closing_line_idx] = fixed + "\n"
-                    closing_raw = fixed
+                fixed = _realign_box_chars(closing_raw, actual_positions, expected_positions).rstrip(" ")
+                if fixed != closing_raw:
+                    write(closing_idx, fixed)
                     col_right_close = col_right_open
                     expected_right = col_right_open
                     changed = True
@@ -207,21 +211,20 @@ def _fix_box_walls_in_block(code_indices, all_lines):
             if col_right_open != expected_right:
                 fixed = _fix_closer(raw, col_right_open, expected_right, "┐")
                 if fixed != raw:
-                    all_lines[line_idx] = fixed + "\n"
+                    write(idx, fixed)
                     changed = True
 
             if col_right_close is not None and col_right_close != expected_right:
-                cur = all_lines[closing_line_idx].rstrip("\n")
+                cur = rows[closing_idx]
                 fixed = _fix_closer(cur, col_right_close, expected_right, "┘")
                 if fixed != cur:
-                    all_lines[closing_line_idx] = fixed + "\n"
+                    write(closing_idx, fixed)
                     changed = True
 
             has_adjacent_box_on_line = "┌" in raw[col_right_open + 1 :]
 
             for mi in range(idx + 1, closing_idx):
-                m_line_idx = code_lines[mi][0]
-                m_raw = all_lines[m_line_idx].rstrip("\n")
+                m_raw = rows[mi]
                 has_box_after_right = _has_independent_box_after(m_raw, expected_right)
                 has_box_after_left = _has_independent_box_after(m_raw, col_left)
                 right_ok = expected_right < len(m_raw) and m_raw[expected_right] in BOX_CHARS
@@ -230,7 +233,7 @@ def _fix_box_walls_in_block(code_indices, all_lines):
                     if found is not None and not has_box_after_right and not has_adjacent_box_on_line:
                         fixed = _shift_pipe(m_raw, found, expected_right)
                         if fixed != m_raw:
-                            all_lines[m_line_idx] = fixed + "\n"
+                            write(mi, fixed)
                             m_raw = fixed
                             changed = True
                 if col_left < len(m_raw):
@@ -239,11 +242,10 @@ def _fix_box_walls_in_block(code_indices, all_lines):
                         if found is not None and not has_box_after_left and not has_adjacent_box_on_line:
                             fixed = _shift_pipe(m_raw, found, col_left)
                             if fixed != m_raw:
-                                all_lines[m_line_idx] = fixed + "\n"
+                                write(mi, fixed)
                                 changed = True
 
             if changed:
-                code_lines = [(i, all_lines[i].rstrip("\n")) for i in code_indices]
-                raw = all_lines[line_idx].rstrip("\n")
+                raw = rows[idx]
 
             j = col_right_open + 1
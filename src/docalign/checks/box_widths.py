@@ -1,42 +1,65 @@
-from docalign.constants import BOX_CHARS, BOX_CLOSERS, BOX_OPENERS
-from docalign.parser import group_box_lines, iter_code_blocks
-from docalign.utils import _is_tree_block
+from docalign import vectorized
+from docalign.constants import BOX_CLOSERS, BOX_OPENERS
+from docalign.diagnostics import Diagnostic
+from docalign.parser import as_document
 
 
 def check(lines):
     errors = []
-    for _, code_lines in iter_code_blocks(lines):
-        errors.extend(_check_widths(code_lines))
+    for block in as_document(lines).code_blocks:
+        errors.extend(check_block(block))
     return errors
 
 
 def fix(lines):
-    result = list(lines)
-    for code_indices, _ in iter_code_blocks(lines):
-        _fix_widths_in_block(code_indices, result)
+    doc = as_document(lines)
+    result = list(doc.lines)
+    for block in doc.code_blocks:
+        fix_block(block, result)
     return result
 
 
-def _check_widths(code_lines):
-    errors = []
-    if _is_tree_block(code_lines):
-        return errors
+def _widths_by_extent(block):
+    # Effective width of every line with two or more box chars, keyed by the
+    # columns of its first and last box char, one dict per box group.
+    if vectorized.enabled() and vectorized.large(block.grid):
+        counts, firsts, lasts, last_solid = vectorized.extents(block.grid)
+        offset = block.start + 1
+        for group in block.groups:
+            by_extent = {}
+            for i, raw in group:
+                row = i - offset
+                if counts[row] < 2:
+                    continue
+                last = lasts[row]
+                width = last + 1 if last_solid[row] > last else len(raw)
+                by_extent.setdefault((firsts[row], last), []).append((i, width))
+            yield by_extent
+        return
 
-    for group in group_box_lines(code_lines):
+    for group in block.groups:
         by_extent = {}
         for i, raw in group:
-            box_positions = [j for j, c in enumerate(raw) if c in BOX_CHARS]
+            box_positions = block.positions[i]
             if len(box_positions) < 2:
                 continue
             first = box_positions[0]
             last = box_positions[-1]
-            by_extent.setdefault((first, last), []).append((i, raw))
+            after_box = raw[last + 1 :]
+            width = last + 1 if after_box.strip() else len(raw)
+            by_extent.setdefault((first, last), []).append((i, width))
+        yield by_extent
+
+
+def check_block(block):
+    errors = []
+    if block.is_tree:
+        return errors
 
-        for (first, last), lines_in_group in by_extent.items():
+    for by_extent in _widths_by_extent(block):
+        for (first, last), widths in by_extent.items():
             lengths = {}
-            for i, raw in lines_in_group:
-                after_box = raw[last + 1 :]
-                effective_len = last + 1 if after_box.strip() else len(raw)
+            for i, effective_len in widths:
                 lengths.setdefault(effective_len, []).append(i + 1)
 
             if len(lengths) > 1:
@@ -45,33 +68,27 @@ def _check_widths(code_lines):
                     if length != most_common:
                         for ln in line_nums:
                             errors.append(
-                                f"L{ln} width={length}, expected={most_common} (box group at cols {first}-{last})"
+                                Diagnostic(
+                                    "box-width",
+                                    ln,
+                                    col=first,
+                                    expected=most_common,
+                                    actual=length,
+                                    detail=(first, last),
+                                )
                             )
 
     return errors
 
 
-def _fix_widths_in_block(code_indices, all_lines):
-    code_lines = [(i, all_lines[i].rstrip("\n")) for i in code_indices]
-
-    if _is_tree_block(code_lines):
+def fix_block(block, all_lines):
+    if block.is_tree:
         return
 
-    for group in group_box_lines(code_lines):
-        by_extent = {}
-        for i, raw in group:
-            box_positions = [j for j, c in enumerate(raw) if c in BOX_CHARS]
-            if len(box_positions) < 2:
-                continue
-            first = box_positions[0]
-            last = box_positions[-1]
-            by_extent.setdefault((first, last), []).append((i, raw))
-
-        for (first, last), lines_in_group in by_extent.items():
+    for by_extent in _widths_by_extent(block):
+        for widths in by_extent.values():
             lengths = {}
-            for i, raw in lines_in_group:
-                after_box = raw[last + 1 :]
-                effective_len = last + 1 if after_box.strip() else len(raw)
+            for i, effective_len in widths:
                 lengths.setdefault(effective_len, []).append(i)
 
             if len(lengths) <= 1:
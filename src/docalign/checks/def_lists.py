@@ -1,99 +1,40 @@
-import re
+from docalign.diagnostics import Diagnostic
+from docalign.parser import as_document
+from docalign.prose import scan
+from docalign.width import pad, width
 
-from docalign.constants import MAX_KEY_WORDS, MIN_GROUP_SIZE
-from docalign.parser import in_code_block
 
-_PREFIX = re.compile(r"^(\s*- )")
-_URL_COLON = re.compile(r"https?:|ftp:|file:")
-
-
-def _find_colon_sep(text):
-    in_backtick = False
-    for i, c in enumerate(text):
-        if c == "`":
-            in_backtick = not in_backtick
-        elif c == ":" and not in_backtick and i + 1 < len(text) and text[i + 1] == " ":
-            return i
-    return -1
-
-
-def _parse_line(raw):
-    m = _PREFIX.match(raw)
-    if not m:
-        return None
-    after_prefix = raw[m.end() :]
-    colon_idx = _find_colon_sep(after_prefix)
-    if colon_idx < 0:
-        return None
-    key_text = after_prefix[:colon_idx]
-    if len(key_text.split()) > MAX_KEY_WORDS:
-        return None
-    key_part = raw[: m.end() + colon_idx + 1]
-    if _URL_COLON.search(key_part):
-        return None
-    value = after_prefix[colon_idx + 2 :]
-    return key_part, value
-
-
-def _is_list_item(raw):
-    return bool(_PREFIX.match(raw))
-
-
-def _is_embedded(group, lines, code_lines):
-    first_idx = group[0][0]
-    last_idx = group[-1][0]
-    if first_idx > 0 and first_idx - 1 not in code_lines:
-        prev = lines[first_idx - 1].rstrip("\n")
-        if _is_list_item(prev):
-            return True
-    if last_idx + 1 < len(lines) and last_idx + 1 not in code_lines:
-        nxt = lines[last_idx + 1].rstrip("\n")
-        if _is_list_item(nxt):
-            return True
-    return False
-
-
-def _collect_groups(lines):
-    code_lines = in_code_block(lines)
-    groups = []
-    current = []
-    for i, line in enumerate(lines):
-        if i in code_lines:
-            if len(current) >= MIN_GROUP_SIZE:
-                groups.append(current)
-            current = []
-            continue
-        raw = line.rstrip("\n")
-        parsed = _parse_line(raw)
-        if parsed:
-            current.append((i, parsed[0], parsed[1]))
-        else:
-            if len(current) >= MIN_GROUP_SIZE:
-                groups.append(current)
-            current = []
-    if len(current) >= MIN_GROUP_SIZE:
-        groups.append(current)
-    return [g for g in groups if not _is_embedded(g, lines, code_lines)]
+def _collect_groups(doc):
+    # Groups directly above or below other list items belong to a larger
+    # list and are left alone.
+    prose = scan(doc)
+    return [
+        group
+        for group in prose.def_groups
+        if not prose.is_list_item(group[0][0] - 1) and not prose.is_list_item(group[-1][0] + 1)
+    ]
 
 
 def check(lines):
+    doc = as_document(lines)
     errors = []
-    for group in _collect_groups(lines):
-        max_w = max(len(key) for _, key, _ in group)
+    for group in _collect_groups(doc):
+        max_w = max(width(key) for _, key, _ in group)
         for i, key, value in group:
-            if len(key) < max_w:
-                padded = key + " " * (max_w - len(key))
+            if width(key) < max_w:
+                padded = pad(key, max_w)
                 fixed_line = padded + " " + value.lstrip(" ")
-                if fixed_line != lines[i].rstrip("\n"):
-                    errors.append(f"L{i + 1} def list key: col={len(key)} expected={max_w}")
+                if fixed_line != doc.raw[i]:
+                    errors.append(Diagnostic("def-list", i + 1, col=len(key), expected=max_w))
     return errors
 
 
 def fix(lines):
-    result = list(lines)
-    for group in _collect_groups(lines):
-        max_w = max(len(key) for _, key, _ in group)
+    doc = as_document(lines)
+    result = list(doc.lines)
+    for group in _collect_groups(doc):
+        max_w = max(width(key) for _, key, _ in group)
         for i, key, value in group:
-            padded = key + " " * (max_w - len(key))
+            padded = pad(key, max_w)
             result[i] = padded + " " + value.lstrip(" ") + "\n"
     return result
@@ -1,63 +1,68 @@
 import re
 
 from docalign.constants import BOX_CORNERS
-from docalign.parser import iter_code_blocks
-from docalign.utils import _is_tree_block
+from docalign.diagnostics import Diagnostic
+from docalign.parser import as_document
 
 _RIGHT_ARROW = re.compile(r"─+(>)")
 _LEFT_ARROW = re.compile(r"(<)─+")
+_CORNER = re.compile("[" + re.escape("".join(sorted(BOX_CORNERS))) + "]")
 
 
 def check(lines):
     errors = []
-    for _, code_lines in iter_code_blocks(lines):
-        errors.extend(_check_horiz_arrows(code_lines))
+    for block in as_document(lines).code_blocks:
+        errors.extend(check_block(block))
     return errors
 
 
 def fix(lines):
-    result = list(lines)
-    for code_indices, _ in iter_code_blocks(lines):
-        _fix_horiz_arrows_in_block(code_indices, result)
+    doc = as_document(lines)
+    result = list(doc.lines)
+    for block in doc.code_blocks:
+        fix_block(block, result)
     return result
 
 
-def _is_box_wall_col(code_lines, col):
-    for _, raw in code_lines:
-        if col < len(raw) and raw[col] in BOX_CORNERS:
-            return True
-    return False
+def _corner_cols(block):
+    # Columns holding a box corner on any line of the block: the only
+    # columns an arrow may start from or point at.
+    cols = block.derived.get("horiz-arrows")
+    if cols is None:
+        cols = block.derived["horiz-arrows"] = {m.start() for _, raw in block.code_lines for m in _CORNER.finditer(raw)}
+    return cols
 
 
-def _check_horiz_arrows(code_lines):
+def check_block(block):
     errors = []
-    if _is_tree_block(code_lines):
+    if block.is_tree:
         return errors
 
-    for _, (line_idx, raw) in enumerate(code_lines):
+    corners = _corner_cols(block)
+    for line_idx, raw in block.code_lines:
         for m in _RIGHT_ARROW.finditer(raw):
             tip_col = m.end() - 1
             wall_col = _right_wall_col(raw, tip_col)
-            if wall_col is None or not _is_box_wall_col(code_lines, wall_col):
+            if wall_col is None or wall_col not in corners:
                 continue
             src_col = m.start() - 1
-            if src_col < 0 or raw[src_col] != "│" or not _is_box_wall_col(code_lines, src_col):
+            if src_col < 0 or raw[src_col] != "│" or src_col not in corners:
                 continue
             gap = wall_col - tip_col - 1
             if gap > 0:
-                errors.append(f"L{line_idx + 1} arrow '>' at col {tip_col}, gap={gap} to box wall")
+                errors.append(Diagnostic("arrow-gap", line_idx + 1, col=tip_col, actual=gap, detail=">"))
 
         for m in _LEFT_ARROW.finditer(raw):
             tip_col = m.start()
             wall_col = _left_wall_col(raw, tip_col)
-            if wall_col is None or not _is_box_wall_col(code_lines, wall_col):
+            if wall_col is None or wall_col not in corners:
                 continue
             src_col = m.end()
-            if src_col >= len(raw) or raw[src_col] != "│" or not _is_box_wall_col(code_lines, src_col):
+            if src_col >= len(raw) or raw[src_col] != "│" or src_col not in corners:
                 continue
             gap = tip_col - wall_col - 1
             if gap > 0:
-                errors.append(f"L{line_idx + 1} arrow '<' at col {tip_col}, gap={gap} to box wall")
+                errors.append(Diagnostic("arrow-gap", line_idx + 1, col=tip_col, actual=gap, detail="<"))
 
     return errors
 
@@ -80,43 +85,41 @@ def _left_wall_col(raw, tip_col):
     return None
 
 
-def _fix_horiz_arrows_in_block(code_indices, all_lines):
-    code_lines = [(i, all_lines[i].rstrip("\n")) for i in code_indices]
-    if _is_tree_block(code_lines):
+def fix_block(block, all_lines):
+    if block.is_tree:
         return
 
-    for _, (line_idx, raw) in enumerate(code_lines):
+    corners = _corner_cols(block)
+    for line_idx, raw in block.code_lines:
         new_raw = raw
 
         for m in reversed(list(_RIGHT_ARROW.finditer(new_raw))):
             tip_col = m.end() - 1
             wall_col = _right_wall_col(new_raw, tip_col)
-            if wall_col is None or not _is_box_wall_col(code_lines, wall_col):
+            if wall_col is None or wall_col not in corners:
                 continue
             src_col = m.start() - 1
-            if src_col < 0 or new_raw[src_col] != "│" or not _is_box_wall_col(code_lines, src_col):
+            if src_col < 0 or new_raw[src_col] != "│" or src_col not in corners:
                 continue
             gap = wall_col - tip_col - 1
             if gap > 0:
                 new_raw = new_raw[: m.start()] + "─" * (m.end() - m.start() - 1 + gap) + ">" + new_raw[wall_col:]
 
-        changed = True
-        while changed:
-            changed = False
-            for m in _LEFT_ARROW.finditer(new_raw):
-                tip_col = m.start()
-                wall_col = _left_wall_col(new_raw, tip_col)
-                if wall_col is None or not _is_box_wall_col(code_lines, wall_col):
-                    continue
-                src_col = m.end()
-                if src_col >= len(new_raw) or new_raw[src_col] != "│" or not _is_box_wall_col(code_lines, src_col):
-                    continue
-                gap = tip_col - wall_col - 1
-                if gap > 0:
-                    dash_len = m.end() - m.start() - 1 + gap
-                    new_raw = new_raw[: wall_col + 1] + "<" + "─" * dash_len + new_raw[m.end() :]
-                    changed = True
-                    break
+        # Closing a gap rewrites only the span between the wall and the end
+        # of that arrow and keeps the line length, so the remaining matches
+        # of a single scan stay valid.
+        for m in _LEFT_ARROW.finditer(new_raw):
+            tip_col = m.start()
+            wall_col = _left_wall_col(new_raw, tip_col)
+            if wall_col is None or wall_col not in corners:
+                continue
+            src_col = m.end()
+            if src_col >= len(new_raw) or new_raw[src_col] != "│" or src_col not in corners:
+                continue
+            gap = tip_col - wall_col - 1
+            if gap > 0:
+                dash_len = m.end() - m.start() - 1 + gap
+                new_raw = new_raw[: wall_col + 1] + "<" + "─" * dash_len + new_raw[m.end() :]
 
         if new_raw != raw:
             all_lines[line_idx] = new_raw + "\n"
@@ -1,60 +1,25 @@
-import re
-
-from docalign.constants import MIN_GROUP_SIZE
-from docalign.parser import in_code_block
-
-
-def _parse_line(raw):
-    prefix_match = re.match(r"^(\s*- )", raw)
-    if not prefix_match:
-        return None
-    after_prefix = raw[prefix_match.end() :]
-    sep_idx = after_prefix.find(" - ")
-    if sep_idx < 0:
-        return None
-    item = raw[: prefix_match.end() + sep_idx]
-    desc = after_prefix[sep_idx + 1 :]
-    return item, desc
-
-
-def _collect_groups(lines):
-    code_lines = in_code_block(lines)
-    groups = []
-    current = []
-    for i, line in enumerate(lines):
-        if i in code_lines:
-            if len(current) >= MIN_GROUP_SIZE:
-                groups.append(current)
-            current = []
-            continue
-        raw = line.rstrip("\n")
-        parsed = _parse_line(raw)
-        if parsed:
-            current.append((i, parsed[0], parsed[1]))
-        else:
-            if len(current) >= MIN_GROUP_SIZE:
-                groups.append(current)
-            current = []
-    if len(current) >= MIN_GROUP_SIZE:
-        groups.append(current)
-    return groups
+from docalign.diagnostics import Diagnostic
+from docalign.parser import as_document
+from docalign.prose import scan
+from docalign.width import pad, width
 
 
 def check(lines):
     errors = []
-    for group in _collect_groups(lines):
-        max_w = max(len(item) for _, item, _ in group)
+    for group in scan(lines).desc_groups:
+        max_w = max(width(item) for _, item, _ in group)
         for i, item, _ in group:
-            if len(item) < max_w:
-                errors.append(f"L{i + 1} list desc separator: col={len(item)} expected={max_w}")
+            if width(item) < max_w:
+                errors.append(Diagnostic("list-desc", i + 1, col=len(item), expected=max_w))
     return errors
 
 
 def fix(lines):
-    result = list(lines)
-    for group in _collect_groups(lines):
-        max_w = max(len(item) for _, item, _ in group)
+    doc = as_document(lines)
+    result = list(doc.lines)
+    for group in scan(doc).desc_groups:
+        max_w = max(width(item) for _, item, _ in group)
         for i, item, desc in group:
-            padded = item + " " * (max_w - len(item))
+            padded = pad(item, max_w)
             result[i] = padded + " " + desc.lstrip(" ") + "\n"
     return result
@@ -1,68 +1,86 @@
+import re
+
 from docalign.constants import BOX_CHARS, PIPE_DRIFT_MAX
-from docalign.parser import iter_code_blocks
-from docalign.utils import _find_nearby_pipe, _is_tree_block, _shift_pipe
+from docalign.diagnostics import Diagnostic
+from docalign.parser import as_document
+from docalign.utils import _find_nearby_pipe, _shift_pipe
+
+_CONNECTOR = re.compile("[┬┴]")
+_UNPROBED = object()
 
 
 def check(lines):
     errors = []
-    for _, code_lines in iter_code_blocks(lines):
-        errors.extend(_check_pipe_continuity(code_lines))
+    for block in as_document(lines).code_blocks:
+        errors.extend(check_block(block))
     return errors
 
 
 def fix(lines):
-    result = list(lines)
-    for code_indices, _ in iter_code_blocks(lines):
-        _fix_pipes_in_block(code_indices, result)
+    doc = as_document(lines)
+    result = list(doc.lines)
+    for block in doc.code_blocks:
+        fix_block(block, result)
     return result
 
 
-def _check_pipe_continuity(code_lines):
+def _connectors(code_lines):
+    for idx, (_, raw) in enumerate(code_lines):
+        for m in _CONNECTOR.finditer(raw):
+            yield idx, m.start(), 1 if m.group() == "┬" else -1
+
+
+def _pipe_drifts(block):
+    # Every drifted pipe segment reached from a connector, as (line_idx,
+    # found_col, connector_col) in trace order. Traced once per block and
+    # shared by check_block and fix_block.
+    drifts = block.derived.get("pipes")
+    if drifts is None:
+        drifts = block.derived["pipes"] = _trace_pipes(block.grid, block.code_lines)
+    return drifts
+
+
+def _trace_pipes(grid, code_lines):
+    # Follow the pipe below each ┬ (or above each ┴), jumping over whole runs
+    # of │ in its column. A ┬ and the ┴ it connects to walk the same rows, so
+    # the nearby-pipe probe of each row is remembered per column.
+    probes = {}
+    drifts = []
+    for idx, col, direction in _connectors(code_lines):
+        si = idx
+        while True:
+            si = grid.run_end(col, si, "│", direction)
+            if not 0 <= si < grid.height or grid.char(si, col) in BOX_CHARS:
+                break
+            found = probes.get((si, col), _UNPROBED)
+            if found is _UNPROBED:
+                found = probes[(si, col)] = _find_nearby_pipe(code_lines[si][1], col, PIPE_DRIFT_MAX)
+            if found is None:
+                break
+            drifts.append((code_lines[si][0], found, col))
+    return drifts
+
+
+def check_block(block):
     errors = []
-    if _is_tree_block(code_lines):
+    if block.is_tree:
         return errors
 
     flagged = set()
-
-    for idx, (i, raw) in enumerate(code_lines):
-        for j, c in enumerate(raw):
-            if c == "┬":
-                _trace_pipe_check(code_lines, idx, j, 1, flagged, errors)
-            elif c == "┴":
-                _trace_pipe_check(code_lines, idx, j, -1, flagged, errors)
-
+    for line_idx, found, col in _pipe_drifts(block):
+        if (line_idx, found) not in flagged:
+            flagged.add((line_idx, found))
+            errors.append(Diagnostic("pipe", line_idx + 1, col=found, expected=col))
     return errors
 
 
-def _trace_pipe_check(code_lines, start_idx, col, direction, flagged, errors):
-    line_range = range(start_idx + 1, len(code_lines)) if direction == 1 else range(start_idx - 1, -1, -1)
-    for si in line_range:
-        line_idx, sraw = code_lines[si]
-        if col < len(sraw) and sraw[col] in BOX_CHARS:
-            if sraw[col] == "│":
-                continue
-            break
-        found = _find_nearby_pipe(sraw, col, PIPE_DRIFT_MAX)
-        if found is not None:
-            if (line_idx, found) not in flagged:
-                flagged.add((line_idx, found))
-                errors.append(f"L{line_idx + 1} pipe '│' at col {found}, expected col {col}")
-        else:
-            break
-
-
-def _fix_pipes_in_block(code_indices, all_lines):
-    code_lines = [(i, all_lines[i].rstrip("\n")) for i in code_indices]
-    if _is_tree_block(code_lines):
+def fix_block(block, all_lines):
+    if block.is_tree:
         return
 
     corrections = {}
-    for idx, (i, raw) in enumerate(code_lines):
-        for j, c in enumerate(raw):
-            if c == "┬":
-                _trace_pipe_fix(code_lines, idx, j, 1, corrections)
-            elif c == "┴":
-                _trace_pipe_fix(code_lines, idx, j, -1, corrections)
+    for line_idx, found, col in _pipe_drifts(block):
+        corrections[(line_idx, found)] = col
 
     by_line = {}
     for (line_idx, current_col), expected_col in corrections.items():
@@ -73,18 +91,3 @@ def _fix_pipes_in_block(code_indices, all_lines):
         for current_col, expected_col in sorted(line_corrections, key=lambda x: -x[0]):
             raw = _shift_pipe(raw, current_col, expected_col, strip_trailing=True)
         all_lines[line_idx] = raw + "\n"
-
-
-def _trace_pipe_fix(code_lines, start_idx, col, direction, corrections):
-    line_range = range(start_idx + 1, len(code_lines)) if direction == 1 else range(start_idx - 1, -1, -1)
-    for si in line_range:
-        line_idx, sraw = code_lines[si]
-        if col < len(sraw) and sraw[col] in BOX_CHARS:
-            if sraw[col] == "│":
-                continue
-            break
-        found = _find_nearby_pipe(sraw, col, PIPE_DRIFT_MAX)
-        if found is not None:
-            corrections[(line_idx, found)] = col
-        else:
-            break
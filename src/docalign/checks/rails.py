@@ -1,5 +1,7 @@
+from bisect import bisect_left
+
+from docalign import vectorized
 from docalign.constants import (
-    BOX_CHARS,
     BOX_CLOSERS,
     BOX_OPENERS,
     CLUSTER_THRESHOLD,
@@ -14,60 +16,112 @@ from docalign.constants import (
     RAIL_MAX_GAP,
     RAIL_THRESHOLD,
 )
-from docalign.parser import group_box_lines, iter_code_blocks
-from docalign.utils import _is_tree_block, _realign_box_chars
+from docalign.diagnostics import Diagnostic
+from docalign.parser import as_document, box_positions
+from docalign.utils import _realign_box_chars
 
 
 def check(lines):
     errors = []
-    for _, code_lines in iter_code_blocks(lines):
-        errors.extend(_check_rails(code_lines))
+    for block in as_document(lines).code_blocks:
+        errors.extend(check_block(block))
     return errors
 
 
 def fix(lines):
-    result = list(lines)
-    for code_indices, _ in iter_code_blocks(lines):
-        _fix_rails_in_block(code_indices, result)
+    doc = as_document(lines)
+    result = list(doc.lines)
+    for block in doc.code_blocks:
+        fix_block(block, result)
     return result
 
 
+class _RailGroup:
+    # Per-group lookup tables shared by every rail probe: row of each line,
+    # box-char positions and an occupancy bitset per row, rows per column.
+    # Checks read the column rows off the block's Grid, where the group is
+    # a run of consecutive rows starting at `first_row`.
+    def __init__(self, group, line_positions=None, grid=None, first_row=0):
+        self.group = group
+        self.row_of = {}
+        self.positions = []
+        self.occupancy = []
+        for gi, (i, raw) in enumerate(group):
+            positions = line_positions[i] if line_positions is not None else box_positions(raw)
+            bits = 0
+            for col in positions:
+                bits |= 1 << col
+            self.row_of[i] = gi
+            self.positions.append(positions)
+            self.occupancy.append(bits)
+
+        last_row = first_row + len(group)
+        if grid is None:
+            self.col_rows = {}
+            for gi, positions in enumerate(self.positions):
+                for col in positions:
+                    self.col_rows.setdefault(col, []).append(gi)
+        elif vectorized.enabled() and vectorized.large(grid):
+            self.col_rows = vectorized.column_rows(grid, first_row, last_row)
+        else:
+            self.col_rows = {}
+            for col in sorted(set().union(*self.positions)):
+                rows = grid.box_rows(col)
+                lo, hi = bisect_left(rows, first_row), bisect_left(rows, last_row)
+                self.col_rows[col] = [row - first_row for row in rows[lo:hi]]
+        self._outer = None
+
+    @property
+    def outer(self):
+        if self._outer is None:
+            threshold = len(self.group) * OUTER_COL_THRESHOLD
+            self._outer = {col for col, rows in self.col_rows.items() if len(rows) >= threshold}
+        return self._outer
+
+    def occupied(self, gi, col):
+        return 0 <= gi < len(self.occupancy) and self.occupancy[gi] >> col & 1
+
+
+def _refreshed(group, all_lines):
+    return _RailGroup([(i, all_lines[i].rstrip("\n")) for i, _ in group])
+
+
 def _cluster_by_positions(items, threshold=CLUSTER_THRESHOLD):
+    # First-fit against each cluster's first member; only clusters whose
+    # reference starts within threshold of the item can match, so they are
+    # bucketed by their first position.
     clusters = []
+    by_first = {}
     for item in items:
         positions = item[2]
-        fitted = False
-        for cluster in clusters:
-            ref = cluster[0][2]
-            if all(abs(a - b) <= threshold for a, b in zip(positions, ref)):
-                cluster.append(item)
-                fitted = True
-                break
-        if not fitted:
+        first = positions[0]
+        fit = None
+        for key in range(first - threshold, first + threshold + 1):
+            for ci in by_first.get(key, ()):
+                if fit is not None and ci >= fit:
+                    break
+                if all(abs(a - b) <= threshold for a, b in zip(positions, clusters[ci][0][2])):
+                    fit = ci
+                    break
+        if fit is None:
+            by_first.setdefault(first, []).append(len(clusters))
             clusters.append([item])
+        else:
+            clusters[fit].append(item)
     return [c for c in clusters if len(c) >= MIN_CLUSTER_SIZE]
 
 
-def _has_adjacent_support(group, line_idx, col):
-    gi_map = {li: gi for gi, (li, _) in enumerate(group)}
-    gi = gi_map.get(line_idx)
+def _has_adjacent_support(rg, line_idx, col):
+    gi = rg.row_of.get(line_idx)
     if gi is None:
         return False
-    for dgi in [-1, 1]:
-        adj = gi + dgi
-        if 0 <= adj < len(group):
-            _, raw = group[adj]
-            if col < len(raw) and raw[col] in BOX_CHARS:
-                return True
-    return False
+    return bool(rg.occupied(gi - 1, col) or rg.occupied(gi + 1, col))
 
 
-def _check_rails_by_index(group):
-    errors = []
-    flagged = set()
+def _index_clusters(rg):
     by_count = {}
-    for i, raw in group:
-        positions = tuple(j for j, c in enumerate(raw) if c in BOX_CHARS)
+    for gi, (i, raw) in enumerate(rg.group):
+        positions = rg.positions[gi]
         by_count.setdefault(len(positions), []).append((i, raw, positions))
 
     for count, items in by_count.items():
@@ -82,42 +136,40 @@ def _check_rails_by_index(group):
                 if len(col_counts) <= 1:
                     continue
                 most_common = max(col_counts.keys(), key=lambda k: len(col_counts[k]))
-                for col, line_indices in col_counts.items():
-                    if col != most_common:
-                        for li in line_indices:
-                            if _has_adjacent_support(group, li, col):
-                                continue
-                            flagged.add((li, col))
-                            errors.append(f"L{li + 1} box char at col {col}, expected col {most_common}")
-    return errors, flagged
+                yield most_common, col_counts
 
 
-def _identify_rails(group):
-    all_entries = []
-    for gi, (line_idx, raw) in enumerate(group):
-        for j, c in enumerate(raw):
-            if c in BOX_CHARS:
-                all_entries.append((gi, j, line_idx, c))
+def _check_rails_by_index(rg):
+    errors = []
+    flagged = set()
+    for most_common, col_counts in _index_clusters(rg):
+        for col, line_indices in col_counts.items():
+            if col != most_common:
+                for li in line_indices:
+                    if _has_adjacent_support(rg, li, col):
+                        continue
+                    flagged.add((li, col))
+                    errors.append(Diagnostic("rail", li + 1, col=col, expected=most_common))
+    return errors, flagged
 
-    sorted_entries = sorted(all_entries, key=lambda x: x[1])
-    if not sorted_entries:
-        return []
-
-    col_clusters = []
-    current = [sorted_entries[0]]
-    for entry in sorted_entries[1:]:
-        if entry[1] - current[0][1] <= RAIL_THRESHOLD:
-            current.append(entry)
-        else:
-            if len(current) >= MIN_SEGMENT_SIZE:
-                col_clusters.append(current)
-            current = [entry]
-    if len(current) >= MIN_SEGMENT_SIZE:
-        col_clusters.append(current)
 
+def _identify_rails(rg):
+    # Columns within RAIL_THRESHOLD of a cluster's first column form one
+    # candidate rail; it is then split wherever rows leave a gap.
+    group = rg.group
+    cols = sorted(rg.col_rows)
     rails = []
-    for cluster in col_clusters:
-        cluster.sort(key=lambda x: x[0])
+    k = 0
+    while k < len(cols):
+        start = k
+        k += 1
+        while k < len(cols) and cols[k] - cols[start] <= RAIL_THRESHOLD:
+            k += 1
+        members = cols[start:k]
+        if sum(len(rg.col_rows[col]) for col in members) < MIN_SEGMENT_SIZE:
+            continue
+
+        cluster = sorted((gi, col) for col in members for gi in rg.col_rows[col])
         segments = []
         current_seg = [cluster[0]]
         for entry in cluster[1:]:
@@ -131,12 +183,12 @@ def _identify_rails(group):
             segments.append(current_seg)
 
         for seg in segments:
-            rails.append([(line_idx, col, char) for _, col, line_idx, char in seg])
+            rails.append([(group[gi][0], col, group[gi][1][col]) for gi, col in seg])
 
     return rails
 
 
-def _resolve_rail(rail, group=None):
+def _resolve_rail(rail, rg):
     col_data = {}
     for line_idx, col, char in rail:
         col_data.setdefault(col, []).append((line_idx, char))
@@ -144,21 +196,17 @@ def _resolve_rail(rail, group=None):
     if len(col_data) <= 1:
         return None, col_data
 
-    outer_cols = _detect_outer_columns(group) if group else set()
-    gi_map = {li: gi for gi, (li, _) in enumerate(group)} if group else {}
-
     anchored = {}
     for col, entries in col_data.items():
         count = 0
         for li, c in entries:
-            if c in ("┬", "┴") and group:
-                gi = gi_map.get(li)
+            if c in ("┬", "┴"):
+                gi = rg.row_of.get(li)
                 if gi is not None:
-                    _, raw = group[gi]
-                    if _is_anchored_connector(raw, col, outer_cols):
+                    _, raw = rg.group[gi]
+                    if _is_anchored_connector(raw, col, rg.outer):
                         count += 1
         anchored[col] = count
-
     latest_anchored = {
         col: max((li for li, c in entries if c in ("┬", "┴")), default=-1) for col, entries in col_data.items()
     }
@@ -197,11 +245,11 @@ def _resolve_rail(rail, group=None):
     return most_common, col_data
 
 
-def _rail_errors(rail, group=None, already_flagged=None):
+def _rail_errors(rail, rg, already_flagged=None):
     errors = []
     if not rail:
         return errors
-    most_common, col_data = _resolve_rail(rail, group)
+    most_common, col_data = _resolve_rail(rail, rg)
     if most_common is None:
         return errors
 
@@ -210,14 +258,14 @@ def _rail_errors(rail, group=None, already_flagged=None):
             for li, _ in entries:
                 if already_flagged and (li, col) in already_flagged:
                     continue
-                errors.append(f"L{li + 1} box char at col {col}, expected col {most_common}")
+                errors.append(Diagnostic("rail", li + 1, col=col, expected=most_common))
     return errors
 
 
-def _check_rails_by_column(group, already_flagged):
+def _check_rails_by_column(rg, already_flagged):
     errors = []
-    for rail in _identify_rails(group):
-        errors.extend(_rail_errors(rail, group, already_flagged))
+    for rail in _identify_rails(rg):
+        errors.extend(_rail_errors(rail, rg, already_flagged))
     return errors
 
 
@@ -241,36 +289,25 @@ def _is_anchored_connector(raw, col, outer_cols):
     return False
 
 
-def _detect_outer_columns(group):
-    col_count = {}
-    for _, raw in group:
-        for j, c in enumerate(raw):
-            if c in BOX_CHARS:
-                col_count[j] = col_count.get(j, 0) + 1
-    threshold = len(group) * OUTER_COL_THRESHOLD
-    return {col for col, count in col_count.items() if count >= threshold}
-
-
-def _local_support(group, col, gi, exclude_gi, window=LOCAL_SUPPORT_WINDOW):
+def _local_support(rg, col, gi, exclude_gi, window=LOCAL_SUPPORT_WINDOW):
     count = 0
     for dgi in range(-window, window + 1):
         check_gi = gi + dgi
         if check_gi == gi or check_gi == exclude_gi:
             continue
-        if 0 <= check_gi < len(group):
-            _, raw = group[check_gi]
-            if col < len(raw) and raw[col] in BOX_CHARS:
-                count += 1
+        if rg.occupied(check_gi, col):
+            count += 1
     return count
 
 
-def _find_connector_drifts(group, already_flagged=None):
-    outer = _detect_outer_columns(group)
+def _find_connector_drifts(rg, already_flagged=None):
+    group = rg.group
+    outer = rg.outer
     inner = {}
-    for gi, (line_idx, raw) in enumerate(group):
-        chars = {j: c for j, c in enumerate(raw) if c in BOX_CHARS and j not in outer}
-        if chars:
-            inner[gi] = (line_idx, chars)
+    for gi, (line_idx, _) in enumerate(group):
+        cols = {j for j in rg.positions[gi] if j not in outer}
+        if cols:
+            inner[gi] = (line_idx, cols)
 
     drifts = []
     flagged = set() if already_flagged is None else set(already_flagged)
@@ -283,8 +320,7 @@ def _find_connector_drifts(group, already_flagged=None):
         raw_a = group[gi_a][1]
         raw_b = group[gi_b][1]
         anchored_a = {col for col in chars_a if _is_anchored_connector(raw_a, col, outer)}
-        sorted_cols = sorted(anchored_a) + sorted(set(chars_a) - anchored_a)
-
+        sorted_cols = sorted(anchored_a) + sorted(chars_a - anchored_a)
         for col_a in sorted_cols:
             if col_a in chars_b:
                 continue
@@ -305,8 +341,8 @@ def _find_connector_drifts(group, already_flagged=None):
                     drifts.append((li_a, col_a, col_b))
                     flagged.add((li_a, col_a))
             else:
-                support_a = _local_support(group, col_a, gi_a, gi_b)
-                support_b = _local_support(group, col_b, gi_b, gi_a)
+                support_a = _local_support(rg, col_a, gi_a, gi_b)
+                support_b = _local_support(rg, col_b, gi_b, gi_a)
                 if support_a < support_b and (li_a, col_a) not in flagged:
                     drifts.append((li_a, col_a, col_b))
                     flagged.add((li_a, col_a))
@@ -316,25 +352,26 @@ def _find_connector_drifts(group, already_flagged=None):
     return drifts
 
 
-def _check_rails(code_lines):
+def check_block(block):
     errors = []
-    if _is_tree_block(code_lines):
+    if block.is_tree:
         return errors
 
-    for group in group_box_lines(code_lines):
-        index_errors, already_flagged = _check_rails_by_index(group)
+    for group in block.groups:
+        rg = _RailGroup(group, block.positions, block.grid, group[0][0] - block.start - 1)
+        index_errors, already_flagged = _check_rails_by_index(rg)
         errors.extend(index_errors)
-        errors.extend(_check_rails_by_column(group, already_flagged))
-        for line_idx, col, expected in _find_connector_drifts(group, already_flagged):
-            errors.append(f"L{line_idx + 1} box char at col {col}, expected col {expected}")
+        errors.extend(_check_rails_by_column(rg, already_flagged))
+        for line_idx, col, expected in _find_connector_drifts(rg, already_flagged):
+            errors.append(Diagnostic("rail", line_idx + 1, col=col, expected=expected))
 
     return errors
 
 
-def _build_corrections(rails, group=None):
+def _build_corrections(rails, rg):
     corrections = {}
     for rail in rails:
-        most_common, col_data = _resolve_rail(rail, group)
+        most_common, col_data = _resolve_rail(rail, rg)
         if most_common is None:
             continue
         for col, entries in col_data.items():
@@ -360,10 +397,10 @@ def _has_independent_adjacent_box(raw, col):
     return LARGE_SPACE_GAP in between_pipes
 
 
-def _apply_corrections(group, all_lines, corrections):
+def _apply_corrections(rg, all_lines, corrections):
     failed = {}
-    for i, raw in group:
-        actual = [j for j, c in enumerate(raw) if c in BOX_CHARS]
+    for gi, (i, raw) in enumerate(rg.group):
+        actual = list(rg.positions[gi])
         expected = [corrections.get((i, j), j) for j in actual]
         if actual == expected:
             continue
@@ -381,22 +418,20 @@ def _apply_corrections(group, all_lines, corrections):
     if not failed:
         return
 
-    group_now = [(i, all_lines[i].rstrip("\n")) for i, _ in group]
+    now = _refreshed(rg.group, all_lines)
 
     reverse = {}
     for (failed_line, failed_col), target_col in failed.items():
-        for i, raw in group_now:
-            if i == failed_line:
-                continue
-            box_positions = [j for j, c in enumerate(raw) if c in BOX_CHARS]
-            if target_col in box_positions:
+        for gi in now.col_rows.get(target_col, ()):
+            i = now.group[gi][0]
+            if i != failed_line:
                 reverse[(i, target_col)] = failed_col
 
     if not reverse:
         return
 
-    for i, raw in group_now:
-        actual = [j for j, c in enumerate(raw) if c in BOX_CHARS]
+    for gi, (i, raw) in enumerate(now.group):
+        actual = list(now.positions[gi])
         expected = [reverse.get((i, j), j) for j in actual]
         if actual == expected:
             continue
@@ -405,55 +440,33 @@ def _apply_corrections(group, all_lines, corrections):
             all_lines[i] = fixed + "\n"
 
 
-def _fix_rails_by_index(group, all_lines):
-    by_count = {}
-    for i, raw in group:
-        positions = tuple(j for j, c in enumerate(raw) if c in BOX_CHARS)
-        by_count.setdefault(len(positions), []).append((i, raw, positions))
-
+def _fix_rails_by_index(rg, all_lines):
     corrections = {}
-    for count, items in by_count.items():
-        if count < MIN_CLUSTER_SIZE:
-            continue
-        for cluster in _cluster_by_positions(items):
-            for pos_idx in range(count):
-                col_counts = {}
-                for i, raw, positions in cluster:
-                    col = positions[pos_idx]
-                    col_counts.setdefault(col, []).append(i)
-                if len(col_counts) <= 1:
-                    continue
-                most_common = max(col_counts.keys(), key=lambda k: len(col_counts[k]))
-                for col, line_indices in col_counts.items():
-                    if col != most_common:
-                        for li in line_indices:
-                            corrections[(li, col)] = most_common
-
-    _apply_corrections(group, all_lines, corrections)
+    for most_common, col_counts in _index_clusters(rg):
+        for col, line_indices in col_counts.items():
+            if col != most_common:
+                for li in line_indices:
+                    corrections[(li, col)] = most_common
+    _apply_corrections(rg, all_lines, corrections)
 
 
-def _fix_rails_by_column(group, all_lines):
-    corrections = _build_corrections(_identify_rails(group), group)
-    _apply_corrections(group, all_lines, corrections)
+def _fix_rails_by_column(rg, all_lines):
+    _apply_corrections(rg, all_lines, _build_corrections(_identify_rails(rg), rg))
 
 
-def _fix_connector_drifts(group, all_lines):
-    drifts = _find_connector_drifts(group)
+def _fix_connector_drifts(rg, all_lines):
+    drifts = _find_connector_drifts(rg)
     if not drifts:
         return
     corrections = {(li, col): expected for li, col, expected in drifts}
-    _apply_corrections(group, all_lines, corrections)
-
+    _apply_corrections(rg, all_lines, corrections)
 
-def _fix_rails_in_block(code_indices, all_lines):
-    code_lines = [(i, all_lines[i].rstrip("\n")) for i in code_indices]
 
-    if _is_tree_block(code_lines):
+def fix_block(block, all_lines):
+    if block.is_tree:
         return
 
-    for group in group_box_lines(code_lines):
-        _fix_rails_by_index(group, all_lines)
-        group = [(i, all_lines[i].rstrip("\n")) for i, _ in group]
-        _fix_rails_by_column(group, all_lines)
-        group = [(i, all_lines[i].rstrip("\n")) for i, _ in group]
-        _fix_connector_drifts(group, all_lines)
+    for group in block.groups:
+        _fix_rails_by_index(_RailGroup(group, block.positions), all_lines)
+        _fix_rails_by_column(_refreshed(group, all_lines), all_lines)
+        _fix_connector_drifts(_refreshed(group, all_lines), all_lines)
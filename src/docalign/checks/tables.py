@@ -1,101 +1,116 @@
+from docalign.diagnostics import Diagnostic
+from docalign.parser import as_document
+from docalign.width import pad, width
+
+
 def split_table_row(raw):
-    cells = []
-    current = ""
-    in_backtick = False
-    i = 0
-    while i < len(raw):
-        ch = raw[i]
-        if ch == "`":
-            in_backtick = not in_backtick
-            current += ch
-        elif ch == "|" and not in_backtick:
-            cells.append(current)
-            current = ""
+    # Splitting on backticks leaves code spans at the odd indexes; only the
+    # text between them is split into cells.
+    if "`" not in raw:
+        return raw.split("|")
+    cells = [""]
+    for k, part in enumerate(raw.split("`")):
+        if k:
+            cells[-1] += "`"
+        if k % 2:
+            cells[-1] += part
         else:
-            current += ch
-        i += 1
-    cells.append(current)
+            first, *rest = part.split("|")
+            cells[-1] += first
+            cells.extend(rest)
     return cells
 
 
+def _is_table_row(raw):
+    return raw.startswith("|") and raw.endswith("|") and len(raw) > 2
+
+
+def _is_separator(cells):
+    return cells and all(c.strip().replace("-", "") == "" for c in cells)
+
+
 def check(lines):
     errors = []
     sep_widths = None
     sep_line = None
-    for i, line in enumerate(lines):
-        raw = line.rstrip("\n")
-        if raw.startswith("|") and raw.endswith("|") and len(raw) > 2:
-            cells = split_table_row(raw)
-            inner_cells = cells[1:-1]
-            widths = [len(c) for c in inner_cells]
-            is_sep = widths and all(c.strip().replace("-", "") == "" for c in inner_cells)
+    for i, raw in enumerate(as_document(lines).raw):
+        if _is_table_row(raw):
+            inner_cells = split_table_row(raw)[1:-1]
+            widths = [width(c) for c in inner_cells]
+            is_sep = _is_separator(inner_cells)
             if is_sep:
                 sep_widths = widths
                 sep_line = i + 1
             elif sep_widths:
                 for ci, (w, ew) in enumerate(zip(widths, sep_widths)):
                     if w != ew:
-                        errors.append(f"L{i + 1} table col{ci}: width={w} expected={ew} (separator at L{sep_line})")
+                        errors.append(
+                            Diagnostic("table-width", i + 1, expected=ew, actual=w, detail=ci, ref=(sep_line,))
+                        )
             if not is_sep:
                 for ci, cell in enumerate(inner_cells):
                     if cell and not cell.startswith(" "):
-                        errors.append(f"L{i + 1} table col{ci}: missing space after |")
+                        errors.append(Diagnostic("table-space-after", i + 1, detail=ci))
                     if cell and not cell.endswith(" "):
-                        errors.append(f"L{i + 1} table col{ci}: missing space before |")
+                        errors.append(Diagnostic("table-space-before", i + 1, detail=ci))
         else:
             sep_widths = None
     return errors
 
 
+def _merge_widths(widths, row_widths):
+    for ci, w in enumerate(row_widths):
+        if w > widths[ci]:
+            widths[ci] = w
+
+
+def _column_widths(raw_lines, start, stop):
+    # Pass one keeps only the widest content per column. The separator is
+    # the last dash-only row, so an earlier dash-only row is counted as
+    # content once a later one takes its place.
+    widths = []
+    sep_row = None
+    sep_widths = []
+    for row in range(start, stop):
+        cells = split_table_row(raw_lines[row])[1:-1]
+        if len(cells) > len(widths):
+            widths.extend([0] * (len(cells) - len(widths)))
+        row_widths = [width(c.strip()) for c in cells]
+        if _is_separator(cells):
+            _merge_widths(widths, sep_widths)
+            sep_row, sep_widths = row, row_widths
+        else:
+            _merge_widths(widths, row_widths)
+    return widths, sep_row
+
+
+def _format_row(cells, widths, is_sep):
+    new_cells = []
+    for ci, cell in enumerate(cells):
+        target = widths[ci]
+        if is_sep:
+            new_cells.append("-" * (target + 2))
+        else:
+            new_cells.append(" " + pad(cell.strip(), target) + " ")
+    return "|" + "|".join(new_cells) + "|\n"
+
+
 def fix(lines):
-    result = list(lines)
+    doc = as_document(lines)
+    raw_lines = doc.raw
+    result = list(doc.lines)
     i = 0
     while i < len(result):
-        raw = result[i].rstrip("\n")
-        if raw.startswith("|") and raw.endswith("|") and len(raw) > 2:
-            table_rows = []
-            while i < len(result):
-                raw = result[i].rstrip("\n")
-                if raw.startswith("|") and raw.endswith("|") and len(raw) > 2:
-                    table_rows.append(i)
-                    i += 1
-                else:
-                    break
-
-            all_cells = []
-            sep_idx = None
-            for ri, row_idx in enumerate(table_rows):
-                raw = result[row_idx].rstrip("\n")
-                cells = split_table_row(raw)[1:-1]
-                all_cells.append(cells)
-                if cells and all(c.strip().replace("-", "") == "" for c in cells):
-                    sep_idx = ri
-
-            if sep_idx is None:
-                continue
-
-            num_cols = max(len(c) for c in all_cells)
-            max_widths = [0] * num_cols
-            for ri, cells in enumerate(all_cells):
-                if ri == sep_idx:
-                    continue
-                for ci, cell in enumerate(cells):
-                    w = len(cell.strip())
-                    if w > max_widths[ci]:
-                        max_widths[ci] = w
-
-            for ri, row_idx in enumerate(table_rows):
-                cells = all_cells[ri]
-                is_sep = ri == sep_idx
-                new_cells = []
-                for ci, cell in enumerate(cells):
-                    target = max_widths[ci]
-                    if is_sep:
-                        new_cells.append("-" * (target + 2))
-                    else:
-                        content = cell.strip()
-                        new_cells.append(" " + content + " " * (target - len(content)) + " ")
-                result[row_idx] = "|" + "|".join(new_cells) + "|\n"
-        else:
+        if not _is_table_row(raw_lines[i]):
+            i += 1
+            continue
+        start = i
+        while i < len(result) and _is_table_row(raw_lines[i]):
             i += 1
+        widths, sep_row = _column_widths(raw_lines, start, i)
+        if sep_row is None:
+            continue
+        # Pass two re-splits each row and writes it out formatted.
+        for row in range(start, i):
+            result[row] = _format_row(split_table_row(raw_lines[row])[1:-1], widths, row == sep_row)
     return result
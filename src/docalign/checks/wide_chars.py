@@ -1,23 +1,39 @@
+import re
 import unicodedata
+from functools import lru_cache
 
 from docalign.constants import SAFE_BOX_AND_ARROW
-from docalign.parser import iter_code_blocks
+from docalign.diagnostics import Diagnostic
+from docalign.parser import as_document
+
+# Anything but ASCII and the box/arrow chars diagrams are made of.
+_SUSPECT = re.compile("[^\\x00-\\x7f" + re.escape("".join(sorted(SAFE_BOX_AND_ARROW))) + "]")
 
 
 def check(lines):
     errors = []
-    for _, code_lines in iter_code_blocks(lines):
-        for line_idx, raw in code_lines:
-            for col, ch in enumerate(raw):
-                if _is_wide_char(ch):
-                    errors.append(f"L{line_idx + 1} wide char '{ch}' (U+{ord(ch):04X}) at col {col}")
+    for block in as_document(lines).code_blocks:
+        errors.extend(check_block(block))
     return errors
 
 
 def fix(lines):
-    return lines
+    return as_document(lines).lines
+
+
+def check_block(block):
+    errors = []
+    for line_idx, raw in block.code_lines:
+        if raw.isascii():
+            continue
+        for m in _SUSPECT.finditer(raw):
+            ch = m.group()
+            if _is_wide_char(ch):
+                errors.append(Diagnostic("wide-char", line_idx + 1, col=m.start(), detail=ch))
+    return errors
 
 
+@lru_cache(maxsize=None)
 def _is_wide_char(ch):
     if ch.isascii():
         return False
@@ -1,9 +1,15 @@
+import cProfile
 import difflib
 import glob as globmod
 import os
 import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from importlib.metadata import version as pkg_version
+from itertools import repeat
 
+from docalign.cache import ResultCache
 from docalign.checks import (
     arrows,
     box_padding,
@@ -18,8 +24,22 @@ from docalign.checks import (
     tables,
     wide_chars,
 )
-from docalign.constants import BOX_CHARS_WITH_DASH, FIX_ITERATIONS, MIN_BOX_CHARS_FOR_STRIP
+from docalign.constants import (
+    BOX_CHARS_WITH_DASH,
+    CACHE_DIR,
+    CACHE_MAX_BYTES,
+    FIX_ITERATIONS,
+    MIN_BOX_CHARS_FOR_STRIP,
+    MIN_FILES_FOR_PARALLEL,
+    POOL_CHUNKS_PER_JOB,
+)
+from docalign.diagnostics import Diagnostic
+from docalign.gitfiles import GitError, changed_files, read_staged, staged_files
 from docalign.hints import get_hint
+from docalign.memo import BlockMemo
+from docalign.parser import CodeBlock, Document, as_document
+from docalign.reporters import FORMATS, make_reporter
+from docalign.stats import Stats, merge_profile, profile_data
 
 CHECK_MODULES = {
     "tables": tables,
@@ -38,61 +58,143 @@ CHECK_MODULES = {
 
 ALL_CHECKS = list(CHECK_MODULES.values())
 
+BLOCK_MODULES = {name: mod for name, mod in CHECK_MODULES.items() if hasattr(mod, "check_block")}
+
+PRE_CONVERGENCE_MODULES = {
+    "box-widths": box_widths,
+    "box-padding": box_padding,
+    "horiz-arrows": horiz_arrows,
+}
 
-def run_checks(lines, ignored=None):
+CONVERGENCE_MODULES = {
+    "box-spacing": box_spacing,
+    "box-widths": box_widths,
+    "box-walls": box_walls,
+    "rails": rails,
+    "pipes": pipes,
+}
+
+POST_CONVERGENCE_MODULES = {
+    "arrows": arrows,
+}
+
+_BLOCK_MEMO = BlockMemo()
+
+_STATS = None
+
+
+def _call(phase, name, fn, *args):
+    if _STATS is None:
+        return fn(*args)
+    return _STATS.timed(phase, name, fn, *args)
+
+
+def run_checks(lines, ignored=None, memo=None):
     ignored = ignored or set()
+    memo = _BLOCK_MEMO if memo is None else memo
+    doc = as_document(lines)
+    block_names = [name for name in BLOCK_MODULES if name not in ignored]
+    per_block = [_check_block(block, block_names, ignored, memo) for block in doc.code_blocks] if block_names else []
     errors = []
     for name, mod in CHECK_MODULES.items():
-        if name not in ignored:
-            errors.extend(mod.check(lines))
+        if name in ignored:
+            continue
+        if name in BLOCK_MODULES:
+            for block_errors in per_block:
+                errors.extend(block_errors[name])
+        else:
+            errors.extend(_call("check", name, mod.check, doc))
     return errors
 
 
-def run_fixes(lines, ignored=None):
-    ignored = ignored or set()
+def _check_block(block, names, ignored, memo):
+    key = memo.key("check", ignored, [raw for _, raw in block.code_lines])
+    cached = memo.get(key)
+    if _STATS is not None:
+        _STATS.memo_lookup(cached is not None)
+    if cached is not None:
+        return {name: [Diagnostic.from_tuple(t).shifted(block.start) for t in rows] for name, rows in cached.items()}
+    found = {name: _call("check", name, BLOCK_MODULES[name].check_block, block) for name in names}
+    memo.put(key, {name: [e.shifted(-block.start).as_tuple() for e in errs] for name, errs in found.items()})
+    return found
+
 
-    def _apply(name, fn, data):
-        return fn(data) if name not in ignored else data
-
-    fixed = _apply("tables", tables.fix, lines)
-    fixed = _apply("box-widths", box_widths.fix, fixed)
-    fixed = _apply("box-padding", box_padding.fix, fixed)
-    fixed = _apply("horiz-arrows", horiz_arrows.fix, fixed)
-    for _ in range(FIX_ITERATIONS):
-        prev = list(fixed)
-        fixed = _apply("box-spacing", box_spacing.fix, fixed)
-        fixed = _apply("box-widths", box_widths.fix, fixed)
-        fixed = _apply("box-walls", box_walls.fix, fixed)
-        fixed = _apply("rails", rails.fix, fixed)
-        fixed = _apply("pipes", pipes.fix, fixed)
-        if fixed == prev:
+def run_fixes(lines, ignored=None, memo=None):
+    ignored = ignored or set()
+    memo = _BLOCK_MEMO if memo is None else memo
+    doc = as_document(lines)
+
+    def _apply(name, fn, doc):
+        return doc.updated(_call("fix", name, fn, doc)) if name not in ignored else doc
+
+    doc = _apply("tables", tables.fix, doc)
+    doc = _fix_code_blocks(doc, ignored, memo)
+    doc = _apply("list-descs", list_descs.fix, doc)
+    doc = _apply("def-lists", def_lists.fix, doc)
+    doc = _apply("wide-chars", wide_chars.fix, doc)
+    return list(doc.lines)
+
+
+def _enabled_steps(modules, ignored):
+    return [(name, mod.fix_block) for name, mod in modules.items() if name not in ignored]
+
+
+def _fix_code_blocks(doc, ignored, memo):
+    pre = _enabled_steps(PRE_CONVERGENCE_MODULES, ignored)
+    loop = _enabled_steps(CONVERGENCE_MODULES, ignored)
+    post = _enabled_steps(POST_CONVERGENCE_MODULES, ignored)
+    fixed = list(doc.lines)
+    for block in doc.code_blocks:
+        key = memo.key("fix", ignored, [fixed[i] for i in block.indices])
+        cached = memo.get(key)
+        if _STATS is not None:
+            _STATS.memo_lookup(cached is not None)
+        if cached is None:
+            _fix_block(block, fixed, pre, loop, post)
+            memo.put(key, [fixed[i] for i in block.indices])
+        else:
+            for i, line in zip(block.indices, cached):
+                fixed[i] = line
+    if len(doc.fences) % 2:
+        _strip_box_trailing_whitespace(fixed, range(doc.fences[-1] + 1, len(fixed)))
+    return doc.updated(fixed)
+
+
+def _fix_block(block, fixed, pre, loop, post):
+    for name, step in pre:
+        block = _apply_block_step(name, step, block, fixed)
+    for iteration in range(1, FIX_ITERATIONS + 1):
+        started = time.perf_counter()
+        start = [fixed[i] for i in block.indices]
+        for name, step in loop:
+            block = _apply_block_step(name, step, block, fixed)
+        converged = [fixed[i] for i in block.indices] == start
+        if _STATS is not None:
+            _STATS.add_iteration(iteration, time.perf_counter() - started)
+        if converged:
             break
-    fixed = _apply("arrows", arrows.fix, fixed)
-    fixed = _apply("list-descs", list_descs.fix, fixed)
-    fixed = _apply("def-lists", def_lists.fix, fixed)
-    fixed = _apply("wide-chars", wide_chars.fix, fixed)
-    fixed = _strip_box_trailing_whitespace(fixed)
-    return fixed
-
-
-def _strip_box_trailing_whitespace(lines):
-    result = []
-    in_code = False
-    for line in lines:
+    for name, step in post:
+        block = _apply_block_step(name, step, block, fixed)
+    _strip_box_trailing_whitespace(fixed, block.indices)
+
+
+def _apply_block_step(name, step, block, fixed):
+    before = [fixed[i] for i in block.indices]
+    _call("fix", name, step, block, fixed)
+    if [fixed[i] for i in block.indices] != before:
+        return CodeBlock.from_lines(block.start, block.end, fixed)
+    return block
+
+
+def _strip_box_trailing_whitespace(lines, indices):
+    for i in indices:
+        line = lines[i]
         raw = line.rstrip("\n")
-        if raw.strip().startswith("```"):
-            in_code = not in_code
-            result.append(line)
-            continue
-        if in_code:
-            box_count = sum(1 for c in raw if c in BOX_CHARS_WITH_DASH)
-            if box_count >= MIN_BOX_CHARS_FOR_STRIP:
-                stripped = raw.rstrip()
-                if stripped != raw:
-                    result.append(stripped + "\n" if line.endswith("\n") else stripped)
-                    continue
-        result.append(line)
-    return result
+        box_count = sum(1 for c in raw if c in BOX_CHARS_WITH_DASH)
+        if box_count >= MIN_BOX_CHARS_FOR_STRIP:
+            stripped = raw.rstrip()
+            if stripped != raw:
+                lines[i] = stripped + "\n" if line.endswith("\n") else stripped
 
 
 def print_help():
@@ -118,12 +220,56 @@ Usage:
   docalign --fix <path>                  # auto-fix files in place
   docalign --diff <path>                 # show unified diff of changes
   docalign --verbose <path>              # show actionable hints with each error
+  docalign --format jsonl <path>         # machine-readable output: text (default), jsonl or sarif
   docalign --ignore tables,pipes <path>  # skip specific checks
+  docalign --jobs 8 <path>               # process files on 8 worker processes
+  docalign --no-cache <path>             # bypass the .docalign_cache/ result cache
+  docalign --stats <path>                # print per-check timings to stderr
+  docalign --profile-out run.prof <path> # write a cProfile/pstats profile of the run
+  docalign --changed-since main <path>   # only .md files changed since a git revision
+  docalign --staged <path>               # check staged .md files as stored in the git index
+  docalign --watch <path>                # re-check changed files until interrupted
+  docalign daemon [start|stop|status]    # keep a warm engine on a local socket
+  docalign lsp                           # language server on stdio (diagnostics + code actions)
+  docalign bench [--baseline FILE]       # time every check on a synthetic corpus
   docalign --help                        # show this help
   docalign --version                     # show version
 
 Paths can be files, directories, or glob patterns (e.g. "docs/**/*.md").
 
+--jobs accepts a worker count or "auto" (default), which uses one worker per
+available CPU once there are enough files to make a process pool worthwhile.
+Output is always printed in sorted file order.
+
+--changed-since and --staged ask git for the changed .md files instead of
+walking the paths, which then only narrow the selection (default: current
+directory). --changed-since includes staged, unstaged and untracked files;
+--staged reads file contents from the index and cannot be combined with --fix.
+
+--format jsonl prints one JSON object per diagnostic (file, line, col, code,
+message, expected, actual, hint), written as soon as each file finishes.
+--format sarif writes a single SARIF 2.1.0 run for code-scanning dashboards,
+streaming results into it as files complete. In --fix mode both report only the
+issues that could not be auto-fixed.
+
+--stats records wall time and call counts for every check and fix module,
+per convergence iteration and per file, and prints a summary to stderr.
+--profile-out profiles every file (in pool workers too) and writes one merged
+pstats file, readable with "python -m pstats". Cached files are not re-checked,
+so combine either with --no-cache to time the full run.
+
+Check results are cached in .docalign_cache/ keyed by file content, docalign
+version and --ignore set, so unchanged files are not re-checked.
+
+--watch keeps every file's parsed state in memory and re-checks only the files
+(and, within them, only the sections) that changed. It listens for inotify events
+on Linux and polls mtimes elsewhere or when DOCALIGN_WATCH_POLL=1 is set.
+
+While "docalign daemon" runs, every docalign invocation is forwarded to it over
+a Unix socket ($DOCALIGN_SOCKET, default $XDG_RUNTIME_DIR/docalign-<uid>.sock)
+and runs without re-importing the engine. Without a daemon, or with
+DOCALIGN_NO_DAEMON=1, docalign runs in-process as usual.
+
 Check names for --ignore:
   tables, box-widths, box-padding, box-spacing, horiz-arrows,
   box-walls, rails, arrows, pipes, list-descs, def-lists, wide-chars
@@ -166,7 +312,171 @@ def _fmt(error, verbose):
     return f"{error} \u2192 {hint}" if hint else error
 
 
+FileResult = namedtuple(
+    "FileResult", ["rel", "errors", "remaining", "diff_text", "stats", "profile"], defaults=(None, None)
+)
+
+
+_PERSISTENT_MEMOS = {}
+
+
+def _memo_for(cache):
+    if cache is None:
+        return _BLOCK_MEMO
+    memo_key = (cache.directory, cache.salt)
+    if memo_key not in _PERSISTENT_MEMOS:
+        _PERSISTENT_MEMOS[memo_key] = BlockMemo(store=cache)
+    return _PERSISTENT_MEMOS[memo_key]
+
+
+def _run_cached_checks(lines, ignored, cache):
+    if cache is None:
+        return run_checks(lines, ignored)
+    key = cache.key(as_document(lines).lines)
+    rows = cache.get(key)
+    if rows is not None:
+        return [Diagnostic.from_tuple(row) for row in rows]
+    errs = run_checks(lines, ignored, _memo_for(cache))
+    cache.put(key, [e.as_tuple() for e in errs])
+    return errs
+
+
+def _select_changed(files, paths):
+    dirs = []
+    globbed = set()
+    for p in paths:
+        if any(c in p for c in _GLOB_CHARS):
+            globbed.update(os.path.realpath(m) for m in globmod.glob(p, recursive=True))
+        else:
+            dirs.append(os.path.realpath(p))
+
+    selected = []
+    for fpath in files:
+        real = os.path.realpath(fpath)
+        if real in globbed or any(real == d or real.startswith(d.rstrip(os.sep) + os.sep) for d in dirs):
+            selected.append(fpath)
+    return selected
+
+
+def _process_file(fpath, lines, mode, ignored, cache=None, stats=False, profile=False):
+    if not stats and not profile:
+        return _check_and_fix(fpath, lines, mode, ignored, cache)
+
+    global _STATS
+    _STATS = Stats() if stats else None
+    profiler = cProfile.Profile() if profile else None
+    started = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        result = _check_and_fix(fpath, lines, mode, ignored, cache)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        recorder, _STATS = _STATS, None
+    if recorder is not None:
+        recorder.add_file(result.rel, time.perf_counter() - started)
+    return result._replace(stats=recorder, profile=profile_data(profiler) if profiler is not None else None)
+
+
+def _check_and_fix(fpath, lines, mode, ignored, cache):
+    if lines is None:
+        with open(fpath) as f:
+            lines = f.readlines()
+
+    rel = os.path.relpath(fpath)
+    # One parse for both passes: blocks the fixers leave untouched keep the
+    # grids and traces their checks already built.
+    doc = Document(lines)
+    errs = _run_cached_checks(doc, ignored, cache)
+
+    if not errs or mode == "check":
+        return FileResult(rel, errs, None, None)
+
+    fixed_lines = run_fixes(doc, ignored, _memo_for(cache))
+    if mode == "diff":
+        diff = difflib.unified_diff(lines, fixed_lines, fromfile=rel, tofile=rel)
+        return FileResult(rel, errs, None, "".join(diff))
+
+    with open(fpath, "w") as f:
+        f.writelines(fixed_lines)
+
+    with open(fpath) as f:
+        recheck_lines = f.readlines()
+    return FileResult(rel, errs, _run_cached_checks(recheck_lines, ignored, cache), None)
+
+
+def _available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _resolve_jobs(jobs, file_count):
+    if jobs == "auto":
+        if file_count < MIN_FILES_FOR_PARALLEL:
+            return 1
+        jobs = _available_cpus()
+    return max(1, min(jobs, file_count))
+
+
+def _iter_results(files, contents, mode, ignored, jobs, cache=None, stats=False, profile=False):
+    jobs = _resolve_jobs(jobs, len(files))
+    if jobs == 1:
+        for fpath, lines in zip(files, contents):
+            yield _process_file(fpath, lines, mode, ignored, cache, stats, profile)
+        return
+
+    chunksize = max(1, len(files) // (jobs * POOL_CHUNKS_PER_JOB))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(
+            _process_file,
+            files,
+            contents,
+            repeat(mode),
+            repeat(ignored),
+            repeat(cache),
+            repeat(stats),
+            repeat(profile),
+            chunksize=chunksize,
+        )
+
+
+def _parse_jobs(value):
+    if value == "auto":
+        return value
+    if value.isdigit() and int(value) > 0:
+        return int(value)
+    print(f"error: invalid --jobs value: '{value}' (expected a positive integer or 'auto')")
+    sys.exit(1)
+
+
+def _parse_format(value):
+    if value in FORMATS:
+        return value
+    print(f"error: invalid --format value: '{value}' (expected {', '.join(FORMATS)})")
+    sys.exit(1)
+
+
 def main():
+    if sys.argv[1:2] == ["daemon"]:
+        from docalign.daemon import main as daemon_main
+
+        daemon_main(sys.argv[2:])
+        return
+
+    if sys.argv[1:2] == ["bench"]:
+        from docalign.bench import main as bench_main
+
+        bench_main(sys.argv[2:])
+        return
+
+    if sys.argv[1:2] == ["lsp"]:
+        from docalign.lsp import main as lsp_main
+
+        lsp_main(sys.argv[2:])
+        return
+
     if "--help" in sys.argv or "-h" in sys.argv:
         print_help()
         sys.exit(0)
@@ -176,10 +486,19 @@ def main():
         sys.exit(0)
 
     fix_mode = "--fix" in sys.argv
+    staged = "--staged" in sys.argv
     diff_mode = "--diff" in sys.argv
     verbose = "--verbose" in sys.argv
+    watch_mode = "--watch" in sys.argv
+    use_cache = "--no-cache" not in sys.argv
+    show_stats = "--stats" in sys.argv
+    mode = "diff" if diff_mode else "fix" if fix_mode else "check"
 
     ignored = set()
+    jobs = "auto"
+    changed_since = None
+    profile_out = None
+    fmt = "text"
     argv = sys.argv[1:]
     positional = []
     i = 0
@@ -194,63 +513,120 @@ def main():
             ignored.update(names)
             i += 2
             continue
+        if argv[i] == "--jobs" and i + 1 < len(argv):
+            jobs = _parse_jobs(argv[i + 1])
+            i += 2
+            continue
+        if argv[i] == "--format" and i + 1 < len(argv):
+            fmt = _parse_format(argv[i + 1])
+            i += 2
+            continue
+        if argv[i] == "--profile-out" and i + 1 < len(argv):
+            profile_out = argv[i + 1]
+            i += 2
+            continue
+        if argv[i] == "--changed-since" and i + 1 < len(argv):
+            changed_since = argv[i + 1]
+            i += 2
+            continue
         if not argv[i].startswith("-"):
             positional.append(argv[i])
         i += 1
     args = positional
 
-    if len(args) == 0:
-        print_help()
-        sys.exit(0)
+    if staged and (fix_mode or changed_since is not None):
+        print("error: --staged cannot be combined with --fix or --changed-since")
+        sys.exit(1)
+
+    if watch_mode and (fix_mode or diff_mode or staged or changed_since is not None):
+        print("error: --watch only supports check mode (no --fix, --diff, --staged or --changed-since)")
+        sys.exit(1)
+
+    if fmt != "text" and (diff_mode or watch_mode):
+        print(f"error: --format {fmt} cannot be combined with --diff or --watch")
+        sys.exit(1)
+
+    if staged or changed_since is not None:
+        try:
+            candidates = staged_files() if staged else changed_files(changed_since)
+            files = sorted(_select_changed(candidates, args or ["."]))
+            staged_contents = read_staged({f: candidates[f] for f in files}) if staged else {}
+        except GitError as e:
+            print(f"error: {e}")
+            sys.exit(1)
+        contents = [staged_contents[f] for f in files] if staged else [None] * len(files)
+    else:
+        if len(args) == 0:
+            print_help()
+            sys.exit(0)
 
-    files = []
-    for a in args:
-        files.extend(_collect_files(a))
+        files = []
+        for a in args:
+            files.extend(_collect_files(a))
+        files = sorted(files)
+        contents = [None] * len(files)
 
-    total_errors = 0
-    total_fixed = 0
-    has_diff = False
+    if watch_mode:
+        from docalign import watch
 
-    for fpath in sorted(files):
-        with open(fpath) as f:
-            lines = f.readlines()
+        polling = bool(os.environ.get("DOCALIGN_WATCH_POLL"))
+        watch.run(args, files, ignored, _select_changed, lambda e: _fmt(e, verbose), polling)
+        return
 
-        rel = os.path.relpath(fpath)
-        errs = run_checks(lines, ignored)
+    cache = ResultCache(CACHE_DIR, pkg_version("docalign"), ignored) if use_cache else None
+    reporter = make_reporter(fmt, sys.stdout, pkg_version("docalign"))
 
-        if not errs:
+    total_errors = 0
+    total_fixed = 0
+    has_diff = False
+    stats = Stats() if show_stats else None
+    profile = None
+
+    for res in _iter_results(files, contents, mode, ignored, jobs, cache, show_stats, profile_out is not None):
+        if res.stats is not None:
+            stats.merge(res.stats)
+        if res.profile is not None:
+            profile = merge_profile(profile, res.profile)
+        if not res.errors:
             continue
 
-        if diff_mode:
-            fixed_lines = run_fixes(lines, ignored)
-            diff = difflib.unified_diff(lines, fixed_lines, fromfile=rel, tofile=rel)
-            diff_text = "".join(diff)
-            if diff_text:
-                print(diff_text, end="" if diff_text.endswith("\n") else "\n")
+        if reporter is not None:
+            remaining = res.remaining if fix_mode else res.errors
+            reporter.report(res.rel, remaining)
+            total_errors += len(remaining)
+        elif diff_mode:
+            if res.diff_text:
+                print(res.diff_text, end="" if res.diff_text.endswith("\n") else "\n")
                 has_diff = True
         elif fix_mode:
-            fixed_lines = run_fixes(lines, ignored)
-            with open(fpath, "w") as f:
-                f.writelines(fixed_lines)
-
-            with open(fpath) as f:
-                recheck_lines = f.readlines()
-            remaining = run_checks(recheck_lines, ignored)
-
-            fixed_count = len(errs) - len(remaining)
+            fixed_count = len(res.errors) - len(res.remaining)
             if fixed_count > 0:
-                print(f"{rel}: fixed {fixed_count} issue(s)")
+                print(f"{res.rel}: fixed {fixed_count} issue(s)")
                 total_fixed += fixed_count
-            if remaining:
-                print(f"\n{rel}: {len(remaining)} unfixable issue(s):")
-                for e in remaining:
+            if res.remaining:
+                print(f"\n{res.rel}: {len(res.remaining)} unfixable issue(s):")
+                for e in res.remaining:
                     print(f"  {_fmt(e, verbose)}")
-                total_errors += len(remaining)
+                total_errors += len(res.remaining)
         else:
-            print(f"\n{rel}:")
-            for e in errs:
+            print(f"\n{res.rel}:")
+            for e in res.errors:
                 print(f"  {_fmt(e, verbose)}")
-            total_errors += len(errs)
+            total_errors += len(res.errors)
+
+    if cache is not None:
+        cache.evict(CACHE_MAX_BYTES)
+
+    if stats is not None:
+        stats.report(sys.stderr)
+    if profile_out is not None:
+        if profile is not None:
+            profile.dump_stats(profile_out)
+        print(f"profile written to {profile_out}", file=sys.stderr)
+
+    if reporter is not None:
+        reporter.close()
+        sys.exit(1 if total_errors else 0)
 
     if diff_mode:
         if has_diff:
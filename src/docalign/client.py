@@ -0,0 +1,88 @@
+import json
+import os
+import socket
+import stat
+import sys
+
+from docalign.constants import DAEMON_CONNECT_TIMEOUT, DAEMON_RESPONSE_TIMEOUT
+
+_LOCAL_COMMANDS = {"bench", "daemon", "lsp"}
+
+
+def socket_path():
+    path = os.environ.get("DOCALIGN_SOCKET")
+    if path:
+        return path
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    return os.path.join(base, f"docalign-{os.getuid()}.sock")
+
+
+def _owned_socket(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def _response_timeout():
+    try:
+        return float(os.environ.get("DOCALIGN_DAEMON_TIMEOUT", DAEMON_RESPONSE_TIMEOUT))
+    except ValueError:
+        return DAEMON_RESPONSE_TIMEOUT
+
+
+def send(payload, path=None, timeout=None):
+    path = path or socket_path()
+    if not hasattr(socket, "AF_UNIX") or not _owned_socket(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(DAEMON_CONNECT_TIMEOUT)
+        sock.connect(path)
+        sock.settimeout(timeout or _response_timeout())
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except socket.timeout:
+        print("warning: docalign daemon did not answer in time, running in-process", file=sys.stderr)
+        return None
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    try:
+        return json.loads(b"".join(chunks))
+    except ValueError:
+        return None
+
+
+def request(argv):
+    return send({"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)})
+
+
+def _run_local():
+    from docalign.cli import main as cli_main
+
+    cli_main()
+
+
+def main():
+    argv = sys.argv[1:]
+    local = (argv and argv[0] in _LOCAL_COMMANDS) or "--watch" in argv
+    if os.environ.get("DOCALIGN_NO_DAEMON") or local:
+        return _run_local()
+
+    response = request(argv)
+    if response is None or "code" not in response:
+        return _run_local()
+
+    sys.stdout.write(response["stdout"])
+    sys.stdout.flush()
+    if response.get("stderr"):
+        sys.stderr.write(response["stderr"])
+    sys.exit(response["code"])
@@ -3,6 +3,7 @@ BOX_CHARS_WITH_DASH = set("│┌└├┐┘┤┬┴┼─")
 BOX_CLOSERS = {"┐", "┘", "┤"}
 BOX_OPENERS = {"┌", "└", "├"}
 BOX_CORNERS = set("┌┐└┘")
+COLUMN_INDEX_CHARS = "└┘│"
 BORDER_CHARS = {"─", "┌", "└", "┐", "┘", "┬", "┴", "├", "┤", "┼"}
 PIPE_CHARS = {"│", "┼", "┬", "┴", "├", "┤"}
 ARROW_CHARS = {"v", "^"}
@@ -33,5 +34,22 @@ OUTER_COL_THRESHOLD = 0.8
 FIX_ITERATIONS = 3
 MAX_FIX_ITERATIONS = 10
 MAX_KEY_WORDS = 4
+MIN_FILES_FOR_PARALLEL = 16
+POOL_CHUNKS_PER_JOB = 4
+CACHE_FORMAT = 3
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+BLOCK_MEMO_SIZE = 4096
+DAEMON_CONNECT_TIMEOUT = 0.05
+DAEMON_RESPONSE_TIMEOUT = 30.0
+DAEMON_READ_TIMEOUT = 1.0
+WATCH_DEBOUNCE = 0.1
+WATCH_POLL_INTERVAL = 0.5
+STATS_SLOWEST_FILES = 10
+BENCH_REGRESSION_THRESHOLD = 0.10
+VECTORIZED_MIN_CELLS = 4096
+WIDTH_CACHE_SIZE = 8192
+BENCH_DEFAULTS = {"files": 20, "blocks": 10, "depth": 3, "table_rows": 20, "drift": 0.1, "seed": 0, "repeat": 3}
 
 LARGE_SPACE_GAP = "    "
+CACHE_DIR = ".docalign_cache"
+CACHE_SIZE_FILE = "size"
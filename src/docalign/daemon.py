@@ -0,0 +1,162 @@
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import traceback
+
+from docalign import cli
+from docalign.client import send, socket_path
+from docalign.constants import DAEMON_READ_TIMEOUT
+
+
+def _source_stamp():
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    stamp = []
+    for root, _, filenames in os.walk(package_dir):
+        for fn in sorted(filenames):
+            if fn.endswith(".py"):
+                path = os.path.join(root, fn)
+                stamp.append((path, os.stat(path).st_mtime_ns))
+    return tuple(stamp)
+
+
+def _exit_code(exc):
+    if exc.code is None:
+        return 0
+    return exc.code if isinstance(exc.code, int) else 1
+
+
+def run_cli(argv, cwd, env):
+    out = io.StringIO()
+    err = io.StringIO()
+    code = 0
+    os.environ.clear()
+    os.environ.update(env)
+    os.chdir(cwd)
+    sys.argv = ["docalign", *argv]
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        try:
+            cli.main()
+        except SystemExit as e:
+            code = _exit_code(e)
+        except Exception:
+            traceback.print_exc()
+            code = 1
+    return out.getvalue(), err.getvalue(), code
+
+
+def _read_request(conn):
+    conn.settimeout(DAEMON_READ_TIMEOUT)
+    data = b""
+    try:
+        while not data.endswith(b"\n"):
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        return json.loads(data)
+    except (OSError, ValueError):
+        return None
+
+
+def _respond(conn, payload):
+    with contextlib.suppress(OSError):
+        conn.sendall(json.dumps(payload).encode())
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        payload = self.server.payload
+        self.request.settimeout(None)
+        stdout, stderr, code = run_cli(payload.get("argv", []), payload.get("cwd", "."), payload.get("env", {}))
+        _respond(self.request, {"stdout": stdout, "stderr": stderr, "code": code})
+
+
+class _Server(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    timeout = 1.0
+
+    def __init__(self, path):
+        prev_umask = os.umask(0o177)
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(prev_umask)
+        self.stopping = False
+        self.served = 0
+        self.payload = None
+        self.stamp = _source_stamp()
+
+    def process_request(self, request, client_address):
+        payload = _read_request(request)
+        command = payload.get("command") if isinstance(payload, dict) else None
+        if payload is None or not isinstance(payload, dict):
+            pass
+        elif command == "stop":
+            self.stopping = True
+            _respond(request, {"stopped": True})
+        elif command == "status":
+            _respond(request, {"pid": os.getpid(), "served": self.served})
+        elif _source_stamp() != self.stamp:
+            self.stopping = True
+            _respond(request, {"stale": True})
+        else:
+            self.payload = payload
+            self.served += 1
+            return super().process_request(request, client_address)
+        self.shutdown_request(request)
+
+    def serve_until_stopped(self):
+        while not self.stopping:
+            self.handle_request()
+            self.collect_children()
+
+
+def serve(path=None):
+    path = path or socket_path()
+    if send({"command": "status"}, path) is not None:
+        print(f"error: a docalign daemon is already running on {path}")
+        sys.exit(1)
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+    try:
+        server = _Server(path)
+    except OSError as e:
+        print(f"error: cannot listen on {path}: {e.strerror}")
+        sys.exit(1)
+    print(f"docalign daemon listening on {path}", flush=True)
+    try:
+        server.serve_until_stopped()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+
+def main(argv):
+    if not hasattr(socket, "AF_UNIX") or not hasattr(os, "fork"):
+        print("error: docalign daemon requires Unix sockets and fork()")
+        sys.exit(1)
+    action = argv[0] if argv else "start"
+    path = socket_path()
+    if action == "start":
+        serve(path)
+    elif action == "stop":
+        if send({"command": "stop"}, path) is None:
+            print("no docalign daemon running")
+            sys.exit(1)
+        print("docalign daemon stopped")
+    elif action == "status":
+        status = send({"command": "status"}, path)
+        if status is None:
+            print("no docalign daemon running")
+            sys.exit(1)
+        print(f"docalign daemon running on {path} (pid {status['pid']}, {status['served']} request(s) served)")
+    else:
+        print(f"error: unknown daemon action: '{action}' (expected start, stop or status)")
+        sys.exit(1)
@@ -0,0 +1,72 @@
+def _box_ref(d):
+    return f" (box ┌ at L{d.ref[0]} col {d.ref[1]})" if d.ref else ""
+
+
+_FORMATS = {
+    "table-width": lambda d: f"table col{d.detail}: width={d.actual} expected={d.expected} (separator at L{d.ref[0]})",
+    "table-space-after": lambda d: f"table col{d.detail}: missing space after |",
+    "table-space-before": lambda d: f"table col{d.detail}: missing space before |",
+    "box-width": lambda d: f"width={d.actual}, expected={d.expected} (box group at cols {d.detail[0]}-{d.detail[1]})",
+    "box-padding": lambda d: f"box padding={d.actual}, expected={d.expected}",
+    "box-right-spacing": lambda d: f"box right spacing={d.actual}, minimum={d.expected}",
+    "box-left-spacing": lambda d: f"box left spacing={d.actual}, minimum={d.expected}",
+    "arrow-gap": lambda d: f"arrow '{d.detail}' at col {d.col}, gap={d.actual} to box wall",
+    "box-corner": lambda d: f"box {d.detail} at col {d.col}, expected col {d.expected}{_box_ref(d)}",
+    "box-wall": lambda d: f"box wall │ at col {d.col}, expected col {d.expected}{_box_ref(d)}",
+    "rail": lambda d: f"box char at col {d.col}, expected col {d.expected}",
+    "arrow-align": lambda d: f"arrow '{d.detail}' at col {d.col}, expected col {d.expected}",
+    "arrow-embedded": lambda d: f"arrow '{d.detail}' embedded in border at col {d.col}",
+    "pipe": lambda d: f"pipe '│' at col {d.col}, expected col {d.expected}",
+    "list-desc": lambda d: f"list desc separator: col={d.col} expected={d.expected}",
+    "def-list": lambda d: f"def list key: col={d.col} expected={d.expected}",
+    "wide-char": lambda d: f"wide char '{d.detail}' (U+{ord(d.detail):04X}) at col {d.col}",
+}
+
+CODES = tuple(_FORMATS)
+
+
+def _tuple(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+class Diagnostic:
+    __slots__ = ("code", "line", "col", "expected", "actual", "detail", "ref")
+
+    def __init__(self, code, line, col=None, expected=None, actual=None, detail=None, ref=None):
+        self.code = code
+        self.line = line
+        self.col = col
+        self.expected = expected
+        self.actual = actual
+        self.detail = detail
+        self.ref = ref
+
+    @property
+    def message(self):
+        return _FORMATS[self.code](self)
+
+    def __str__(self):
+        return f"L{self.line} {self.message}"
+
+    def __repr__(self):
+        return f"Diagnostic({str(self)!r})"
+
+    def as_tuple(self):
+        return (self.code, self.line, self.col, self.expected, self.actual, self.detail, self.ref)
+
+    @classmethod
+    def from_tuple(cls, values):
+        code, line, col, expected, actual, detail, ref = values
+        return cls(code, line, col, expected, actual, _tuple(detail), _tuple(ref))
+
+    def __eq__(self, other):
+        if not isinstance(other, Diagnostic):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    def __hash__(self):
+        return hash(self.as_tuple())
+
+    def shifted(self, delta):
+        ref = None if self.ref is None else (self.ref[0] + delta, *self.ref[1:])
+        return Diagnostic(self.code, self.line + delta, self.col, self.expected, self.actual, self.detail, ref)
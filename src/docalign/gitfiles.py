@@ -0,0 +1,77 @@
+import io
+import os
+import subprocess
+
+
+class GitError(Exception):
+    pass
+
+
+def _git(args, stdin=None):
+    try:
+        proc = subprocess.run(["git", *args], input=stdin, capture_output=True, check=False)
+    except OSError as e:
+        raise GitError(f"could not run git: {e}") from e
+    if proc.returncode != 0:
+        message = proc.stderr.decode(errors="replace").strip() or f"git {args[0]} failed"
+        raise GitError(message)
+    return proc.stdout
+
+
+def _split_z(output):
+    return [p.decode() for p in output.split(b"\0") if p]
+
+
+def repo_root():
+    return _git(["rev-parse", "--show-toplevel"]).decode().strip()
+
+
+def _md_paths(root, names):
+    paths = (os.path.join(root, n) for n in names if n.endswith(".md"))
+    return sorted(p for p in set(paths) if os.path.isfile(p))
+
+
+def changed_files(rev):
+    root = repo_root()
+    try:
+        _git(["rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}"])
+    except GitError:
+        raise GitError(f"unknown revision '{rev}'") from None
+    names = _split_z(_git(["-C", root, "diff", "--name-only", "-z", "--diff-filter=d", rev, "--"]))
+    names += _split_z(_git(["-C", root, "ls-files", "--others", "--exclude-standard", "-z"]))
+    return _md_paths(root, names)
+
+
+def staged_files():
+    root = repo_root()
+    raw = _git(["-C", root, "diff", "--cached", "--raw", "-z", "--no-abbrev", "--no-renames", "--diff-filter=d"])
+    fields = _split_z(raw)
+    blob_ids = {}
+    for meta, name in zip(fields[::2], fields[1::2]):
+        if not name.endswith(".md"):
+            continue
+        _, _, _, sha, status = meta.split()
+        blob_ids[os.path.join(root, name)] = None if status == "U" else sha
+    return dict(sorted(blob_ids.items()))
+
+
+def read_staged(blob_ids):
+    if not blob_ids:
+        return {}
+    root = repo_root()
+    unmerged = [p for p, sha in blob_ids.items() if sha is None]
+    if unmerged:
+        raise GitError(f"unmerged path '{os.path.relpath(unmerged[0])}' has no staged content to check")
+
+    contents = {p: [] for p, sha in blob_ids.items() if not sha.strip("0")}
+    order = [p for p in blob_ids if p not in contents]
+    batch = _git(["-C", root, "cat-file", "--batch"], stdin="".join(blob_ids[p] + "\n" for p in order).encode())
+
+    pos = 0
+    for path in order:
+        header_end = batch.index(b"\n", pos)
+        size = int(batch[pos:header_end].split()[2])
+        blob = batch[header_end + 1 : header_end + 1 + size]
+        contents[path] = io.StringIO(blob.decode(), newline=None).readlines()
+        pos = header_end + 1 + size + 1
+    return contents
@@ -1,5 +1,7 @@
 import re
 
+from docalign.diagnostics import Diagnostic
+
 _PATTERNS = [
     (
         re.compile(r"table col\d+: width=(\d+) expected=(\d+)"),
@@ -74,7 +76,37 @@ def _shift_hint(name, actual, expected):
     return f"shift {name} {delta} column(s) {direction}"
 
 
+def _delta(d):
+    return abs(d.expected - d.actual)
+
+
+def _gap(d):
+    return d.expected - d.actual
+
+
+_HINTS = {
+    "table-width": lambda d: f"pad cell {_delta(d)} char(s) to match separator width",
+    "box-width": lambda d: f"extend/shrink line by {_delta(d)} char(s) to match box group",
+    "box-padding": lambda d: f"adjust left-padding to {d.expected} space(s)",
+    "box-right-spacing": lambda d: f"add {_gap(d)} space(s) before box wall",
+    "box-left-spacing": lambda d: f"add {_gap(d)} space(s) after box wall",
+    "arrow-gap": lambda d: f"extend arrow dashes {d.actual} char(s) to reach wall",
+    "box-corner": lambda d: _shift_hint(d.detail, d.col, d.expected),
+    "box-wall": lambda d: _shift_hint("wall", d.col, d.expected),
+    "rail": lambda d: _shift_hint("box char", d.col, d.expected),
+    "arrow-align": lambda d: _shift_hint("arrow", d.col, d.expected),
+    "arrow-embedded": lambda _: "extract arrow to its own line, then complete the border",
+    "pipe": lambda d: _shift_hint("pipe", d.col, d.expected),
+    "list-desc": lambda d: f"add {d.expected - d.col} space(s) before separator dash",
+    "def-list": lambda d: f"add {d.expected - d.col} space(s) before colon",
+    "wide-char": lambda _: "replace with ASCII equivalent or standard box-drawing char",
+}
+
+
 def get_hint(error):
+    if isinstance(error, Diagnostic):
+        hint_fn = _HINTS.get(error.code)
+        return hint_fn(error) if hint_fn else ""
     for pattern, hint_fn in _PATTERNS:
         m = pattern.search(error)
         if m:
@@ -0,0 +1,59 @@
+from docalign.cli import BLOCK_MODULES, CHECK_MODULES
+from docalign.parser import CodeBlock, Document
+
+PROSE_MODULES = {name: mod for name, mod in CHECK_MODULES.items() if name not in BLOCK_MODULES}
+
+
+def _segments(doc):
+    segments = [("prose", start, end) for start, end in doc.prose_ranges]
+    segments += [("code", block.start + 1, block.end) for block in doc.code_blocks]
+    if len(doc.fences) % 2:
+        segments.append(("tail", doc.fences[-1] + 1, len(doc.raw)))
+    return sorted(segments, key=lambda s: s[1])
+
+
+class IncrementalChecker:
+    def __init__(self, ignored=None):
+        self.ignored = ignored or set()
+        self.rechecked = 0
+        self._doc = None
+        self._results = {}
+
+    def check(self, lines):
+        doc = Document(lines) if self._doc is None else self._doc.updated(lines)
+        self._doc = doc
+        self.rechecked = 0
+        results = {}
+        placed = []
+        for kind, start, end in _segments(doc):
+            key = (kind, tuple(doc.raw[start:end]))
+            found = results.get(key) or self._results.get(key)
+            if found is None:
+                found = self._check_segment(kind, doc.lines[start:end])
+                self.rechecked += 1
+            results[key] = found
+            placed.append((start, found))
+        self._results = results
+
+        errors = []
+        for name in CHECK_MODULES:
+            if name in self.ignored:
+                continue
+            for start, found in placed:
+                errors.extend((name, e.shifted(start)) for e in found.get(name, ()))
+        return errors
+
+    def _check_segment(self, kind, lines):
+        found = {}
+        if "tables" not in self.ignored:
+            found["tables"] = PROSE_MODULES["tables"].check(lines)
+        if kind == "prose":
+            for name, mod in PROSE_MODULES.items():
+                if name != "tables" and name not in self.ignored:
+                    found[name] = mod.check(lines)
+        elif kind == "code":
+            block = CodeBlock(-1, len(lines), [(i, line.rstrip("\n")) for i, line in enumerate(lines)])
+            for name, mod in BLOCK_MODULES.items():
+                if name not in self.ignored:
+                    found[name] = mod.check_block(block)
+        return found
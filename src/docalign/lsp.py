@@ -0,0 +1,246 @@
+import json
+import re
+import sys
+
+from docalign.cli import CHECK_MODULES, run_fixes
+from docalign.hints import get_hint
+from docalign.incremental import IncrementalChecker
+
+_LINE = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+\Z")
+
+_SEVERITY_WARNING = 2
+_METHOD_NOT_FOUND = -32601
+_INVALID_REQUEST = -32600
+_FIX_ALL_KIND = "source.fixAll.docalign"
+
+
+def split_lines(text):
+    return [line.rstrip("\r\n") + "\n" if line[-1] in "\r\n" else line for line in _LINE.findall(text)]
+
+
+def _content(line):
+    return line[:-1] if line.endswith("\n") else line
+
+
+def _to_index(line, character, encoding):
+    content = _content(line)
+    if encoding == "utf-32" or content.isascii():
+        return min(character, len(content))
+    units = 0
+    for idx, ch in enumerate(content):
+        if units >= character:
+            return idx
+        units += 2 if ord(ch) > 0xFFFF else 1
+    return len(content)
+
+
+def _to_units(text, encoding):
+    if encoding == "utf-32" or text.isascii():
+        return len(text)
+    return len(text) + sum(1 for ch in text if ord(ch) > 0xFFFF)
+
+
+def apply_change(lines, change, encoding="utf-16"):
+    if "range" not in change:
+        return split_lines(change["text"])
+    start, end = change["range"]["start"], change["range"]["end"]
+    sl, el = start["line"], end["line"]
+    head = lines[sl] if sl < len(lines) else ""
+    tail = lines[el] if el < len(lines) else ""
+    text = head[: _to_index(head, start["character"], encoding)] + change["text"]
+    text += tail[_to_index(tail, end["character"], encoding) :]
+    return lines[:sl] + split_lines(text) + lines[el + 1 :]
+
+
+def _end_position(lines, encoding):
+    if not lines:
+        return {"line": 0, "character": 0}
+    if lines[-1].endswith("\n"):
+        return {"line": len(lines), "character": 0}
+    return {"line": len(lines) - 1, "character": _to_units(lines[-1], encoding)}
+
+
+def text_edits(old, new, eol="\n", encoding="utf-16"):
+    if old == new:
+        return []
+    prefix = 0
+    while prefix < min(len(old), len(new)) and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < min(len(old), len(new)) - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    end_line = len(old) - suffix
+    end = {"line": end_line, "character": 0} if end_line < len(old) else _end_position(old, encoding)
+    text = "".join(new[prefix : len(new) - suffix])
+    return [{"range": {"start": {"line": prefix, "character": 0}, "end": end}, "newText": text.replace("\n", eol)}]
+
+
+class _Document:
+    def __init__(self, text, version, ignored):
+        self.lines = split_lines(text)
+        self.version = version
+        self.eol = "\r\n" if "\r\n" in text else "\n"
+        self.checker = IncrementalChecker(ignored)
+        self.errors = []
+
+
+class LanguageServer:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.documents = {}
+        self.ignored = set()
+        self.encoding = "utf-16"
+        self.shutdown_requested = False
+
+    def read_message(self):
+        length = None
+        while True:
+            header = self.reader.readline()
+            if not header:
+                return None
+            header = header.strip()
+            if not header:
+                break
+            name, _, value = header.decode("ascii").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        if length is None:
+            return None
+        return json.loads(self.reader.read(length))
+
+    def send(self, message):
+        body = json.dumps({"jsonrpc": "2.0", **message}, ensure_ascii=False).encode()
+        self.writer.write(f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        self.writer.flush()
+
+    def notify(self, method, params):
+        self.send({"method": method, "params": params})
+
+    def serve(self):
+        while True:
+            message = self.read_message()
+            if message is None:
+                return 1
+            method = message.get("method")
+            if method == "exit":
+                return 0 if self.shutdown_requested else 1
+            self.dispatch(message)
+
+    def dispatch(self, message):
+        method = message.get("method")
+        handler = getattr(self, "_on_" + (method or "").replace("/", "_").replace("$", "_"), None)
+        if "id" not in message:
+            if handler is not None:
+                handler(message.get("params") or {})
+            return
+        if self.shutdown_requested:
+            self.send({"id": message["id"], "error": {"code": _INVALID_REQUEST, "message": "server is shut down"}})
+        elif handler is None:
+            self.send(
+                {"id": message["id"], "error": {"code": _METHOD_NOT_FOUND, "message": f"unknown method {method}"}}
+            )
+        else:
+            self.send({"id": message["id"], "result": handler(message.get("params") or {})})
+
+    def _on_initialize(self, params):
+        options = params.get("initializationOptions") or {}
+        self.ignored = set(options.get("ignore", []))
+        offered = params.get("capabilities", {}).get("general", {}).get("positionEncodings", [])
+        self.encoding = "utf-32" if "utf-32" in offered else "utf-16"
+        return {
+            "capabilities": {
+                "positionEncoding": self.encoding,
+                "textDocumentSync": {"openClose": True, "change": 2},
+                "codeActionProvider": {"codeActionKinds": ["quickfix", _FIX_ALL_KIND]},
+            },
+            "serverInfo": {"name": "docalign"},
+        }
+
+    def _on_shutdown(self, params):
+        self.shutdown_requested = True
+        return None
+
+    def _on_textDocument_didOpen(self, params):
+        item = params["textDocument"]
+        self.documents[item["uri"]] = _Document(item["text"], item.get("version"), self.ignored)
+        self.publish(item["uri"])
+
+    def _on_textDocument_didChange(self, params):
+        uri = params["textDocument"]["uri"]
+        doc = self.documents.get(uri)
+        if doc is None:
+            return
+        for change in params["contentChanges"]:
+            doc.lines = apply_change(doc.lines, change, self.encoding)
+        doc.version = params["textDocument"].get("version")
+        self.publish(uri)
+
+    def _on_textDocument_didClose(self, params):
+        uri = params["textDocument"]["uri"]
+        self.documents.pop(uri, None)
+        self.notify("textDocument/publishDiagnostics", {"uri": uri, "diagnostics": []})
+
+    def publish(self, uri):
+        doc = self.documents[uri]
+        doc.errors = doc.checker.check(doc.lines)
+        diagnostics = [self._diagnostic(doc, name, error) for name, error in doc.errors]
+        self.notify("textDocument/publishDiagnostics", {"uri": uri, "version": doc.version, "diagnostics": diagnostics})
+
+    def _diagnostic(self, doc, name, error):
+        line = error.line - 1
+        content = _content(doc.lines[line])
+        if error.col is not None and error.col < len(content):
+            start = _to_units(content[: error.col], self.encoding)
+            end = start + _to_units(content[error.col], self.encoding)
+        else:
+            start, end = 0, _to_units(content, self.encoding)
+        hint = get_hint(error)
+        return {
+            "range": {"start": {"line": line, "character": start}, "end": {"line": line, "character": end}},
+            "severity": _SEVERITY_WARNING,
+            "source": "docalign",
+            "code": name,
+            "message": f"{error.message} → {hint}" if hint else error.message,
+            "data": {"diagnostic": error.code},
+        }
+
+    def _on_textDocument_codeAction(self, params):
+        uri = params["textDocument"]["uri"]
+        doc = self.documents.get(uri)
+        if doc is None or not doc.errors:
+            return []
+        only = (params.get("context") or {}).get("only")
+        actions = []
+        if not only or "quickfix" in only:
+            by_check = {}
+            for diag in (params.get("context") or {}).get("diagnostics", []):
+                if diag.get("source") == "docalign" and diag.get("code") in CHECK_MODULES:
+                    by_check.setdefault(diag["code"], []).append(diag)
+            for name, diags in by_check.items():
+                edits = self._edits(doc, CHECK_MODULES[name].fix(list(doc.lines)))
+                if edits:
+                    actions.append(self._action(f"Fix {name} alignment", "quickfix", uri, edits, diags))
+        if not only or any(_FIX_ALL_KIND.startswith(kind) for kind in only):
+            edits = self._edits(doc, run_fixes(doc.lines, self.ignored))
+            if edits:
+                actions.append(self._action("Fix all docalign issues", _FIX_ALL_KIND, uri, edits))
+        return actions
+
+    def _edits(self, doc, fixed):
+        return text_edits(doc.lines, fixed, doc.eol, self.encoding)
+
+    def _action(self, title, kind, uri, edits, diagnostics=None):
+        action = {"title": title, "kind": kind, "edit": {"changes": {uri: edits}}}
+        if diagnostics:
+            action["diagnostics"] = diagnostics
+            action["isPreferred"] = True
+        return action
+
+
+def main(argv):
+    if argv and argv[0] not in ("--stdio",):
+        print(f"error: unknown lsp option: '{argv[0]}' (only --stdio is supported)")
+        sys.exit(1)
+    server = LanguageServer(sys.stdin.buffer, sys.stdout.buffer)
+    sys.exit(server.serve())
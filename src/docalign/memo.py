@@ -0,0 +1,41 @@
+import hashlib
+from collections import OrderedDict
+
+from docalign.constants import BLOCK_MEMO_SIZE
+
+
+class BlockMemo:
+    def __init__(self, store=None, maxsize=BLOCK_MEMO_SIZE):
+        self.store = store
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._salt = store.salt if store is not None else ""
+
+    def key(self, kind, ignored, lines):
+        digest = hashlib.sha256(f"{self._salt}{kind}\0{','.join(sorted(ignored))}\0".encode())
+        for line in lines:
+            digest.update(line.encode("utf-8", "surrogatepass"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            return value
+        if self.store is not None:
+            value = self.store.get(key)
+            if value is not None:
+                self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.store is not None:
+            self.store.put(key, value)
+
+    def _remember(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
@@ -1,34 +1,165 @@
+from docalign import vectorized
 from docalign.constants import BOX_CHARS
+from docalign.utils import ColumnIndex, Grid, _is_tree_block
+
+
+def _is_fence(raw):
+    return raw.lstrip().startswith("```")
+
+
+def box_positions(raw):
+    return tuple(j for j, c in enumerate(raw) if c in BOX_CHARS)
+
+
+class CodeBlock:
+    __slots__ = (
+        "start",
+        "end",
+        "code_lines",
+        "indices",
+        "_is_tree",
+        "_groups",
+        "_positions",
+        "_columns",
+        "_grid",
+        "derived",
+    )
+
+    def __init__(self, start, end, code_lines):
+        self.start = start
+        self.end = end
+        self.code_lines = code_lines
+        self.indices = [i for i, _ in code_lines]
+        self._is_tree = None
+        self._groups = None
+        self._positions = None
+        self._columns = None
+        self._grid = None
+        # Per-module analyses of these lines (e.g. pipe traces), shared by the
+        # module's check_block and fix_block while the block is unchanged.
+        self.derived = {}
+
+    @classmethod
+    def from_lines(cls, start, end, all_lines):
+        return cls(start, end, [(i, all_lines[i].rstrip("\n")) for i in range(start + 1, end)])
+
+    @property
+    def is_tree(self):
+        if self._is_tree is None:
+            self._is_tree = _is_tree_block(self.code_lines)
+        return self._is_tree
+
+    @property
+    def groups(self):
+        if self._groups is None:
+            self._groups = group_box_lines(self.code_lines)
+        return self._groups
+
+    @property
+    def positions(self):
+        if self._positions is None:
+            if vectorized.enabled() and vectorized.large(self.grid):
+                self._positions = dict(zip(self.indices, vectorized.box_positions(self.grid)))
+            else:
+                self._positions = {i: box_positions(raw) for i, raw in self.code_lines}
+        return self._positions
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            self._columns = ColumnIndex([raw for _, raw in self.code_lines])
+        return self._columns
+
+    @property
+    def grid(self):
+        if self._grid is None:
+            self._grid = Grid([raw for _, raw in self.code_lines])
+        return self._grid
+
+
+class Document:
+    __slots__ = ("lines", "raw", "fences", "code_blocks", "in_code", "prose_ranges", "derived")
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.raw = [line.rstrip("\n") for line in lines]
+        # Per-module analyses of the whole document (e.g. the prose scan).
+        # Entries with an updated(doc, changed) method follow the document
+        # through updated(); the others are dropped.
+        self.derived = {}
+        self._parse()
+
+    def _parse(self):
+        raw = self.raw
+        self.fences = []
+        self.code_blocks = []
+        self.in_code = set()
+        self.prose_ranges = []
+        open_at = None
+        prose_start = 0
+        for i, line in enumerate(raw):
+            if not _is_fence(line):
+                continue
+            self.fences.append(i)
+            if open_at is None:
+                if prose_start < i:
+                    self.prose_ranges.append((prose_start, i))
+                open_at = i
+            else:
+                self.code_blocks.append(CodeBlock(open_at, i, [(k, raw[k]) for k in range(open_at + 1, i)]))
+                self.in_code.update(range(open_at + 1, i))
+                open_at = None
+                prose_start = i + 1
+        if open_at is not None:
+            self.in_code.update(range(open_at + 1, len(raw)))
+        elif prose_start < len(raw):
+            self.prose_ranges.append((prose_start, len(raw)))
+
+    def updated(self, lines):
+        if len(lines) != len(self.lines):
+            return Document(lines)
+        changed = [i for i, (old, new) in enumerate(zip(self.lines, lines)) if old is not new and old != new]
+        if not changed:
+            return self
+
+        raw = list(self.raw)
+        fences = set(self.fences)
+        for i in changed:
+            raw[i] = lines[i].rstrip("\n")
+            if _is_fence(raw[i]) != (i in fences):
+                return Document(lines)
+
+        doc = Document.__new__(Document)
+        doc.lines = lines
+        doc.raw = raw
+        doc.fences = self.fences
+        doc.in_code = self.in_code
+        doc.prose_ranges = self.prose_ranges
+        doc.derived = {
+            key: value.updated(doc, changed) for key, value in self.derived.items() if hasattr(value, "updated")
+        }
+        doc.code_blocks = []
+        pos = 0
+        for block in self.code_blocks:
+            while pos < len(changed) and changed[pos] < block.start:
+                pos += 1
+            if pos < len(changed) and changed[pos] < block.end:
+                block = CodeBlock(block.start, block.end, [(k, raw[k]) for k in block.indices])
+            doc.code_blocks.append(block)
+        return doc
+
+
+def as_document(lines):
+    return lines if isinstance(lines, Document) else Document(lines)
 
 
 def iter_code_blocks(lines):
-    in_code = False
-    code_indices = []
-    code_lines = []
-    for i, line in enumerate(lines):
-        raw = line.rstrip("\n")
-        if raw.strip().startswith("```"):
-            if in_code:
-                yield code_indices, code_lines
-                code_indices = []
-                code_lines = []
-            in_code = not in_code
-            continue
-        if in_code:
-            code_indices.append(i)
-            code_lines.append((i, raw))
+    for block in as_document(lines).code_blocks:
+        yield block.indices, block.code_lines
 
 
 def in_code_block(lines):
-    inside = set()
-    in_code = False
-    for i, line in enumerate(lines):
-        if line.rstrip("\n").strip().startswith("```"):
-            in_code = not in_code
-            continue
-        if in_code:
-            inside.add(i)
-    return inside
+    return as_document(lines).in_code
 
 
 def group_box_lines(code_lines):
@@ -0,0 +1,101 @@
+import re
+
+from docalign.constants import MAX_KEY_WORDS, MIN_GROUP_SIZE
+from docalign.parser import as_document
+
+_PREFIX = re.compile(r"^\s*- ")
+_URL_COLON = re.compile(r"https?:|ftp:|file:")
+_PLAIN = (False, None, None)
+
+
+def _find_colon_sep(text):
+    in_backtick = False
+    for i, c in enumerate(text):
+        if c == "`":
+            in_backtick = not in_backtick
+        elif c == ":" and not in_backtick and i + 1 < len(text) and text[i + 1] == " ":
+            return i
+    return -1
+
+
+def _parse_desc(raw, start):
+    after_prefix = raw[start:]
+    sep_idx = after_prefix.find(" - ")
+    if sep_idx < 0:
+        return None
+    return raw[: start + sep_idx], after_prefix[sep_idx + 1 :]
+
+
+def _parse_def(raw, start):
+    after_prefix = raw[start:]
+    colon_idx = _find_colon_sep(after_prefix)
+    if colon_idx < 0:
+        return None
+    if len(after_prefix[:colon_idx].split()) > MAX_KEY_WORDS:
+        return None
+    key_part = raw[: start + colon_idx + 1]
+    if _URL_COLON.search(key_part):
+        return None
+    return key_part, after_prefix[colon_idx + 2 :]
+
+
+def classify(raw):
+    # (list item?, "item - desc" split, "key: value" split) of a prose line.
+    m = _PREFIX.match(raw)
+    if not m:
+        return _PLAIN
+    return True, _parse_desc(raw, m.end()), _parse_def(raw, m.end())
+
+
+def _close(groups, current):
+    if len(current) >= MIN_GROUP_SIZE:
+        groups.append(current)
+    return []
+
+
+class ProseScan:
+    # Every prose line of a document classified once. list_descs and
+    # def_lists both take their groups from here; after a fix only the
+    # lines that changed are classified again.
+    def __init__(self, doc, kinds=None):
+        self.ranges = doc.prose_ranges
+        if kinds is None:
+            kinds = [None] * len(doc.raw)
+            for start, stop in doc.prose_ranges:
+                for i in range(start, stop):
+                    kinds[i] = classify(doc.raw[i])
+        self.kinds = kinds
+        self.desc_groups = []
+        self.def_groups = []
+        for start, stop in self.ranges:
+            descs, defs = [], []
+            for i in range(start, stop):
+                _, desc, definition = kinds[i]
+                if desc:
+                    descs.append((i, *desc))
+                else:
+                    descs = _close(self.desc_groups, descs)
+                if definition:
+                    defs.append((i, *definition))
+                else:
+                    defs = _close(self.def_groups, defs)
+            _close(self.desc_groups, descs)
+            _close(self.def_groups, defs)
+
+    def is_list_item(self, i):
+        return 0 <= i < len(self.kinds) and self.kinds[i] is not None and self.kinds[i][0]
+
+    def updated(self, doc, changed):
+        kinds = list(self.kinds)
+        for i in changed:
+            if kinds[i] is not None:
+                kinds[i] = classify(doc.raw[i])
+        return ProseScan(doc, kinds)
+
+
+def scan(lines):
+    doc = as_document(lines)
+    prose = doc.derived.get("prose")
+    if prose is None:
+        prose = doc.derived["prose"] = ProseScan(doc)
+    return prose
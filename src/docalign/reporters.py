@@ -0,0 +1,89 @@
+import json
+import os
+from urllib.parse import quote
+
+from docalign.diagnostics import CODES
+from docalign.hints import get_hint
+
+FORMATS = ("text", "jsonl", "sarif")
+
+_SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+_RULE_INDEX = {code: i for i, code in enumerate(CODES)}
+
+
+def _uri(rel):
+    return quote(rel.replace(os.sep, "/"))
+
+
+class JsonLinesReporter:
+    def __init__(self, out):
+        self.out = out
+
+    def report(self, rel, diagnostics):
+        for d in diagnostics:
+            record = {
+                "file": rel,
+                "line": d.line,
+                "col": d.col,
+                "code": d.code,
+                "message": d.message,
+                "expected": d.expected,
+                "actual": d.actual,
+                "hint": get_hint(d),
+            }
+            self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.out.flush()
+
+    def close(self):
+        pass
+
+
+class SarifReporter:
+    def __init__(self, out, version):
+        self.out = out
+        self.first = True
+        rules = [{"id": code, "name": code, "defaultConfiguration": {"level": "warning"}} for code in CODES]
+        driver = {"name": "docalign", "version": version, "rules": rules}
+        head = json.dumps(
+            {
+                "$schema": _SARIF_SCHEMA,
+                "version": "2.1.0",
+                "runs": [{"tool": {"driver": driver}, "columnKind": "unicodeCodePoints", "results": []}],
+            },
+            ensure_ascii=False,
+        )
+        # Results are streamed into the (empty) results array, so the head is
+        # written up to the opening bracket and the tail on close.
+        self.tail = head[head.rindex("[]") + 1 :]
+        self.out.write(head[: head.rindex("[]") + 1])
+
+    def report(self, rel, diagnostics):
+        for d in diagnostics:
+            region = {"startLine": d.line}
+            if d.col is not None:
+                region["startColumn"] = d.col + 1
+            result = {
+                "ruleId": d.code,
+                "ruleIndex": _RULE_INDEX[d.code],
+                "level": "warning",
+                "message": {"text": d.message},
+                "locations": [{"physicalLocation": {"artifactLocation": {"uri": _uri(rel)}, "region": region}}],
+            }
+            hint = get_hint(d)
+            if hint:
+                result["properties"] = {"hint": hint}
+            self.out.write(("" if self.first else ",") + json.dumps(result, ensure_ascii=False))
+            self.first = False
+        self.out.flush()
+
+    def close(self):
+        self.out.write(self.tail + "\n")
+        self.out.flush()
+
+
+def make_reporter(fmt, out, version):
+    if fmt == "jsonl":
+        return JsonLinesReporter(out)
+    if fmt == "sarif":
+        return SarifReporter(out, version)
+    return None
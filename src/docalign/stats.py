@@ -0,0 +1,86 @@
+import pstats
+import time
+
+from docalign.constants import STATS_SLOWEST_FILES
+
+
+class Stats:
+    def __init__(self):
+        self.modules = {}
+        self.iterations = {}
+        self.files = {}
+        self.memo = [0, 0]
+
+    def memo_lookup(self, hit):
+        self.memo[0 if hit else 1] += 1
+
+    def timed(self, phase, name, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            entry = self.modules.setdefault((phase, name), [0, 0.0])
+            entry[0] += 1
+            entry[1] += time.perf_counter() - start
+
+    def add_iteration(self, iteration, seconds):
+        entry = self.iterations.setdefault(iteration, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def add_file(self, rel, seconds):
+        self.files[rel] = self.files.get(rel, 0.0) + seconds
+
+    def merge(self, other):
+        for key, (calls, seconds) in other.modules.items():
+            entry = self.modules.setdefault(key, [0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+        for iteration, (blocks, seconds) in other.iterations.items():
+            entry = self.iterations.setdefault(iteration, [0, 0.0])
+            entry[0] += blocks
+            entry[1] += seconds
+        for rel, seconds in other.files.items():
+            self.add_file(rel, seconds)
+        self.memo[0] += other.memo[0]
+        self.memo[1] += other.memo[1]
+
+    def report(self, out):
+        total = sum(self.files.values())
+        module_total = sum(seconds for _, seconds in self.modules.values()) or 1.0
+        print(f"\ntimings: {len(self.files)} file(s), {total:.4f}s", file=out)
+        print(f"{'phase':<6} {'module':<14} {'calls':>7} {'seconds':>10} {'share':>7}", file=out)
+        for (phase, name), (calls, seconds) in sorted(self.modules.items(), key=lambda kv: -kv[1][1]):
+            print(f"{phase:<6} {name:<14} {calls:>7} {seconds:>10.4f} {seconds / module_total:>7.1%}", file=out)
+        print(f"code block memo: {self.memo[0]} hit(s), {self.memo[1]} miss(es)", file=out)
+        if self.iterations:
+            print(f"\n{'convergence iteration':<22} {'blocks':>7} {'seconds':>10}", file=out)
+            for iteration, (blocks, seconds) in sorted(self.iterations.items()):
+                print(f"{iteration:<22} {blocks:>7} {seconds:>10.4f}", file=out)
+        slowest = sorted(self.files.items(), key=lambda kv: -kv[1])[:STATS_SLOWEST_FILES]
+        if slowest:
+            print("\nslowest files:", file=out)
+            for rel, seconds in slowest:
+                print(f"  {seconds:.4f}s  {rel}", file=out)
+
+
+class ProfileData:
+    # pstats.Stats loads any object with create_stats() and a .stats dict,
+    # which lets profiles collected in pool workers be merged in the parent.
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def profile_data(profiler):
+    profiler.create_stats()
+    return profiler.stats
+
+
+def merge_profile(merged, data):
+    if merged is None:
+        return pstats.Stats(ProfileData(data))
+    merged.add(ProfileData(data))
+    return merged
@@ -1,10 +1,127 @@
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from heapq import merge
+
 from docalign.constants import (
+    BOX_CHARS,
     BOX_WALL_CLOSER_DRIFT,
     MIN_BOX_CONTENT_LINES,
     MIN_BOX_WIDTH,
 )
 
 
+class ColumnIndex:
+    def __init__(self, rows):
+        self.rows = rows if isinstance(rows, list) else list(rows)
+        self.columns = {}
+
+    def _column(self, char):
+        cols = self.columns.get(char)
+        if cols is None:
+            cols = self.columns[char] = {}
+            for row, raw in enumerate(self.rows):
+                col = raw.find(char)
+                while col != -1:
+                    cols.setdefault(col, []).append(row)
+                    col = raw.find(char, col + 1)
+        return cols
+
+    def copy(self):
+        index = ColumnIndex(list(self.rows))
+        index.columns = {char: {col: list(rows) for col, rows in cols.items()} for char, cols in self.columns.items()}
+        return index
+
+    def update(self, row, new):
+        old = self.rows[row]
+        if old == new:
+            return
+        self.rows[row] = new
+        for char, cols in self.columns.items():
+            col = old.find(char)
+            while col != -1:
+                rows = cols[col]
+                del rows[bisect_left(rows, row)]
+                col = old.find(char, col + 1)
+            col = new.find(char)
+            while col != -1:
+                insort(cols.setdefault(col, []), row)
+                col = new.find(char, col + 1)
+
+    def refresh(self, new_rows):
+        for row, new in enumerate(new_rows):
+            self.update(row, new)
+
+    def rows_below(self, char, col, row):
+        rows = self._column(char).get(col)
+        if rows:
+            for k in range(bisect_right(rows, row), len(rows)):
+                yield rows[k]
+
+
+_CODEC = "utf-32-le" if sys.byteorder == "little" else "utf-32-be"
+_BOX_CHAR = re.compile("[" + re.escape("".join(sorted(BOX_CHARS))) + "]")
+_NOT_CHAR = {}
+_NOT_BOX_CHAR = re.compile("[^" + re.escape("".join(sorted(BOX_CHARS))) + "]")
+
+
+class Grid:
+    # A code block padded with spaces to a rectangle and stored as one
+    # array('I') of code points, row after row, so a column is a strided
+    # slice of the buffer. Cells past the end of a line read as " ".
+    def __init__(self, rows):
+        self.height = len(rows)
+        self.width = max((len(raw) for raw in rows), default=0)
+        self.cells = array("I")
+        self.cells.frombytes("".join(raw.ljust(self.width) for raw in rows).encode(_CODEC, "surrogatepass"))
+        self._columns = {}
+        self._box_rows = {}
+        self._reversed = {}
+        self.arrays = None
+
+    def char(self, row, col):
+        if 0 <= row < self.height and 0 <= col < self.width:
+            return chr(self.cells[row * self.width + col])
+        return " "
+
+    def column(self, col):
+        text = self._columns.get(col)
+        if text is None:
+            if 0 <= col < self.width:
+                text = self.cells[col :: self.width].tobytes().decode(_CODEC, "surrogatepass")
+            else:
+                text = " " * self.height
+            self._columns[col] = text
+        return text
+
+    def box_rows(self, col):
+        rows = self._box_rows.get(col)
+        if rows is None:
+            rows = self._box_rows[col] = [m.start() for m in _BOX_CHAR.finditer(self.column(col))]
+        return rows
+
+    def gaps(self, col, start, stop):
+        return [m.start() for m in _NOT_BOX_CHAR.finditer(self.column(col), start, stop)]
+
+    def run_end(self, col, row, char, step=1):
+        # First row past `row` in the direction of `step` whose cell is not
+        # `char`: -1 or height when the run reaches the edge of the block.
+        # Upward runs are searched in the reversed column, so both directions
+        # cost the length of the run.
+        pattern = _NOT_CHAR.get(char)
+        if pattern is None:
+            pattern = _NOT_CHAR[char] = re.compile("[^" + re.escape(char) + "]")
+        if step > 0:
+            found = pattern.search(self.column(col), row + 1)
+            return found.start() if found else self.height
+        text = self._reversed.get(col)
+        if text is None:
+            text = self._reversed[col] = self.column(col)[::-1]
+        found = pattern.search(text, self.height - row)
+        return self.height - 1 - found.start() if found else -1
+
+
 def _is_tree_block(code_lines):
     has_branches = any("├──" in raw or "└──" in raw for _, raw in code_lines)
     has_box_borders = any("┌" in raw or "┐" in raw for _, raw in code_lines)
@@ -156,34 +273,58 @@ def _realign_box_chars(raw, actual, expected):
     return "".join(result)
 
 
-def _find_boxes(code_lines):
+def _box_openers(raw):
+    openers = []
+    j = raw.find("┌")
+    while j != -1:
+        col_right = _find_box_closer(raw, "┌", "┐", j)
+        if col_right is None or col_right - j < MIN_BOX_WIDTH:
+            j = raw.find("┌", j + 1)
+            continue
+        openers.append((j, col_right))
+        j = raw.find("┌", col_right + 1)
+    return openers
+
+
+def _find_boxes(code_lines, columns=None, openers=None):
+    # openers: per-row _box_openers() results a caller kept from an earlier
+    # scan; only the closing rows are looked up again.
+    if columns is None:
+        columns = ColumnIndex([raw for _, raw in code_lines])
     boxes = []
     for idx, (line_idx, raw) in enumerate(code_lines):
-        j = 0
-        while j < len(raw):
-            if raw[j] != "┌":
-                j += 1
-                continue
-            col_left = j
-            col_right = _find_box_closer(raw, "┌", "┐", j)
-            if col_right is None or col_right - col_left < MIN_BOX_WIDTH:
-                j += 1
-                continue
+        for col_left, col_right in _box_openers(raw) if openers is None else openers[idx]:
             closing_idx = None
-            for si in range(idx + 1, len(code_lines)):
-                _, sraw = code_lines[si]
-                if col_left < len(sraw) and sraw[col_left] == "└":
-                    cr = _find_box_closer(sraw, "└", "┘", col_left)
-                    if cr is not None:
-                        closing_idx = si
-                        break
+            for si in columns.rows_below("└", col_left, idx):
+                if _find_box_closer(code_lines[si][1], "└", "┘", col_left) is not None:
+                    closing_idx = si
+                    break
             if closing_idx is not None and closing_idx - idx >= MIN_BOX_CONTENT_LINES:
                 content_indices = list(range(idx + 1, closing_idx))
                 boxes.append((col_left, col_right, idx, closing_idx, content_indices))
-            j = col_right + 1
     return boxes
 
 
+def _find_closing_row(rows, columns, idx, col_left, col_right_open):
+    # Only rows with a └ within the closer drift of col_left can close the box,
+    # so walk those rows in order instead of every row below the opener.
+    cols = columns._column("└")
+    drift = range(col_left - BOX_WALL_CLOSER_DRIFT, col_left + BOX_WALL_CLOSER_DRIFT + 1)
+    candidates = [columns.rows_below("└", col, idx) for col in drift if col in cols]
+    last = None
+    for si in candidates[0] if len(candidates) == 1 else merge(*candidates):
+        if si == last:
+            continue
+        last = si
+        sraw = rows[si]
+        if col_left < len(sraw) and sraw[col_left] == "└":
+            return si, None
+        nc = _find_nearby_closer_start(sraw, col_left, col_right_open)
+        if nc is not None:
+            return si, nc
+    return None, None
+
+
 def _find_nearby_closer_start(raw, col_left, col_right_open, max_drift=BOX_WALL_CLOSER_DRIFT):
     for dc in range(1, max_drift + 1):
         for sign in [-1, 1]:
@@ -0,0 +1,59 @@
+import os
+
+from docalign.constants import BOX_CHARS, VECTORIZED_MIN_CELLS
+
+try:
+    import numpy
+except ImportError:  # optional: pip install docalign[numpy]
+    numpy = None
+
+_BOX_CODES = sorted(ord(c) for c in BOX_CHARS)
+# Every code point str.isspace() accepts lies below U+3001.
+_SPACE_CODES = [code for code in range(0x3001) if chr(code).isspace()]
+
+
+def enabled():
+    return numpy is not None and os.environ.get("DOCALIGN_BACKEND") == "numpy"
+
+
+def large(grid):
+    return grid.width * grid.height >= max(VECTORIZED_MIN_CELLS, 1)
+
+
+def _masks(grid):
+    # Views over the Grid's array('I') buffer: no copy of the code points.
+    if grid.arrays is None:
+        cells = numpy.frombuffer(grid.cells, dtype=numpy.uint32).reshape(grid.height, grid.width)
+        grid.arrays = (numpy.isin(cells, _BOX_CODES), ~numpy.isin(cells, _SPACE_CODES))
+    return grid.arrays
+
+
+def box_positions(grid):
+    rows, cols = numpy.nonzero(_masks(grid)[0])
+    ends = numpy.cumsum(numpy.bincount(rows, minlength=grid.height)).tolist()
+    cols = cols.tolist()
+    return [tuple(cols[start:end]) for start, end in zip([0, *ends[:-1]], ends)]
+
+
+def column_rows(grid, start, stop):
+    cols, rows = numpy.nonzero(_masks(grid)[0][start:stop].T)
+    if not len(cols):
+        return {}
+    keys, firsts = numpy.unique(cols, return_index=True)
+    rows = rows.tolist()
+    ends = [*firsts.tolist()[1:], len(rows)]
+    return {col: rows[first:end] for col, first, end in zip(keys.tolist(), firsts.tolist(), ends)}
+
+
+def extents(grid):
+    # Per row: box-char count, first and last box column, and the last
+    # column holding anything but whitespace (-1 for blank rows).
+    box, solid = _masks(grid)
+    last_col = grid.width - 1
+    last_solid = numpy.where(solid.any(axis=1), last_col - solid[:, ::-1].argmax(axis=1), -1)
+    return (
+        box.sum(axis=1).tolist(),
+        box.argmax(axis=1).tolist(),
+        (last_col - box[:, ::-1].argmax(axis=1)).tolist(),
+        last_solid.tolist(),
+    )
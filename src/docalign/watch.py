@@ -0,0 +1,245 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+
+from docalign.constants import WATCH_DEBOUNCE, WATCH_POLL_INTERVAL
+from docalign.incremental import IncrementalChecker
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+OVERFLOW = None
+
+
+def _walk_dirs(root):
+    for dirpath, _, _ in os.walk(root):
+        yield dirpath
+
+
+class InotifyWatcher:
+    def __init__(self, roots):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        for root in roots:
+            for d in _walk_dirs(root):
+                self._watch(d)
+
+    def _watch(self, directory):
+        wd = self._add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            self.close()
+            raise OSError(err, f"inotify_add_watch failed for {directory}: {os.strerror(err)}")
+        self.dirs[wd] = directory
+
+    def poll(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 65536)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return set()
+            raise
+        changed = set()
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, pos)
+            name = data[pos + _EVENT.size : pos + _EVENT.size + length].rstrip(b"\0")
+            pos += _EVENT.size + length
+            if mask & _IN_Q_OVERFLOW:
+                return OVERFLOW
+            if wd not in self.dirs:
+                continue
+            path = os.path.join(self.dirs[wd], os.fsdecode(name))
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    for d in _walk_dirs(path):
+                        self._watch(d)
+                        changed.update(_md_files(d))
+            elif path.endswith(".md"):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def _md_files(directory):
+    try:
+        with os.scandir(directory) as entries:
+            return {e.path for e in entries if e.name.endswith(".md") and e.is_file()}
+    except OSError:
+        return set()
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class PollingWatcher:
+    def __init__(self, roots, interval=WATCH_POLL_INTERVAL):
+        self.interval = interval
+        self.dirs = {d: _stat_key(d) for root in roots for d in _walk_dirs(root)}
+        self.files = {f: _stat_key(f) for d in self.dirs for f in _md_files(d)}
+
+    def _scan(self):
+        changed = set()
+        for d, key in list(self.dirs.items()):
+            current = _stat_key(d)
+            if current == key:
+                continue
+            self.dirs[d] = current
+            if current is None:
+                continue
+            for sub in _walk_dirs(d):
+                self.dirs.setdefault(sub, _stat_key(sub))
+                for f in _md_files(sub) - self.files.keys():
+                    self.files[f] = None
+        for f, key in list(self.files.items()):
+            current = _stat_key(f)
+            if current != key:
+                changed.add(f)
+                if current is None:
+                    del self.files[f]
+                else:
+                    self.files[f] = current
+        return changed
+
+    def poll(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self._scan()
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            wait = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            time.sleep(max(wait, 0))
+
+    def close(self):
+        pass
+
+
+def make_watcher(roots, polling=False):
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(roots)
+
+
+def _root_for(arg):
+    glob_at = min((arg.index(c) for c in "*?[" if c in arg), default=None)
+    if glob_at is not None:
+        return os.path.abspath(os.path.dirname(arg[:glob_at]) or ".")
+    path = os.path.abspath(arg)
+    return path if os.path.isdir(path) else os.path.dirname(path)
+
+
+def next_batch(watcher, debounce=WATCH_DEBOUNCE):
+    changed = watcher.poll(None)
+    while changed is not OVERFLOW:
+        more = watcher.poll(debounce)
+        if more is OVERFLOW:
+            return OVERFLOW
+        if not more:
+            break
+        changed |= more
+    return changed
+
+
+class Watch:
+    def __init__(self, args, files, ignored, select, fmt):
+        self.args = args
+        self.ignored = ignored
+        self.select = select
+        self.fmt = fmt
+        self.checkers = {}
+        self.errors = {}
+        self.files = set(files)
+
+    def check(self, paths):
+        for path in sorted(paths):
+            try:
+                with open(path) as f:
+                    lines = f.readlines()
+            except OSError:
+                self.files.discard(path)
+                self.checkers.pop(path, None)
+                if self.errors.pop(path, None):
+                    print(f"\n{os.path.relpath(path)}: removed")
+                continue
+            checker = self.checkers.setdefault(path, IncrementalChecker(self.ignored))
+            errors = [e for _, e in checker.check(lines)]
+            previous = self.errors.get(path)
+            self.errors[path] = errors
+            rel = os.path.relpath(path)
+            if errors:
+                print(f"\n{rel}:")
+                for e in errors:
+                    print(f"  {self.fmt(e)}")
+            elif previous:
+                print(f"\n{rel}: aligned")
+
+    def summary(self):
+        total = sum(len(e) for e in self.errors.values())
+        files = sum(1 for e in self.errors.values() if e)
+        status = "ALL DOCS ALIGNED" if total == 0 else f"{total} error(s) in {files} file(s)"
+        print(f"\n[{time.strftime('%H:%M:%S')}] {status} - watching {len(self.files)} file(s)", flush=True)
+
+    def changed_files(self, changed):
+        if changed is OVERFLOW:
+            return set(self.files)
+        new = {p for p in changed - self.files if os.path.isfile(p)}
+        self.files.update(self.select(sorted(new), self.args))
+        return {p for p in changed if p in self.files}
+
+    def run(self, watcher, batches=None):
+        self.check(self.files)
+        self.summary()
+        done = 0
+        while batches is None or done < batches:
+            paths = self.changed_files(next_batch(watcher))
+            done += 1
+            if paths:
+                self.check(paths)
+                self.summary()
+
+
+def run(args, files, ignored, select, fmt, polling=False):
+    roots = sorted({_root_for(a) for a in args})
+    watcher = make_watcher(roots, polling)
+    try:
+        Watch(args, [os.path.abspath(f) for f in files], ignored, select, fmt).run(watcher)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
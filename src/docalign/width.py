@@ -0,0 +1,40 @@
+import unicodedata
+from functools import lru_cache
+
+from docalign.constants import WIDTH_CACHE_SIZE
+
+_ZERO_WIDTH_CATEGORIES = ("Mn", "Me", "Cf")
+_BMP = None
+
+
+def char_width(ch):
+    # Terminal cells a character takes: 0 for combining marks and format
+    # characters (the soft hyphen excepted), 2 for East Asian wide and
+    # fullwidth characters, 1 otherwise.
+    if ch != "\u00ad" and unicodedata.category(ch) in _ZERO_WIDTH_CATEGORIES:
+        return 0
+    return 2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1
+
+
+def _bmp():
+    # One byte per BMP code point, built on the first non-ASCII text.
+    global _BMP
+    if _BMP is None:
+        _BMP = bytes(char_width(chr(code)) for code in range(0x10000))
+    return _BMP
+
+
+@lru_cache(maxsize=WIDTH_CACHE_SIZE)
+def _text_width(text):
+    table = _bmp()
+    return sum(table[code] if code < 0x10000 else char_width(chr(code)) for code in map(ord, text))
+
+
+def width(text):
+    if text.isascii():
+        return len(text)
+    return _text_width(text)
+
+
+def pad(text, target):
+    return text + " " * (target - width(text))
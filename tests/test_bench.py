@@ -0,0 +1,66 @@
+import json
+import sys
+
+import pytest
+
+from docalign import bench, cli
+
+
+def _run(monkeypatch, capsys, *args):
+    monkeypatch.setattr(sys, "argv", ["docalign", "bench", *args])
+    try:
+        cli.main()
+        code = 0
+    except SystemExit as exc:
+        code = exc.code
+    return code, capsys.readouterr().out
+
+
+def test_corpus_is_deterministic_and_clean_without_drift():
+    corpus = bench.generate_corpus(3, blocks=4, depth=3, table_rows=5, drift=0, seed=7)
+    assert corpus == bench.generate_corpus(3, blocks=4, depth=3, table_rows=5, drift=0, seed=7)
+    assert all(cli.run_checks(lines) == [] for lines in corpus)
+
+
+def test_drift_produces_fixable_issues():
+    corpus = bench.generate_corpus(4, blocks=6, depth=3, table_rows=8, drift=0.3, seed=1)
+    assert sum(len(cli.run_checks(lines)) for lines in corpus) > 0
+    assert all(cli.run_checks(cli.run_fixes(lines)) == [] for lines in corpus)
+
+
+def test_measure_reports_every_module():
+    results = bench.measure(bench.generate_corpus(1, blocks=2, depth=1, table_rows=2, drift=0.2), repeat=1)
+    for name in cli.CHECK_MODULES:
+        assert results["timings"][f"check:{name}"] >= 0
+        assert results["timings"][f"fix:{name}"] >= 0
+    assert results["timings"]["run_fixes"] > 0
+    assert results["peak_bytes"] > 0
+
+
+def test_compare_flags_slower_stages():
+    baseline = {"timings": {"run_checks": 1.0, "run_fixes": 1.0}, "peak_bytes": 100}
+    results = {"timings": {"run_checks": 1.05, "run_fixes": 1.5, "parse": 9.0}, "peak_bytes": 200}
+    assert bench.compare(results, baseline, threshold=0.1) == ["run_fixes", "peak_bytes"]
+
+
+def test_save_and_compare_baseline(tmp_path, monkeypatch, capsys):
+    saved = tmp_path / "baseline.json"
+    small = ["--files", "1", "--blocks", "2", "--table-rows", "2", "--repeat", "1"]
+    code, out = _run(monkeypatch, capsys, *small, "--save", str(saved), "--write", str(tmp_path / "corpus"))
+    assert code == 0
+    assert "lines/sec" in out
+    assert len(list((tmp_path / "corpus").glob("*.md"))) == 1
+
+    data = json.loads(saved.read_text())
+    data["timings"] = {stage: seconds / 100 for stage, seconds in data["timings"].items()}
+    saved.write_text(json.dumps(data))
+    code, out = _run(monkeypatch, capsys, *small, "--baseline", str(saved))
+    assert code == 1
+    assert "REGRESSION" in out
+
+
+@pytest.mark.parametrize("args", [["--files", "x"], ["--bogus", "1"], ["--drift", "2"], ["--files"]])
+def test_invalid_options(monkeypatch, capsys, args):
+    code, out = _run(monkeypatch, capsys, *args)
+    assert code == 1
+    assert out.startswith("error:")
@@ -0,0 +1,56 @@
+import os
+
+from docalign.cache import ResultCache
+
+
+def test_roundtrip(tmp_path):
+    cache = ResultCache(str(tmp_path), "1.0", set())
+    key = cache.key(["# doc\n", "| a |\n"])
+    assert cache.get(key) is None
+    cache.put(key, ["L2 table col0: missing space after |"])
+    assert cache.get(key) == ["L2 table col0: missing space after |"]
+
+
+def test_key_depends_on_version_and_ignored(tmp_path):
+    lines = ["text\n"]
+    base = ResultCache(str(tmp_path), "1.0", set()).key(lines)
+    assert ResultCache(str(tmp_path), "1.0", set()).key(lines) == base
+    assert ResultCache(str(tmp_path), "1.1", set()).key(lines) != base
+    assert ResultCache(str(tmp_path), "1.0", {"tables"}).key(lines) != base
+    assert ResultCache(str(tmp_path), "1.0", set()).key(["text \n"]) != base
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = ResultCache(str(tmp_path), "1.0", set())
+    key = cache.key(["x\n"])
+    cache.put(key, [])
+    with open(cache._path(key), "w") as f:
+        f.write("{not json")
+    assert cache.get(key) is None
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path), "1.0", set())
+    keys = [cache.key([f"doc {n}\n"]) for n in range(4)]
+    for age, key in enumerate(keys):
+        cache.put(key, ["x" * 100])
+        os.utime(cache._path(key), (1000 + age, 1000 + age))
+    entry_size = os.path.getsize(cache._path(keys[0]))
+
+    cache.evict(entry_size * 2)
+
+    assert [cache.get(k) is not None for k in keys] == [False, False, True, True]
+
+
+def test_evict_skips_scan_under_budget(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / "c"), "1.0", set())
+    cache.put(cache.key(["a\n"]), ["x"])
+    monkeypatch.setattr(os, "walk", lambda *a: (_ for _ in ()).throw(AssertionError("scanned")))
+    cache.evict(1024)
+    assert cache.estimated_size() == os.path.getsize(cache._path(cache.key(["a\n"])))
+
+
+def test_cache_dir_ignores_itself(tmp_path):
+    cache = ResultCache(str(tmp_path / "c"), "1.0", set())
+    cache.put(cache.key(["a\n"]), [])
+    assert (tmp_path / "c" / ".gitignore").read_text().splitlines()[-1] == "*"
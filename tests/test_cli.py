@@ -0,0 +1,153 @@
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from docalign import cli
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _run(monkeypatch, capsys, *args):
+    monkeypatch.setattr(sys, "argv", ["docalign", *args])
+    try:
+        cli.main()
+        code = 0
+    except SystemExit as exc:
+        code = exc.code
+    return code, capsys.readouterr().out
+
+
+@pytest.fixture
+def docs_dir(tmp_path, monkeypatch):
+    for src in sorted((FIXTURES / "checks").rglob("input.md")):
+        name = src.parent.relative_to(FIXTURES).as_posix().replace("/", "_")
+        shutil.copy(src, tmp_path / f"{name}.md")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.parametrize("mode", ["--check", "--diff"])
+def test_parallel_output_matches_serial(docs_dir, monkeypatch, capsys, mode):
+    serial = _run(monkeypatch, capsys, mode, "--jobs", "1", ".")
+    parallel = _run(monkeypatch, capsys, mode, "--jobs", "3", ".")
+    assert serial[0] == 1
+    assert parallel == serial
+
+
+def test_parallel_fix_matches_serial(docs_dir, tmp_path_factory, monkeypatch, capsys):
+    serial_dir = tmp_path_factory.mktemp("serial")
+    shutil.copytree(docs_dir, serial_dir, dirs_exist_ok=True)
+    _, parallel_out = _run(monkeypatch, capsys, "--fix", "--jobs", "3", str(docs_dir))
+    _, serial_out = _run(monkeypatch, capsys, "--fix", "--jobs", "1", str(serial_dir))
+    assert parallel_out.splitlines()[-2:] == serial_out.splitlines()[-2:]
+    for fixed in sorted(docs_dir.glob("*.md")):
+        assert fixed.read_text() == (serial_dir / fixed.name).read_text()
+
+
+@pytest.mark.parametrize("value", ["0", "-2", "many"])
+def test_invalid_jobs_value(docs_dir, monkeypatch, capsys, value):
+    code, out = _run(monkeypatch, capsys, "--jobs", value, ".")
+    assert code == 1
+    assert "invalid --jobs value" in out
+
+
+def test_cache_reuses_results(docs_dir, monkeypatch, capsys):
+    first = _run(monkeypatch, capsys, "--jobs", "1", ".")
+    assert (docs_dir / ".docalign_cache").is_dir()
+    second = _run(monkeypatch, capsys, "--jobs", "1", ".")
+    assert second == first
+
+
+def test_no_cache_skips_cache_dir(docs_dir, monkeypatch, capsys):
+    _run(monkeypatch, capsys, "--no-cache", ".")
+    assert not (docs_dir / ".docalign_cache").exists()
+
+
+def _git(repo, *args):
+    cmd = ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args]
+    subprocess.run(cmd, cwd=repo, check=True, capture_output=True)
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch):
+    broken = (FIXTURES / "checks/tables/01-col-mismatch/input.md").read_text()
+    aligned = (FIXTURES / "checks/tables/01-col-mismatch/expected.md").read_text()
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "committed.md").write_text(broken)
+    (tmp_path / "docs/modified.md").write_text(aligned)
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-qm", "init")
+    (tmp_path / "docs/modified.md").write_text(broken)
+    _git(tmp_path, "add", "docs/modified.md")
+    (tmp_path / "docs/modified.md").write_text(aligned)
+    (tmp_path / "untracked.md").write_text(broken)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _reported_files(out):
+    return [line[:-1] for line in out.splitlines() if line.endswith(".md:")]
+
+
+def test_changed_since_checks_only_changed_files(git_repo, monkeypatch, capsys):
+    code, out = _run(monkeypatch, capsys, "--no-cache", "--changed-since", "HEAD")
+    assert code == 1
+    assert _reported_files(out) == ["untracked.md"]
+
+
+def test_changed_since_scoped_to_paths(git_repo, monkeypatch, capsys):
+    code, out = _run(monkeypatch, capsys, "--no-cache", "--changed-since", "HEAD", "docs")
+    assert code == 0
+    assert "ALL DOCS ALIGNED" in out
+
+
+def test_staged_reads_index_contents(git_repo, monkeypatch, capsys):
+    code, out = _run(monkeypatch, capsys, "--no-cache", "--staged")
+    assert code == 1
+    assert _reported_files(out) == [os.path.join("docs", "modified.md")]
+
+
+def test_unknown_revision(git_repo, monkeypatch, capsys):
+    code, out = _run(monkeypatch, capsys, "--changed-since", "no-such-rev")
+    assert code == 1
+    assert "unknown revision 'no-such-rev'" in out
+
+
+def test_changed_since_glob_matches_like_path_walk(git_repo, monkeypatch, capsys):
+    broken = (git_repo / "untracked.md").read_text()
+    (git_repo / "docs/nested").mkdir()
+    (git_repo / "docs/nested/deep.md").write_text(broken)
+    (git_repo / "docs/top.md").write_text(broken)
+
+    _, out = _run(monkeypatch, capsys, "--no-cache", "--changed-since", "HEAD", "docs/**/*.md")
+    assert _reported_files(out) == [os.path.join("docs", "nested", "deep.md"), os.path.join("docs", "top.md")]
+    _, out = _run(monkeypatch, capsys, "--no-cache", "--changed-since", "HEAD", "docs/*.md")
+    assert _reported_files(out) == [os.path.join("docs", "top.md")]
+
+
+def test_staged_handles_pathspec_characters(git_repo, monkeypatch, capsys):
+    (git_repo / "[x]*.md").write_text((git_repo / "untracked.md").read_text())
+    _git(git_repo, "add", "--", ":(literal)[x]*.md")
+    code, out = _run(monkeypatch, capsys, "--no-cache", "--staged")
+    assert code == 1
+    assert _reported_files(out) == ["[x]*.md", os.path.join("docs", "modified.md")]
+
+
+def test_staged_rejects_unmerged_paths(git_repo, monkeypatch, capsys):
+    _git(git_repo, "checkout", "-qb", "other")
+    (git_repo / "committed.md").write_text("# other\n")
+    _git(git_repo, "commit", "-qam", "other")
+    _git(git_repo, "checkout", "-q", "-")
+    (git_repo / "committed.md").write_text("# main\n")
+    _git(git_repo, "commit", "-qam", "main")
+    with pytest.raises(subprocess.CalledProcessError):
+        _git(git_repo, "merge", "-q", "other")
+
+    code, out = _run(monkeypatch, capsys, "--no-cache", "--staged")
+    assert code == 1
+    assert "unmerged path 'committed.md'" in out
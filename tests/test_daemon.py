@@ -0,0 +1,97 @@
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from docalign import cli, client, daemon
+
+FIXTURES = Path(__file__).parent / "fixtures"
+CASE = FIXTURES / "checks/tables/01-col-mismatch"
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    path = str(tmp_path / "d.sock")
+    monkeypatch.setenv("DOCALIGN_SOCKET", path)
+    srv = daemon._Server(path)
+    srv.timeout = 0.05
+    thread = threading.Thread(target=srv.serve_until_stopped)
+    thread.start()
+    yield srv
+    srv.stopping = True
+    thread.join(5)
+    srv.server_close()
+
+
+@pytest.fixture
+def doc_dir(tmp_path):
+    shutil.copy(CASE / "input.md", tmp_path / "doc.md")
+    return tmp_path
+
+
+def _forward(argv, cwd, **env):
+    return client.send({"argv": argv, "cwd": str(cwd), "env": {**os.environ, **env}})
+
+
+def _in_process(argv, cwd, monkeypatch, capsys):
+    monkeypatch.chdir(cwd)
+    monkeypatch.setattr(sys, "argv", ["docalign", *argv])
+    with pytest.raises(SystemExit) as exc:
+        cli.main()
+    return capsys.readouterr().out, exc.value.code
+
+
+def test_daemon_matches_in_process(server, doc_dir, monkeypatch, capsys):
+    argv = ["--no-cache", "--diff", "."]
+    response = _forward(argv, doc_dir)
+    assert (response["stdout"], response["code"]) == _in_process(argv, doc_dir, monkeypatch, capsys)
+
+
+def test_daemon_fix_writes_files(server, doc_dir):
+    response = _forward(["--no-cache", "--fix", "doc.md"], doc_dir)
+    assert response["code"] == 0
+    assert (doc_dir / "doc.md").read_text() == (CASE / "expected.md").read_text()
+
+
+def test_daemon_uses_client_environment(server, doc_dir):
+    git = ["git", "-c", "user.name=t", "-c", "user.email=t@t"]
+    subprocess.run([*git, "init", "-q"], cwd=doc_dir, check=True)
+    shutil.copy(CASE / "expected.md", doc_dir / "doc.md")
+    subprocess.run([*git, "add", "doc.md"], cwd=doc_dir, check=True)
+    alt_index = str(doc_dir / "alt-index")
+    shutil.copy(doc_dir / ".git/index", alt_index)
+    shutil.copy(CASE / "input.md", doc_dir / "doc.md")
+    subprocess.run([*git, "add", "doc.md"], cwd=doc_dir, check=True, env={**os.environ, "GIT_INDEX_FILE": alt_index})
+
+    assert _forward(["--no-cache", "--staged"], doc_dir)["code"] == 0
+    assert _forward(["--no-cache", "--staged"], doc_dir, GIT_INDEX_FILE=alt_index)["code"] == 1
+
+
+def test_daemon_status(server, doc_dir):
+    _forward(["--version"], doc_dir)
+    assert client.send({"command": "status"})["served"] == 1
+    assert client.send({"command": "stop"}) == {"stopped": True}
+
+
+def test_stale_daemon_stops(server, monkeypatch, doc_dir):
+    monkeypatch.setattr(server, "stamp", ())
+    assert _forward(["--version"], doc_dir) == {"stale": True}
+    assert server.stopping
+
+
+def test_client_ignores_foreign_socket(server):
+    os.chmod(os.environ["DOCALIGN_SOCKET"], 0o666)
+    assert client.send({"command": "status"}) is None
+
+
+def test_client_falls_back_without_daemon(tmp_path, doc_dir, monkeypatch, capsys):
+    monkeypatch.setenv("DOCALIGN_SOCKET", str(tmp_path / "missing.sock"))
+    assert client.send({"command": "status"}) is None
+    expected = _in_process(["--no-cache", "."], doc_dir, monkeypatch, capsys)
+    with pytest.raises(SystemExit) as exc:
+        client.main()
+    assert (capsys.readouterr().out, exc.value.code) == expected
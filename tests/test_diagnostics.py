@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+
+from docalign.cli import run_checks
+from docalign.diagnostics import CODES, Diagnostic
+from docalign.hints import get_hint
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _fixture_diagnostics():
+    for path in sorted(FIXTURES.rglob("input.md")):
+        yield from run_checks(path.read_text().splitlines(keepends=True))
+
+
+def test_str_matches_legacy_format():
+    wall = Diagnostic("box-wall", 15, col=33, expected=34, ref=(10, 0))
+    assert str(wall) == "L15 box wall │ at col 33, expected col 34 (box ┌ at L10 col 0)"
+    table = Diagnostic("table-width", 5, expected=14, actual=10, detail=1, ref=(3,))
+    assert str(table) == "L5 table col1: width=10 expected=14 (separator at L3)"
+    wide = Diagnostic("wide-char", 2, col=4, detail="▶")
+    assert str(wide) == "L2 wide char '▶' (U+25B6) at col 4"
+
+
+def test_shifted_moves_line_and_reference():
+    wall = Diagnostic("box-wall", 15, col=33, expected=34, ref=(10, 0))
+    assert str(wall.shifted(5)) == "L20 box wall │ at col 33, expected col 34 (box ┌ at L15 col 0)"
+    assert wall.shifted(5).shifted(-5) == wall
+
+
+def test_fixtures_cover_every_code_and_roundtrip():
+    seen = set()
+    for d in _fixture_diagnostics():
+        seen.add(d.code)
+        assert Diagnostic.from_tuple(json.loads(json.dumps(d.as_tuple()))) == d
+    assert seen == set(CODES)
+
+
+def test_hint_dispatch_matches_string_hints():
+    for d in _fixture_diagnostics():
+        assert get_hint(d) == get_hint(str(d))
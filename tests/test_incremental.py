@@ -0,0 +1,44 @@
+import random
+from pathlib import Path
+
+from docalign import run_checks
+from docalign.incremental import IncrementalChecker
+from docalign.memo import BlockMemo
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _fixture_docs():
+    return [p.read_text().splitlines(keepends=True) for p in sorted(FIXTURES.rglob("input.md"))]
+
+
+def test_matches_run_checks_across_edits():
+    rng = random.Random(7)
+    docs = _fixture_docs()
+    for trial in range(60):
+        lines = [line for doc in rng.sample(docs, 3) for line in doc]
+        ignored = {"tables", "rails"} if trial % 3 == 0 else set()
+        checker = IncrementalChecker(ignored)
+        for _ in range(3):
+            expected = run_checks(lines, ignored, BlockMemo(maxsize=0))
+            assert [e for _, e in checker.check(lines)] == expected
+            i = rng.randrange(len(lines))
+            lines = lines[:i] + [rng.choice(["```\n", "│ x │\n", "| a | b |\n", "- k: v\n", lines[i]])] + lines[i + 1 :]
+
+
+def test_edit_rechecks_only_the_touched_segment():
+    lines = [line for doc in _fixture_docs()[:6] for line in [*doc, "\n"]]
+    checker = IncrementalChecker()
+    checker.check(lines)
+    segments = checker.rechecked
+    assert segments > 3
+
+    block = next(i for i, line in enumerate(lines) if "┌" in line)
+    edited = list(lines)
+    edited[block] = edited[block].replace("┌", "┌─", 1)
+    errors = checker.check(edited)
+
+    assert checker.rechecked == 1
+    assert [e for _, e in errors] == run_checks(edited, memo=BlockMemo(maxsize=0))
+    checker.check(edited)
+    assert checker.rechecked == 0
@@ -0,0 +1,97 @@
+import io
+import json
+from pathlib import Path
+
+from docalign import run_fixes
+from docalign.lsp import LanguageServer, apply_change, split_lines, text_edits
+
+CASE = Path(__file__).parent / "fixtures/checks/tables/01-col-mismatch"
+URI = "file:///doc.md"
+TABLES_DIAGNOSTIC = {"source": "docalign", "code": "tables"}
+
+
+def _frame(message):
+    body = json.dumps({"jsonrpc": "2.0", **message}).encode()
+    return f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+
+
+def _session(*messages):
+    out = io.BytesIO()
+    server = LanguageServer(io.BytesIO(b"".join(_frame(m) for m in messages)), out)
+    code = server.serve()
+    replies = []
+    data = out.getvalue()
+    while data:
+        header, _, rest = data.partition(b"\r\n\r\n")
+        length = int(header.split(b":")[1])
+        replies.append(json.loads(rest[:length]))
+        data = rest[length:]
+    return code, replies
+
+
+def _change(line, start, end, text):
+    return {
+        "range": {"start": {"line": line, "character": start}, "end": {"line": line, "character": end}},
+        "text": text,
+    }
+
+
+def test_split_lines_normalizes_line_endings():
+    assert split_lines("a\r\nb\rc\n\nd") == ["a\n", "b\n", "c\n", "\n", "d"]
+
+
+def test_apply_change_uses_utf16_offsets():
+    lines = ["a😀b\n", "c\n"]
+    assert apply_change(lines, _change(0, 3, 4, "X")) == ["a😀X\n", "c\n"]
+    assert apply_change(lines, _change(0, 2, 3, "X"), "utf-32") == ["a😀X\n", "c\n"]
+    multi = {"range": {"start": {"line": 0, "character": 1}, "end": {"line": 1, "character": 0}}, "text": "\nz"}
+    assert apply_change(lines, multi) == ["a\n", "zc\n"]
+
+
+def test_text_edits_replace_changed_lines_only():
+    assert text_edits(["a\n", "b\n", "c\n"], ["a\n", "B\n", "c\n"]) == [
+        {"range": {"start": {"line": 1, "character": 0}, "end": {"line": 2, "character": 0}}, "newText": "B\n"}
+    ]
+    assert text_edits(["a\n"], ["a\n"]) == []
+
+
+def test_session_publishes_diagnostics_and_fixes():
+    text = (CASE / "input.md").read_text()
+    row = next(i for i, line in enumerate(text.splitlines()) if line.startswith("|"))
+    edits = [_change(row, 1, 1, " ")]
+    code, replies = _session(
+        {"id": 1, "method": "initialize", "params": {"capabilities": {}}},
+        {"method": "initialized", "params": {}},
+        {"method": "textDocument/didOpen", "params": {"textDocument": {"uri": URI, "version": 1, "text": text}}},
+        {
+            "method": "textDocument/didChange",
+            "params": {"textDocument": {"uri": URI, "version": 2}, "contentChanges": edits},
+        },
+        {
+            "id": 2,
+            "method": "textDocument/codeAction",
+            "params": {"textDocument": {"uri": URI}, "context": {}},
+        },
+        {
+            "id": 5,
+            "method": "textDocument/codeAction",
+            "params": {"textDocument": {"uri": URI}, "context": {"diagnostics": [TABLES_DIAGNOSTIC]}},
+        },
+        {"id": 3, "method": "unknown/method", "params": {}},
+        {"id": 4, "method": "shutdown"},
+        {"method": "exit"},
+    )
+    assert code == 0
+    init, opened, changed, actions, quickfixes, unknown, shutdown = replies
+    assert init["result"]["capabilities"]["textDocumentSync"]["change"] == 2
+    assert opened["params"]["diagnostics"]
+    assert all(d["source"] == "docalign" and d["code"] == "tables" for d in changed["params"]["diagnostics"])
+    assert changed["params"]["version"] == 2
+
+    (fix_all,) = actions["result"]
+    (edit,) = fix_all["edit"]["changes"][URI]
+    edited = apply_change(split_lines(text), edits[0])
+    assert apply_change(edited, {"range": edit["range"], "text": edit["newText"]}) == run_fixes(edited)
+    assert [a["title"] for a in quickfixes["result"]] == ["Fix tables alignment", "Fix all docalign issues"]
+    assert unknown["error"]["code"] == -32601
+    assert shutdown["result"] is None
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+from docalign.cache import ResultCache
+from docalign.cli import run_checks, run_fixes
+from docalign.memo import BlockMemo
+from docalign.parser import Document
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _repeated_diagram():
+    block = (FIXTURES / "checks/box-walls/01-short-wall/input.md").read_text()
+    return (block + "\nsome prose\n\n" + block).splitlines(keepends=True)
+
+
+def test_repeated_blocks_match_unmemoized_results():
+    lines = _repeated_diagram()
+    memo = BlockMemo()
+    assert run_checks(lines, memo=memo) == run_checks(lines, memo=BlockMemo(maxsize=0))
+    assert run_fixes(lines, memo=memo) == run_fixes(lines, memo=BlockMemo(maxsize=0))
+
+
+def test_memo_key_depends_on_ignored_checks():
+    memo = BlockMemo()
+    assert memo.key("fix", set(), ["│ a │\n"]) != memo.key("fix", {"rails"}, ["│ a │\n"])
+    assert memo.key("fix", set(), ["│ a │\n"]) != memo.key("check", set(), ["│ a │\n"])
+
+
+def test_lru_eviction():
+    memo = BlockMemo(maxsize=2)
+    memo.put("a", [1])
+    memo.put("b", [2])
+    memo.get("a")
+    memo.put("c", [3])
+    assert memo.get("a") == [1]
+    assert memo.get("b") is None
+    assert memo.get("c") == [3]
+
+
+def test_persisted_entries_survive_new_memo(tmp_path):
+    store = ResultCache(str(tmp_path), "1.0", set())
+    lines = _repeated_diagram()
+    expected = run_fixes(lines, memo=BlockMemo(store=store))
+
+    fresh = BlockMemo(store=ResultCache(str(tmp_path), "1.0", set()))
+    block = Document(lines).code_blocks[1]
+    key = fresh.key("fix", set(), [lines[i] for i in block.indices])
+    assert fresh.get(key) is not None
+    assert run_fixes(lines, memo=fresh) == expected
+
+
+def test_persisted_check_entries_roundtrip(tmp_path):
+    lines = _repeated_diagram()
+    expected = run_checks(lines, memo=BlockMemo(maxsize=0))
+    run_checks(lines, memo=BlockMemo(store=ResultCache(str(tmp_path), "1.0", set())))
+    assert run_checks(lines, memo=BlockMemo(store=ResultCache(str(tmp_path), "1.0", set()))) == expected
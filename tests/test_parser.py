@@ -0,0 +1,119 @@
+from docalign.constants import BOX_CHARS
+from docalign.parser import CodeBlock, Document, in_code_block, iter_code_blocks
+from docalign.utils import ColumnIndex, Grid, _find_boxes
+
+LINES = [
+    "# Title\n",
+    "```\n",
+    "┌────┐\n",
+    "│ ab │\n",
+    "└────┘\n",
+    "```\n",
+    "text\n",
+    "```\n",
+    "plain\n",
+    "```\n",
+    "tail\n",
+]
+
+
+def test_document_structure():
+    doc = Document(LINES)
+    assert doc.fences == [1, 5, 7, 9]
+    assert [(b.start, b.end, b.indices) for b in doc.code_blocks] == [(1, 5, [2, 3, 4]), (7, 9, [8])]
+    assert doc.prose_ranges == [(0, 1), (6, 7), (10, 11)]
+    assert doc.in_code == {2, 3, 4, 8}
+    assert doc.code_blocks[0].positions == {2: (0, 5), 3: (0, 5), 4: (0, 5)}
+    assert len(doc.code_blocks[0].groups) == 1
+    assert doc.code_blocks[1].groups == []
+
+
+def test_unclosed_block_is_code_but_not_a_block():
+    doc = Document(["text\n", "```\n", "│ a │\n"])
+    assert doc.code_blocks == []
+    assert doc.in_code == {2}
+    assert doc.prose_ranges == [(0, 1)]
+
+
+def test_line_wrappers_match_document():
+    assert [indices for indices, _ in iter_code_blocks(LINES)] == [[2, 3, 4], [8]]
+    assert in_code_block(LINES) == {2, 3, 4, 8}
+
+
+def test_updated_reuses_untouched_blocks():
+    doc = Document(LINES)
+    new_lines = list(LINES)
+    new_lines[8] = "changed\n"
+    updated = doc.updated(new_lines)
+    assert updated.code_blocks[0] is doc.code_blocks[0]
+    assert updated.code_blocks[1].code_lines == [(8, "changed")]
+    assert doc.updated(list(LINES)) is doc
+
+
+def test_updated_reparses_when_fences_change():
+    new_lines = list(LINES)
+    new_lines[6] = "```\n"
+    assert Document(LINES).updated(new_lines).fences == Document(new_lines).fences
+
+
+NESTED = [
+    "┌──────────────┐   ┌──────┐",
+    "│  ┌────────┐  │   │ side │",
+    "│  │ inner  │  │   │      │",
+    "│  └────────┘  │   └──────┘",
+    "│              │",
+    "└──────────────┘",
+]
+
+
+def test_column_index_lookups():
+    index = ColumnIndex(NESTED)
+    assert list(index.rows_below("└", 0, 0)) == [5]
+    assert list(index.rows_below("└", 3, 0)) == [3]
+    assert list(index.rows_below("└", 3, 3)) == []
+    assert list(index.rows_below("│", 15, 0)) == [1, 2, 3, 4]
+    assert list(index.rows_below("┘", 99, 0)) == []
+
+
+def test_column_index_updates_copy_only():
+    index = ColumnIndex(NESTED)
+    list(index.rows_below("└", 3, 0))
+    moved = index.copy()
+    moved.update(3, "│   └────────┘ │")
+    assert list(moved.rows_below("└", 4, 0)) == [3]
+    assert list(moved.rows_below("└", 3, 0)) == []
+    assert list(moved.rows_below("│", 0, 0)) == [1, 2, 3, 4]
+    assert list(index.rows_below("└", 3, 0)) == [3]
+
+
+def test_grid_column_primitives():
+    grid = Grid(NESTED)
+    assert grid.width == max(len(raw) for raw in NESTED)
+    assert grid.column(0) == "".join(raw[0] for raw in NESTED)
+    assert grid.char(1, 99) == grid.char(-1, 0) == " "
+    for col in range(grid.width + 2):
+        expected = [row for row, raw in enumerate(NESTED) if col < len(raw) and raw[col] in BOX_CHARS]
+        assert grid.box_rows(col) == expected
+        assert grid.gaps(col, 1, 5) == [row for row in range(1, 5) if row not in expected]
+    assert grid.run_end(0, 0, "│") == 5
+    assert grid.run_end(0, 5, "│", -1) == 0
+    assert grid.run_end(0, 1, "┌", -1) == -1
+    for col in range(grid.width):
+        for row in range(grid.height):
+            below = [r for r in range(row + 1, grid.height) if grid.char(r, col) != "│"]
+            above = [r for r in range(row - 1, -1, -1) if grid.char(r, col) != "│"]
+            assert grid.run_end(col, row, "│") == (below or [grid.height])[0]
+            assert grid.run_end(col, row, "│", -1) == (above or [-1])[0]
+
+
+def test_find_boxes_uses_shared_column_index():
+    code_lines = list(enumerate(NESTED))
+    block = CodeBlock(-1, len(NESTED), code_lines)
+    assert block.columns is block.columns
+    boxes = _find_boxes(code_lines, block.columns)
+    assert boxes == _find_boxes(code_lines)
+    assert [(left, right, top, bottom) for left, right, top, bottom, _ in boxes] == [
+        (0, 15, 0, 5),
+        (19, 26, 0, 3),
+        (3, 12, 1, 3),
+    ]
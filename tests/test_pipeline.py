@@ -0,0 +1,184 @@
+import random
+from pathlib import Path
+from types import SimpleNamespace
+
+from docalign import cli, prose, run_checks, run_fixes
+from docalign.checks import (
+    box_spacing,
+    box_walls,
+    def_lists,
+    horiz_arrows,
+    list_descs,
+    pipes,
+    rails,
+    tables,
+    wide_chars,
+)
+from docalign.memo import BlockMemo
+from docalign.parser import Document
+from docalign.width import pad, width
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def test_run_fixes_returns_a_new_list():
+    lines = (FIXTURES / "general/mixed/01-multi-issue/expected.md").read_text().splitlines(keepends=True)
+    assert run_checks(lines) == []
+    fixed = run_fixes(lines)
+    assert fixed == lines
+    assert fixed is not lines
+
+
+def _lines(path):
+    return (FIXTURES / path / "input.md").read_text().splitlines(keepends=True)
+
+
+MULTI_BLOCK = [
+    "general/nested/07-complex-nested",
+    "checks/box-walls/03-nested-cascade",
+    "general/deploy/01-pipeline-with-merge",
+    "checks/rails/01-column-drift",
+]
+
+
+def test_stable_block_leaves_the_convergence_loop(monkeypatch):
+    calls = []
+    walls = cli.CONVERGENCE_MODULES["box-walls"]
+
+    def counting_fix_block(block, all_lines):
+        calls.append(block.start)
+        walls.fix_block(block, all_lines)
+
+    monkeypatch.setitem(cli.CONVERGENCE_MODULES, "box-walls", SimpleNamespace(fix_block=counting_fix_block))
+    aligned = (FIXTURES / "general/nested/07-complex-nested/expected.md").read_text().splitlines(keepends=True)
+    drifting = _lines("general/nested/07-complex-nested")
+
+    cli.run_fixes(aligned + ["\n"] + drifting, memo=BlockMemo(maxsize=0))
+
+    blocks = Document(aligned + ["\n"] + drifting).code_blocks
+    first, last = blocks[0].start, blocks[-1].start
+    assert calls.count(first) == 1
+    assert calls.count(last) > 1
+
+
+def test_multi_block_fix_matches_per_document_fix():
+    docs = [_lines(path) for path in MULTI_BLOCK]
+    combined = [line for doc in docs for line in [*doc, "\n"]]
+    expected = [line for doc in docs for line in [*run_fixes(doc), "\n"]]
+    assert run_fixes(combined, memo=BlockMemo(maxsize=0)) == expected
+
+
+def test_fixers_keep_the_shared_column_index_intact():
+    for path in MULTI_BLOCK:
+        doc = Document(_lines(path))
+        for block in doc.code_blocks:
+            before = [list(block.columns.rows_below("└", col, -1)) for col in range(40)]
+            fixed = list(doc.lines)
+            box_walls.fix_block(block, fixed)
+            box_spacing.fix_block(block, fixed)
+            assert block.columns.rows == [raw for _, raw in block.code_lines]
+            assert [list(block.columns.rows_below("└", col, -1)) for col in range(40)] == before
+
+
+def test_rail_clusters_match_first_fit_over_all_clusters():
+    rng = random.Random(3)
+    items = [(i, "", tuple(sorted(rng.sample(range(30), 3)))) for i in range(300)]
+    clusters = []
+    for item in items:
+        for cluster in clusters:
+            if all(abs(a - b) <= 1 for a, b in zip(item[2], cluster[0][2])):
+                cluster.append(item)
+                break
+        else:
+            clusters.append([item])
+    assert rails._cluster_by_positions(items, threshold=1) == [c for c in clusters if len(c) >= 2]
+
+
+def test_pipe_traces_are_shared_between_check_and_fix(monkeypatch):
+    calls = []
+    trace = pipes._trace_pipes
+    monkeypatch.setattr(pipes, "_trace_pipes", lambda *args: calls.append(1) or trace(*args))
+    lines = ["```\n", "┌──┬──┐\n", "└──┼──┘\n", "    │\n", "   │\n", "┌──┴──┐\n", "└─────┘\n", "```\n"]
+    block = Document(lines).code_blocks[0]
+    errors = pipes.check_block(block)
+    fixed = list(lines)
+    pipes.fix_block(block, fixed)
+    assert errors and len(calls) == 1
+    assert pipes.check(fixed) == []
+
+
+def test_left_arrows_are_closed_in_one_pass():
+    top, bottom = "┌────┐      ┌────┐      ┌────┐\n", "└────┘      └────┘      └────┘\n"
+    lines = ["```\n", top, "│    │  <───│    │  <───│    │\n", bottom, "```\n"]
+    assert [e.col for e in horiz_arrows.check(lines)] == [8, 20]
+    assert horiz_arrows.fix(lines)[2] == "│    │<─────│    │<─────│    │\n"
+
+
+def test_box_parents_match_first_enclosing_box():
+    rng = random.Random(5)
+    boxes = []
+    for row in range(200):
+        left = rng.randrange(60)
+        boxes.append((left, left + rng.randrange(3, 40), row, row + 2, [row + 1]))
+    keys = [box[:4] for box in boxes]
+    assert box_spacing._parents(boxes) == [box_spacing._first_enclosing(keys, key) for key in keys]
+
+
+def test_box_tree_updates_match_a_fresh_scan(monkeypatch):
+    inner = ["┌──────┐", "│ ab   │", "│cd    │", "└──────┘"]
+    outer = ["┌" + "─" * 10 + "┐"] + ["│ " + row + " │" for row in inner] + ["└" + "─" * 10 + "┘"]
+    lines = ["```\n"] + [row + "   " + row + "\n" for row in outer] + ["```\n"]
+    updated = []
+    update = box_spacing._BoxTree.update
+    monkeypatch.setattr(box_spacing._BoxTree, "update", lambda self, *args: updated.append(self) or update(self, *args))
+    fixed = list(lines)
+    box_spacing.fix_block(Document(lines).code_blocks[0], fixed)
+    assert box_spacing.check(fixed) == [] and updated
+    block = Document(fixed).code_blocks[0]
+    fresh = box_spacing._BoxTree(block.code_lines, block.columns)
+    assert (updated[-1].boxes, updated[-1].parents) == (fresh.boxes, fresh.parents)
+
+
+def test_table_rows_split_outside_code_spans():
+    assert tables.split_table_row("| a | b |") == ["", " a ", " b ", ""]
+    assert tables.split_table_row("| `a|b` | c |") == ["", " `a|b` ", " c ", ""]
+    assert tables.split_table_row("| `a | b`|` c |") == ["", " `a | b`", "` c |"]
+
+
+def test_table_fix_takes_widths_from_all_but_the_last_separator():
+    lines = ["| a | b |\n", "|--|---|\n", "| --- | - |\n", "|---|---|\n", "| ccc | d |\n"]
+    assert tables.fix(lines) == [
+        "| a   | b   |\n",
+        "| --  | --- |\n",
+        "| --- | -   |\n",
+        "|-----|-----|\n",
+        "| ccc | d   |\n",
+    ]
+
+
+def test_display_width():
+    assert width("abc") == 3
+    assert width("日本語") == 6
+    assert width("naïve") == 5
+    assert width("\U0001f600 ok") == 5
+    assert pad("中文", 6) == "中文  "
+
+
+def test_wide_chars_only_probe_suspicious_characters():
+    wide_chars._is_wide_char.cache_clear()
+    lines = ["```\n", "│ ok → │\n", "│ ★ é ★ │\n", "└──────┘\n", "```\n"]
+    assert [(e.line, e.col, e.detail) for e in wide_chars.check(lines)] == [(3, 2, "★"), (3, 6, "★")]
+    assert wide_chars._is_wide_char.cache_info().currsize == 2
+
+
+def test_prose_scan_is_shared_and_follows_fixes(monkeypatch):
+    lines = ["- a - x\n", "- bbb - y\n", "\n", "- k: 1\n", "- long: 2\n"]
+    doc = Document(lines)
+    assert list_descs.check(doc) and def_lists.check(doc)
+    assert [[i for i, *_ in g] for g in prose.scan(doc).desc_groups + prose.scan(doc).def_groups] == [[0, 1], [3, 4]]
+    classified = []
+    classify = prose.classify
+    monkeypatch.setattr(prose, "classify", lambda raw: classified.append(raw) or classify(raw))
+    fixed = doc.updated(list_descs.fix(doc))
+    assert def_lists.fix(fixed) == ["- a   - x\n", "- bbb - y\n", "\n", "- k:    1\n", "- long: 2\n"]
+    assert classified == ["- a   - x"]
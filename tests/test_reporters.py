@@ -0,0 +1,96 @@
+import io
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from docalign import cli
+from docalign.diagnostics import Diagnostic
+from docalign.reporters import JsonLinesReporter, SarifReporter
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _run(monkeypatch, capsys, *args):
+    monkeypatch.setattr(sys, "argv", ["docalign", "--no-cache", *args])
+    try:
+        cli.main()
+        code = 0
+    except SystemExit as exc:
+        code = exc.code
+    return code, capsys.readouterr().out
+
+
+@pytest.fixture
+def docs_dir(tmp_path, monkeypatch):
+    for name in ("box-walls/01-short-wall", "tables/01-col-mismatch"):
+        shutil.copy(FIXTURES / "checks" / name / "input.md", tmp_path / f"{name.replace('/', '_')}.md")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_jsonl_matches_text_output(docs_dir, monkeypatch, capsys):
+    _, text = _run(monkeypatch, capsys, ".")
+    code, out = _run(monkeypatch, capsys, "--format", "jsonl", ".")
+    assert code == 1
+    records = [json.loads(line) for line in out.splitlines()]
+    assert [f"L{r['line']} {r['message']}" for r in records] == [
+        line.strip() for line in text.splitlines() if line.startswith("  ")
+    ]
+    assert {r["file"] for r in records} == {"box-walls_01-short-wall.md", "tables_01-col-mismatch.md"}
+    assert any(r["hint"] for r in records)
+
+
+def test_sarif_is_a_single_valid_run(docs_dir, monkeypatch, capsys):
+    code, out = _run(monkeypatch, capsys, "--format", "sarif", ".")
+    assert code == 1
+    log = json.loads(out)
+    assert log["version"] == "2.1.0"
+    (run,) = log["runs"]
+    rules = [rule["id"] for rule in run["tool"]["driver"]["rules"]]
+    assert run["results"]
+    for result in run["results"]:
+        assert rules[result["ruleIndex"]] == result["ruleId"]
+        region = result["locations"][0]["physicalLocation"]["region"]
+        assert region["startLine"] >= 1
+
+
+def test_machine_formats_when_aligned(tmp_path, monkeypatch, capsys):
+    (tmp_path / "ok.md").write_text("# Title\n")
+    monkeypatch.chdir(tmp_path)
+    assert _run(monkeypatch, capsys, "--format", "jsonl", ".") == (0, "")
+    code, out = _run(monkeypatch, capsys, "--format", "sarif", ".")
+    assert code == 0
+    assert json.loads(out)["runs"][0]["results"] == []
+
+
+def test_fix_mode_reports_only_remaining(docs_dir, monkeypatch, capsys):
+    code, out = _run(monkeypatch, capsys, "--fix", "--format", "jsonl", ".")
+    assert (code, out) == (0, "")
+    assert _run(monkeypatch, capsys, ".")[0] == 0
+
+
+def test_reporters_stream_per_file():
+    out = io.StringIO()
+    reporter = JsonLinesReporter(out)
+    reporter.report("a.md", [Diagnostic("pipe", 3, 4, 5)])
+    assert json.loads(out.getvalue())["code"] == "pipe"
+
+    out = io.StringIO()
+    reporter = SarifReporter(out, "1.0")
+    reporter.report("dir/a b.md", [Diagnostic("pipe", 3, 4, 5), Diagnostic("wide-char", 4, 0, detail="→")])
+    written = out.getvalue()
+    reporter.close()
+    assert written.count('"ruleId"') == 2
+    result = json.loads(out.getvalue())["runs"][0]["results"][0]
+    assert result["locations"][0]["physicalLocation"]["artifactLocation"]["uri"] == "dir/a%20b.md"
+    assert result["locations"][0]["physicalLocation"]["region"] == {"startLine": 3, "startColumn": 5}
+
+
+@pytest.mark.parametrize("args", [["--format", "xml", "."], ["--format", "jsonl", "--diff", "."]])
+def test_invalid_format_usage(docs_dir, monkeypatch, capsys, args):
+    code, out = _run(monkeypatch, capsys, *args)
+    assert code == 1
+    assert out.startswith("error:")
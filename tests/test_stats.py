@@ -0,0 +1,77 @@
+import io
+import pstats
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from docalign import cli
+from docalign.memo import BlockMemo
+from docalign.stats import Stats
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _run(monkeypatch, capsys, *args):
+    monkeypatch.setattr(sys, "argv", ["docalign", "--no-cache", *args])
+    try:
+        cli.main()
+        code = 0
+    except SystemExit as exc:
+        code = exc.code
+    captured = capsys.readouterr()
+    return code, captured.out, captured.err
+
+
+@pytest.fixture
+def docs_dir(tmp_path, monkeypatch):
+    for src in sorted((FIXTURES / "checks").rglob("input.md")):
+        name = src.parent.relative_to(FIXTURES).as_posix().replace("/", "_")
+        shutil.copy(src, tmp_path / f"{name}.md")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cli, "_BLOCK_MEMO", BlockMemo())
+    return tmp_path
+
+
+def test_stats_merge_and_report():
+    first, second = Stats(), Stats()
+    assert first.timed("check", "tables", lambda x: x * 2, 21) == 42
+    second.timed("check", "tables", lambda: None)
+    second.add_iteration(1, 0.5)
+    second.add_file("a.md", 0.25)
+    first.merge(second)
+    assert first.modules[("check", "tables")][0] == 2
+    assert first.iterations == {1: [1, 0.5]}
+    out = io.StringIO()
+    first.report(out)
+    assert "tables" in out.getvalue()
+    assert "a.md" in out.getvalue()
+
+
+def test_stats_leave_output_unchanged(docs_dir, monkeypatch, capsys):
+    plain = _run(monkeypatch, capsys, "--jobs", "1", ".")
+    monkeypatch.setattr(cli, "_BLOCK_MEMO", BlockMemo())
+    code, out, err = _run(monkeypatch, capsys, "--stats", "--jobs", "1", ".")
+    assert (code, out) == plain[:2]
+    assert "timings:" in err
+    for name in cli.CHECK_MODULES:
+        assert f"check  {name}" in err
+
+
+def test_fix_stats_include_convergence_iterations(docs_dir, monkeypatch, capsys):
+    code, _, err = _run(monkeypatch, capsys, "--fix", "--stats", "--jobs", "1", ".")
+    assert "fix    box-walls" in err
+    assert "convergence iteration" in err
+    assert "code block memo:" in err
+    assert cli._STATS is None
+
+
+def test_profile_is_merged_across_workers(docs_dir, monkeypatch, capsys):
+    out_file = docs_dir / "run.prof"
+    code, _, err = _run(monkeypatch, capsys, "--profile-out", str(out_file), "--jobs", "2", ".")
+    assert code == 1
+    profile = pstats.Stats(str(out_file))
+    calls = {func[2]: stat[1] for func, stat in profile.stats.items()}
+    assert calls["_check_and_fix"] == len(list(docs_dir.glob("*.md")))
+    assert "check_block" in calls
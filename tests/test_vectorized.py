@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pytest
+
+from docalign import bench, run_checks, run_fixes, vectorized
+from docalign.memo import BlockMemo
+from docalign.parser import Document
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _corpus():
+    docs = [path.read_text().splitlines(keepends=True) for path in sorted(FIXTURES.rglob("*.md"))]
+    return docs + bench.generate_corpus(4, blocks=6, depth=3, table_rows=4, drift=0.3, seed=5)
+
+
+def _results(corpus):
+    return [
+        (str(run_checks(lines, memo=BlockMemo(maxsize=0))), run_fixes(lines, memo=BlockMemo(maxsize=0)))
+        for lines in corpus
+    ]
+
+
+def test_backend_is_opt_in(monkeypatch):
+    monkeypatch.delenv("DOCALIGN_BACKEND", raising=False)
+    assert not vectorized.enabled()
+    monkeypatch.setenv("DOCALIGN_BACKEND", "numpy")
+    monkeypatch.setattr(vectorized, "numpy", None)
+    assert not vectorized.enabled()
+
+
+def test_numpy_backend_matches_pure_python(monkeypatch):
+    pytest.importorskip("numpy")
+    corpus = _corpus()
+    monkeypatch.setenv("DOCALIGN_BACKEND", "python")
+    expected = _results(corpus)
+    monkeypatch.setenv("DOCALIGN_BACKEND", "numpy")
+    monkeypatch.setattr(vectorized, "VECTORIZED_MIN_CELLS", 0)
+    assert _results(corpus) == expected
+
+
+def test_numpy_primitives(monkeypatch):
+    pytest.importorskip("numpy")
+    block = Document(["```\n", "┌──┐ x\n", "│\tab │\n", "\n", "└──┘\n", "```\n"]).code_blocks[0]
+    counts, firsts, lasts, last_solid = vectorized.extents(block.grid)
+    assert counts == [2, 2, 0, 2]
+    assert [(firsts[row], lasts[row]) for row in (0, 1, 3)] == [(0, 3), (0, 5), (0, 3)]
+    assert last_solid == [5, 5, -1, 3]
+    assert vectorized.box_positions(block.grid) == [block.positions[i] for i in block.indices]
+    assert vectorized.column_rows(block.grid, 1, 4) == {0: [0, 2], 3: [2], 5: [0]}
@@ -0,0 +1,75 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from docalign import watch
+from docalign.cli import _select_changed
+
+CASE = Path(__file__).parent / "fixtures/checks/tables/01-col-mismatch"
+
+
+class _Batches:
+    def __init__(self, *batches):
+        self.batches = list(batches)
+
+    def poll(self, timeout):
+        if timeout is not None:
+            return set()
+        batch = self.batches.pop(0)
+        return batch() if callable(batch) else batch
+
+
+@pytest.mark.parametrize(
+    "polling",
+    [True, pytest.param(False, marks=pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify"))],
+)
+def test_watcher_reports_modified_and_new_files(tmp_path, polling):
+    doc = tmp_path / "a.md"
+    doc.write_text("# a\n")
+    watcher = watch.make_watcher([str(tmp_path)], polling)
+    assert isinstance(watcher, watch.PollingWatcher) == polling
+    try:
+        doc.write_text("# a changed\n")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub/b.md").write_text("# b\n")
+        (tmp_path / "notes.txt").write_text("x\n")
+        seen = set()
+        for _ in range(20):
+            seen |= watch.next_batch(watcher, debounce=0.05)
+            if len(seen) == 2:
+                break
+        assert seen == {str(doc), str(tmp_path / "sub/b.md")}
+    finally:
+        watcher.close()
+
+
+def test_watch_rechecks_only_changed_files(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(CASE / "input.md", tmp_path / "a.md")
+    shutil.copy(CASE / "expected.md", tmp_path / "b.md")
+    files = [str(tmp_path / "a.md"), str(tmp_path / "b.md")]
+    session = watch.Watch(["."], files, set(), _select_changed, str)
+    new = tmp_path / "c.md"
+
+    def fix_a_and_add_c():
+        shutil.copy(CASE / "expected.md", tmp_path / "a.md")
+        shutil.copy(CASE / "input.md", new)
+        return {str(tmp_path / "a.md"), str(new), str(tmp_path / "ignored.txt")}
+
+    session.run(_Batches(fix_a_and_add_c), batches=1)
+
+    out = capsys.readouterr().out
+    initial, update = out.split("watching 2 file(s)")
+    assert "a.md:\n" in initial and "b.md" not in initial
+    assert "a.md: aligned" in update
+    assert "c.md:\n" in update
+    assert "ALL DOCS" not in update and "4 error(s) in 1 file(s) - watching 3 file(s)" in update
+    assert set(session.checkers) == {*files, str(new)}
+
+
+def test_overflow_rechecks_everything(tmp_path):
+    session = watch.Watch(["."], [str(tmp_path / "a.md")], set(), _select_changed, str)
+    assert session.changed_files(watch.OVERFLOW) == {str(tmp_path / "a.md")}
+    assert watch.next_batch(_Batches(watch.OVERFLOW)) is watch.OVERFLOW